@@ -0,0 +1,149 @@
+"""Throughput and memory of the dashboard aggregates on synthetic data.
+
+The classes follow asv conventions (``time_*`` / ``peakmem_*`` methods,
+``params`` over the data scale), so ``asv run`` picks them up with the
+asv.conf.json at the repository root. Without asv:
+
+    python -m benchmarks.aggregates --scales 1 10 100 [--engine process]
+"""
+import argparse
+import functools
+import os
+import timeit
+import tracemalloc
+
+from benchmarks.synthetic import generate
+from olist import aggregates, parallel
+from olist.cube import PERIODS, RollupCube
+from olist.filters import FilterIndex
+
+SCALES_ENV = "OLIST_BENCH_SCALES"
+# 100x needs several GB of RAM; opt in with OLIST_BENCH_SCALES="1 10 100"
+SCALES = [float(s) for s in os.environ.get(SCALES_ENV, "1 10").split()]
+
+FUNCTIONS = {
+    "create_daily_orders_df": aggregates.create_daily_orders_df,
+    "create_sum_order_items_df": aggregates.create_sum_order_items_df,
+    "create_mean_product_score_df": aggregates.create_mean_product_score_df,
+    "create_category_df": aggregates.create_category_df,
+    "create_bystate_df": aggregates.create_bystate_df,
+    "create_distance_df": aggregates.create_distance_df,
+    "create_delivery_time": aggregates.create_delivery_time,
+    "create_rfm_df": aggregates.create_rfm_df,
+}
+for _period in PERIODS:
+    FUNCTIONS[f"orders_by_state[{_period}]"] = functools.partial(aggregates.orders_by_state, time_period=_period)
+
+
+@functools.lru_cache(maxsize=1)
+def dataset(scale):
+    return generate(scale)
+
+
+class Aggregates:
+    params = (SCALES, list(FUNCTIONS))
+    param_names = ["scale", "function"]
+    timeout = 600
+
+    def setup(self, scale, function):
+        self.df = dataset(scale)
+
+    def time_aggregate(self, scale, function):
+        FUNCTIONS[function](self.df)
+
+    def peakmem_aggregate(self, scale, function):
+        FUNCTIONS[function](self.df)
+
+
+class Rollup:
+    """The precomputed paths the dashboard uses instead of the raw groupbys."""
+    params = (SCALES, list(PERIODS))
+    param_names = ["scale", "period"]
+    timeout = 600
+
+    def setup(self, scale, period):
+        self.df = dataset(scale)
+        self.cube = RollupCube(self.df)
+        self.cells = self.cube.slice()
+
+    def time_build_rollup(self, scale, period):
+        RollupCube(self.df)
+
+    def time_orders_by_state(self, scale, period):
+        self.cube.orders_by_state(self.cells, period)
+
+    def time_daily_orders(self, scale, period):
+        self.cube.daily_orders(self.cells)
+
+
+class Engines:
+    """The partitioned operations on each installed engine; results are identical."""
+    params = (SCALES, parallel.available_engines(), list(parallel.OPERATIONS))
+    param_names = ["scale", "engine", "operation"]
+    timeout = 600
+
+    def setup(self, scale, engine, operation):
+        self.df = dataset(scale)
+
+    def time_run(self, scale, engine, operation):
+        parallel.run(operation, self.df, engine)
+
+
+class Filter:
+    params = [SCALES]
+    param_names = ["scale"]
+    timeout = 600
+
+    def setup(self, scale):
+        self.df = dataset(scale)
+        self.index = FilterIndex(self.df)
+        self.states = list(self.df["customer_state"].cat.categories[:3])
+
+    def time_build_index(self, scale):
+        FilterIndex(self.df)
+
+    def time_filter_dates(self, scale):
+        self.index.filter("2017-06-01", "2018-01-01")
+
+    def time_filter_states(self, scale):
+        self.index.filter("2017-06-01", "2018-01-01", self.states)
+
+
+def measure(func, df):
+    """(seconds per call, peak MiB traced during one call)."""
+    runs, total = timeit.Timer(lambda: func(df)).autorange()
+    tracemalloc.start()
+    try:
+        func(df)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return total / runs, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=float, default=SCALES)
+    parser.add_argument("--functions", nargs="+", default=list(FUNCTIONS), choices=list(FUNCTIONS),
+                        metavar="NAME")
+    parser.add_argument("--engine", choices=parallel.ENGINES, help=f"sets {parallel.ENGINE_ENV} for the run")
+    args = parser.parse_args()
+    if args.engine:
+        os.environ[parallel.ENGINE_ENV] = args.engine
+
+    print(f"{'function':<34} {'scale':>6} {'rows':>10} {'ms':>10} {'Mrows/s':>9} {'peak MiB':>9}")
+    previous = {}
+    for scale in args.scales:
+        df = dataset(scale)
+        for name in args.functions:
+            seconds, peak = measure(FUNCTIONS[name], df)
+            # Flag super-linear growth: time per row rising by more than 2x between scales
+            per_row = seconds / len(df)
+            cliff = "  <- scaling cliff" if name in previous and per_row > 2 * previous[name] else ""
+            previous[name] = per_row
+            print(f"{name:<34} {scale:>6g} {len(df):>10} {seconds * 1000:>10.2f} "
+                  f"{len(df) / seconds / 1e6:>9.2f} {peak:>9.1f}{cliff}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Concurrent load against the aggregates API.
+
+Starts the API in-process on a free port (or targets ``--url``) and sends
+random filter combinations from ``--concurrency`` async clients for
+``--duration`` seconds, then prints throughput and latency percentiles per
+aggregate and the server's memo hit rate.
+
+    python -m benchmarks.api_load --concurrency 32 --duration 20 [--data path/to/dataset]
+"""
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+NAMES = ["daily_orders", "orders_by_state", "category_sales", "review_scores", "state_counts",
+         "distinct_counts", "distance_histogram", "delivery_time_histogram", "outlier_bounds", "rfm_segments",
+         "cohorts", "top_sellers", "density", "nearby"]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_path=None):
+    """Run the API on a background thread; returns its base URL once it is up."""
+    import uvicorn
+
+    from olist.api import create_app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(data_path), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("API did not start")
+
+
+def random_params(rng, health, states, repeat_share):
+    # A share of requests repeat a handful of popular filters, the rest are fresh
+    if rng.random() < repeat_share:
+        rng = random.Random(rng.randrange(8))
+    lo = pd.Timestamp(health["min_date"]).normalize()
+    days = (pd.Timestamp(health["max_date"]).normalize() - lo).days
+    start = rng.randrange(days)
+    end = min(days, start + rng.choice([7, 30, 90, 365, days]))
+    params = [("start", str((lo + pd.Timedelta(days=start)).date())),
+              ("end", str((lo + pd.Timedelta(days=end)).date()))]
+    params += [("state", s) for s in rng.sample(states, rng.choice([0, 0, 1, 2]))]
+    return rng.choice(NAMES), params
+
+
+async def worker(client, url, health, states, deadline, results, seed, repeat_share):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        name, params = random_params(rng, health, states, repeat_share)
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"{url}/aggregates/{name}", params=params)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results.append((name, time.perf_counter() - start, ok))
+
+
+async def run(url, concurrency, duration, repeat_share):
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=concurrency)) as client:
+        health = (await client.get(f"{url}/health")).json()
+        state_counts = (await client.get(f"{url}/aggregates/state_counts")).json()
+        states = [row["customer_state"] for row in state_counts]
+
+        results = []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, url, health, states, deadline, results, seed, repeat_share)
+                               for seed in range(concurrency)))
+        stats = (await client.get(f"{url}/stats")).json()
+    return results, stats
+
+
+def report(results, duration, stats):
+    df = pd.DataFrame(results, columns=["aggregate", "seconds", "ok"])
+    rows = []
+    for name, group in [("all", df)] + sorted(df.groupby("aggregate")):
+        ms = group["seconds"].to_numpy() * 1000
+        rows.append({"aggregate": name, "requests": len(group), "errors": int((~group["ok"]).sum()),
+                     "req/s": len(group) / duration, "p50 ms": np.percentile(ms, 50),
+                     "p95 ms": np.percentile(ms, 95), "p99 ms": np.percentile(ms, 99)})
+    print(pd.DataFrame(rows).to_string(index=False, float_format="{:.1f}".format))
+
+    memo = pd.DataFrame(stats["aggregates"])
+    if len(memo):
+        hits, misses = memo["hits"].sum(), memo["misses"].sum()
+        print(f"memo: {stats['entries']} entries, {stats['evictions']} evictions, "
+              f"hit rate {hits / max(hits + misses, 1):.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running API; by default one is started in-process")
+    parser.add_argument("--data", help="dataset for the in-process API (default: OLIST_DATA_PATH or download)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--repeat-share", type=float, default=0.5,
+                        help="share of requests that reuse one of a few popular filters")
+    args = parser.parse_args()
+
+    url = args.url or start_server(args.data)
+    results, stats = asyncio.run(run(url, args.concurrency, args.duration, args.repeat_share))
+    report(results, args.duration, stats)
+
+
+if __name__ == "__main__":
+    main()
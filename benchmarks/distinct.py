@@ -0,0 +1,79 @@
+"""Error and speed of the HyperLogLog distinct counts against exact nunique.
+
+Draws random date/state/city filters over synthetic data and compares
+``DistinctCube.distinct_counts`` with ``create_distinct_counts_df`` on the
+filtered rows:
+
+    python -m benchmarks.distinct --scale 1 --filters 200
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate
+from olist.aggregates import create_distinct_counts_df
+from olist.compact import compact_frame
+from olist.filters import FilterIndex
+from olist.hll import DISTINCT_COLUMNS, PRECISION, DistinctCube, standard_error
+
+
+def random_filters(df, n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(df["order_purchase_timestamp"].min().floor("D"), df["order_purchase_timestamp"].max(), freq="D")
+    states = df["customer_state"].cat.categories
+    for _ in range(n):
+        start = days[rng.integers(len(days))]
+        end = min(days[-1], start + pd.Timedelta(days=int(rng.choice([7, 30, 90, 365, len(days)]))))
+        selected = list(rng.choice(states, rng.choice([0, 0, 1, 3]), replace=False))
+        cities = None
+        if selected and rng.random() < 0.3:
+            options = df.loc[df["customer_state"].isin(selected), "customer_city"].unique()
+            cities = list(rng.choice(options, min(len(options), 5), replace=False))
+        yield start, end, selected or None, cities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--filters", type=int, default=200)
+    parser.add_argument("--precision", type=int, default=PRECISION)
+    parser.add_argument("--min-count", type=int, default=100,
+                        help="relative errors are reported for counts of at least this size")
+    args = parser.parse_args()
+
+    df, _ = compact_frame(generate(args.scale))
+    index = FilterIndex(df)
+    start = time.perf_counter()
+    cube = DistinctCube(df, precision=args.precision)
+    print(f"{len(df)} rows, {len(cube)} register cells, built in {time.perf_counter() - start:.2f}s; "
+          f"standard error {standard_error(args.precision):.2%}")
+
+    errors, exact_seconds, approx_seconds = [], 0.0, 0.0
+    for start_day, end_day, states, cities in random_filters(df, args.filters):
+        t = time.perf_counter()
+        rows = index.filter(start_day, end_day + pd.Timedelta(days=1), states or [], cities or [])
+        exact = create_distinct_counts_df(rows).set_index("customer_state")
+        exact_seconds += time.perf_counter() - t
+
+        t = time.perf_counter()
+        approx = cube.distinct_counts(start_day, end_day, states, cities).set_index("customer_state")
+        approx_seconds += time.perf_counter() - t
+
+        for name in DISTINCT_COLUMNS:
+            both = pd.concat([exact[name], approx[name]], axis=1, keys=["exact", "approx"]).fillna(0)
+            both = both[both["exact"] >= args.min_count]
+            errors.append(pd.DataFrame({"count": name,
+                                        "error": ((both["approx"] - both["exact"]) / both["exact"]).abs()}))
+
+    errors = pd.concat(errors).groupby("count")["error"]
+    summary = pd.DataFrame({"counts": errors.size(), "median": errors.median(),
+                            "p95": errors.quantile(0.95), "max": errors.max()})
+    print(summary.to_string(formatters={"counts": "{:d}".format}, float_format="{:.2%}".format))
+    print(f"exact {exact_seconds / args.filters * 1000:.2f} ms/filter (filter + nunique), "
+          f"approx {approx_seconds / args.filters * 1000:.2f} ms/filter (merge registers)")
+
+
+if __name__ == "__main__":
+    main()
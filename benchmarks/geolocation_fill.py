@@ -0,0 +1,67 @@
+"""Time the vectorized geolocation backfill against the notebook's loop (tests/test_etl.py checks they agree).
+
+    python -m benchmarks.geolocation_fill [rows]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from olist.etl import fill_missing_geolocation
+
+STATES = ["SP", "RJ", "MG", "RS", "PR", "BA", "SC", "GO", "PE", "CE"]
+
+
+def notebook_loop(all_df, geoloc_state_df, state_column):
+    # Cell "Mengisi koordinat kode pos ..." of proyek_akhir_analisa_data.ipynb, writing through .loc
+    # (the cell's chained assignment is a no-op under copy-on-write); same loop as tests/test_etl.py
+    all_df = all_df.copy()
+    i = 0
+    while i < len(all_df["order_id"]):
+        cek = pd.isna(all_df["geolocation_lat"][i])
+        if cek == True:
+            all_df.loc[i, "geolocation_lat"] = geoloc_state_df.loc[geoloc_state_df["geolocation_state"] == all_df[state_column][i], 'state_geolocation_lat'].iloc[0]
+            all_df.loc[i, "geolocation_lng"] = geoloc_state_df.loc[geoloc_state_df["geolocation_state"] == all_df[state_column][i], 'state_geolocation_lng'].iloc[0]
+        i = i+1
+    return all_df
+
+
+def sample(rows, missing=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    geoloc_state_df = pd.DataFrame({
+        "geolocation_state": STATES,
+        "state_geolocation_lat": rng.uniform(-30, -5, len(STATES)),
+        "state_geolocation_lng": rng.uniform(-60, -35, len(STATES)),
+    })
+    all_df = pd.DataFrame({
+        "order_id": np.arange(rows),
+        "customer_state": rng.choice(STATES, rows),
+        "geolocation_lat": rng.uniform(-30, -5, rows),
+        "geolocation_lng": rng.uniform(-60, -35, rows),
+    })
+    gaps = rng.random(rows) < missing
+    all_df.loc[gaps, ["geolocation_lat", "geolocation_lng"]] = np.nan
+    return all_df, geoloc_state_df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    all_df, geoloc_state_df = sample(rows)
+
+    start = time.perf_counter()
+    expected = notebook_loop(all_df, geoloc_state_df, "customer_state")
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = fill_missing_geolocation(all_df, geoloc_state_df, "customer_state")
+    vector_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected)
+    print(f"{rows} rows, {all_df['geolocation_lat'].isna().sum()} missing: identical coordinates")
+    print(f"loop        {loop_time * 1000:9.2f} ms")
+    print(f"vectorized  {vector_time * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
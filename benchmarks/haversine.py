@@ -0,0 +1,45 @@
+"""Compare the scalar haversine with haversine_np on the full merged dataset.
+
+    python -m benchmarks.haversine [path/to/downloaded_file.csv]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from olist.geo import haversine, haversine_np
+from olist.loader import fetch_dataset, read_all_df
+
+COLUMNS = ["seller_geolocation_lat", "seller_geolocation_lng",
+           "customer_geolocation_lat", "customer_geolocation_lng"]
+
+
+def scalar(df):
+    order_distance = list(map(haversine, *(df[c] for c in COLUMNS)))
+    return [round(x, 2) for x in order_distance]
+
+
+def vectorized(df, dtype=np.float64, chunk_size=None):
+    return np.round(haversine_np(*(df[c] for c in COLUMNS), dtype=dtype, chunk_size=chunk_size), 2)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else fetch_dataset()[0]
+    df = read_all_df(path, columns=COLUMNS + ["order_purchase_timestamp"])
+    print(f"{len(df)} rows")
+
+    expected = np.asarray(scalar(df))
+    cases = {
+        "scalar map": lambda: scalar(df),
+        "numpy float64": lambda: vectorized(df),
+        "numpy float64, 16k chunks": lambda: vectorized(df, chunk_size=1 << 14),
+        "numpy float32": lambda: vectorized(df, dtype=np.float32),
+    }
+    for name, fn in cases.items():
+        runs, total = timeit.Timer(fn).autorange()
+        max_err = np.abs(np.asarray(fn(), dtype=np.float64) - expected).max()
+        print(f"{name:<28} {total / runs * 1000:9.2f} ms   max abs diff {max_err:.4f} km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Synthetic all_df with the shape of the merged Olist dataset, at any scale.
+
+Scale 1 is about the size of the real merged table (~113k order items,
+~98k orders); every id space grows with the scale so cardinalities, items per
+order and repeat customers keep the same ratios at 10x or 100x.
+
+    python -m benchmarks.synthetic 10 -o synthetic_10x.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from olist.geo import haversine_np
+from olist.schema import SCHEMA, SORT_COLUMN, apply_schema
+
+BASE_ORDERS = 98_000
+# customer_id is per order; customer_unique_id identifies the person
+BASE_CUSTOMERS = 95_500
+BASE_SELLERS = 3_000
+BASE_PRODUCTS = 32_000
+CITIES = 4_100
+CATEGORIES = 71
+
+START = pd.Timestamp("2016-09-04")
+END = pd.Timestamp("2018-09-03")
+
+# Approximate share of customers per state in the real data
+STATE_WEIGHTS = {
+    "SP": 42.0, "RJ": 12.9, "MG": 11.7, "RS": 5.5, "PR": 5.1, "SC": 3.6, "BA": 3.4, "DF": 2.2,
+    "ES": 2.0, "GO": 2.0, "PE": 1.7, "CE": 1.3, "PA": 1.0, "MT": 0.9, "MA": 0.8, "MS": 0.7,
+    "PB": 0.5, "PI": 0.5, "RN": 0.5, "AL": 0.4, "SE": 0.3, "TO": 0.3, "RO": 0.3, "AM": 0.2,
+    "AC": 0.1, "AP": 0.1, "RR": 0.1,
+}
+REVIEW_SCORE_WEIGHTS = [0.115, 0.032, 0.083, 0.193, 0.577]
+
+
+def _ids(prefix, n):
+    return np.char.add(prefix, np.char.zfill(np.arange(n).astype(str), 8)).astype(object)
+
+
+def _zipf_choice(rng, n, size, a=1.1):
+    # Heavy-tailed popularity: a few sellers/products/cities take most rows
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def _pick(rng, weights, size):
+    weights = np.asarray(weights, dtype=np.float64)
+    return rng.choice(len(weights), size=size, p=weights / weights.sum())
+
+
+def generate(scale=1.0, seed=0):
+    """Typed, timestamp-sorted all_df with every SCHEMA column."""
+    rng = np.random.default_rng(seed)
+    n_orders = max(int(BASE_ORDERS * scale), 1)
+    n_customers = max(int(BASE_CUSTOMERS * scale), 1)
+    n_sellers = max(int(BASE_SELLERS * scale), 1)
+    n_products = max(int(BASE_PRODUCTS * scale), 1)
+
+    states = np.array(list(STATE_WEIGHTS))
+    state_of_city = _pick(rng, list(STATE_WEIGHTS.values()), CITIES)
+    city_names = np.char.add("city_", np.arange(CITIES).astype(str))
+    city_lat = rng.uniform(-33, -3, CITIES)
+    city_lng = rng.uniform(-70, -35, CITIES)
+    categories = np.char.add("category_", np.arange(CATEGORIES).astype(str))
+
+    # Orders: purchase time grows over the period, a few customers buy more than once
+    span = (END - START).value
+    purchase = START.value + (np.sqrt(rng.random(n_orders)) * span).astype(np.int64)
+    n_customers = min(n_customers, n_orders)
+    order_customer = rng.permutation(np.concatenate([np.arange(n_customers),
+                                                     rng.integers(0, n_customers, n_orders - n_customers)]))
+    items_per_order = np.minimum(rng.geometric(0.88, n_orders), 21)
+
+    customer_city = _zipf_choice(rng, CITIES, n_customers, a=0.9)
+    seller_city = _zipf_choice(rng, CITIES, n_sellers, a=0.9)
+    product_category = _zipf_choice(rng, CATEGORIES, n_products, a=0.8)
+
+    order = np.repeat(np.arange(n_orders), items_per_order)
+    item_id = np.arange(len(order)) - np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order) + 1
+    n = len(order)
+
+    product = _zipf_choice(rng, n_products, n)
+    seller = _zipf_choice(rng, n_sellers, n)
+    customer = order_customer[order]
+    c_city = customer_city[customer]
+    s_city = seller_city[seller]
+
+    price = np.round(rng.lognormal(4.4, 0.9, n), 2)
+    freight = np.round(rng.gamma(2.5, 8.0, n), 2)
+    # As the notebook derives them per order item row, from the item's sequence number
+    item_value = item_id * price
+    order_value = item_id * (price + freight)
+    # What the customer paid for the whole order
+    payment = np.bincount(order, weights=price + freight, minlength=n_orders)[order]
+
+    delivery_days = np.maximum(rng.gamma(2.2, 5.5, n_orders).round(), 1)[order]
+    timestamps = purchase[order].astype("datetime64[ns]")
+    delivered = timestamps + (delivery_days * 86_400e9).astype("timedelta64[ns]")
+
+    c_lat = city_lat[c_city] + rng.normal(0, 0.05, n)
+    c_lng = city_lng[c_city] + rng.normal(0, 0.05, n)
+    s_lat = city_lat[s_city] + rng.normal(0, 0.05, n)
+    s_lng = city_lng[s_city] + rng.normal(0, 0.05, n)
+
+    all_df = pd.DataFrame({
+        "order_id": _ids("o", n_orders)[order],
+        "order_item_id": item_id,
+        "product_id": _ids("p", n_products)[product],
+        "seller_id": _ids("s", n_sellers)[seller],
+        "price": price,
+        "freight_value": freight,
+        "order_item_value": item_value,
+        "order_value": order_value,
+        "customer_id": _ids("c", n_orders)[order],
+        "order_status": "delivered",
+        "order_purchase_timestamp": timestamps,
+        "order_delivered_customer_date": delivered,
+        "delivery_time": delivery_days,
+        "payment_value": payment,
+        "customer_unique_id": _ids("u", n_customers)[customer],
+        "customer_zip_code_prefix": 10_000 + c_city,
+        "customer_city": city_names[c_city],
+        "customer_state": states[state_of_city[c_city]],
+        "seller_zip_code_prefix": 10_000 + s_city,
+        "seller_city": city_names[s_city],
+        "seller_state": states[state_of_city[s_city]],
+        "product_category_name": categories[product_category[product]],
+        "product_category_name_english": categories[product_category[product]],
+        "review_score": (_pick(rng, REVIEW_SCORE_WEIGHTS, n_orders) + 1.0)[order],
+        "customer_geolocation_lat": c_lat,
+        "customer_geolocation_lng": c_lng,
+        "seller_geolocation_lat": s_lat,
+        "seller_geolocation_lng": s_lng,
+        "order_distance": np.round(haversine_np(s_lat, s_lng, c_lat, c_lng), 2),
+    })
+    all_df = all_df[list(SCHEMA)]
+    all_df = all_df.sort_values(SORT_COLUMN, kind="stable", ignore_index=True)
+    return apply_schema(all_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scale", nargs="?", type=float, default=1.0)
+    parser.add_argument("-o", "--output", default=None, help="write .parquet, .feather or .csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    all_df = generate(args.scale, args.seed)
+    print(f"{len(all_df)} rows, {all_df['order_id'].nunique()} orders, "
+          f"{all_df.memory_usage(deep=True).sum() / 2**20:.1f} MiB")
+    if args.output:
+        if args.output.endswith(".csv"):
+            all_df.to_csv(args.output, index=False)
+        elif args.output.endswith(".feather"):
+            all_df.to_feather(args.output)
+        else:
+            all_df.to_parquet(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,11 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
 import numpy as np
 import scipy as sc
-import math as m
 from babel.numbers import format_currency
-import gdown
+from olist.loader import ensure_columnar, fetch_dataset, read_all_df
+from olist.schema import DASHBOARD_COLUMNS
 sns.set(style='dark')
 
 def create_daily_orders_df(df):
@@ -23,56 +22,35 @@ def create_daily_orders_df(df):
     return daily_orders_df
 
 def create_sum_order_items_df(df):
-    sum_order_items_df = df.groupby("product_category_name_english").order_item_id.sum().sort_values(ascending=False).reset_index()
+    sum_order_items_df = df.groupby("product_category_name_english", observed=True).order_item_id.sum().sort_values(ascending=False).reset_index()
     sum_order_items_df.rename(columns={
         "product_category_name_english": "product_name",
         "order_item_id" : "quantity"
     }, inplace=True)
+    sum_order_items_df["product_name"] = sum_order_items_df["product_name"].astype(str)
     return sum_order_items_df
 
 def create_mean_product_score_df(df):
-    mean_product_score_df = df.groupby("product_category_name_english").review_score.mean().sort_values(ascending=False).reset_index()
+    mean_product_score_df = df.groupby("product_category_name_english", observed=True).review_score.mean().sort_values(ascending=False).reset_index()
     mean_product_score_df.rename(columns={
         "product_category_name_english": "product_name",
         "review_score" : "Score"
     }, inplace=True)
+    mean_product_score_df["product_name"] = mean_product_score_df["product_name"].astype(str)
     return mean_product_score_df
 
 def create_bystate_df(df):
-    bystate_df = df.groupby(by="customer_state").customer_id.nunique().reset_index()
+    bystate_df = df.groupby(by="customer_state", observed=True).customer_id.nunique().reset_index()
     bystate_df.rename(columns={
         "customer_id": "customer_count"
     }, inplace=True)
+    bystate_df["customer_state"] = bystate_df["customer_state"].astype(str)
     
     return bystate_df
 
-def haversine(lat1, lng1, lat2, lng2):
-    # Jari-jari Bumi (dalam kilometer)
-    R = 6371.0
-    
-    # Konversi derajat ke radian
-    lat1, lng1, lat2, lng2 = map(m.radians, [lat1, lng1, lat2, lng2])
-    
-    # Selisih koordinat
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    
-    # Rumus Haversine
-    a = m.sin(dlat / 2)**2 + m.cos(lat1) * m.cos(lat2) * m.sin(dlng / 2)**2
-    c = 2 * m.atan2(m.sqrt(a), m.sqrt(1 - a))
-    
-    # Jarak dalam kilometer
-    jarak = R * c
-    return jarak
-
 def create_distance_df(df):
-    distance_df = df[["order_id","product_category_name_english","customer_id","seller_id","customer_geolocation_lat",
-                   "customer_geolocation_lng","seller_geolocation_lat","seller_geolocation_lng"]]
-    order_distance = list(map(haversine, distance_df["seller_geolocation_lat"],distance_df["seller_geolocation_lng"],
-                              distance_df["customer_geolocation_lat"],distance_df["customer_geolocation_lng"]))
-    order_distance = [round(x, 2) for x in order_distance]
-    distance_df["order_distance"] = order_distance
-    
+    # order_distance is precomputed when the dataset is built (olist.etl.add_order_distance)
+    distance_df = df[["order_id","product_category_name_english","customer_id","seller_id","order_distance"]]
     return distance_df
 
 def create_delivery_time(df):
@@ -94,22 +72,14 @@ def create_rfm_df(df):
     
     return rfm_df
 
-# File ID from Google Drive link
-file_id = "1O05uX_AkbrFRh0zXXzh5fU7bteSbBtgG"
-url = f"https://drive.google.com/uc?id={file_id}"
+# Download once and re-parse only when the file content changes
+@st.cache_resource(ttl=6 * 60 * 60, max_entries=2, show_spinner="Loading dataset...")
+def get_all_df(path, sha256):
+    # Only the columns the tabs use are read from the columnar copy
+    return read_all_df(ensure_columnar(path, sha256), columns=DASHBOARD_COLUMNS)
 
-# Download the file
-output = "data.csv"
-gdown.download(url, output, quiet=False)
-
-# Read into DataFrame
-all_df = pd.read_csv(output)
-datetime_columns = ["order_purchase_timestamp", "order_delivered_customer_date"]
-all_df.sort_values(by="order_purchase_timestamp", inplace=True)
-all_df.reset_index(inplace=True)
- 
-for column in datetime_columns:
-    all_df[column] = pd.to_datetime(all_df[column])
+data_path, data_sha256 = fetch_dataset(output="data.csv")
+all_df = get_all_df(data_path, data_sha256)
 
 min_date = all_df["order_purchase_timestamp"].min()
 max_date = all_df["order_purchase_timestamp"].max()
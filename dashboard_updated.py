@@ -4,417 +4,680 @@ import seaborn as sns
 import streamlit as st
 import numpy as np
 import scipy as sc
-import math as m
+import os
 from babel.numbers import format_currency
-import gdown
+from olist.aggregates import create_bystate_df, create_category_df, create_cohort_df, create_rfm_df
+from olist.charts import (FigureCache, bar_spec, cohort_frame, cohort_spec, heatmap_frame, heatmap_spec,
+                          histogram_spec, line_spec)
+from olist.cohort import cohort_matrix
+from olist.compact import lookups_mb
+from olist.hll import standard_error
+from olist.incremental import PartitionAggregates
+from olist.loader import fetch_dataset
+from olist.profiling import PROFILE_LOG_ENV, StageProfiler, profiled, stage
+from olist.rfm import score_rfm, segment_summary
+from olist.service import Analytics
+from olist.spatial import CELL_DEGREES, LOCATIONS
+from olist.topk import top_bottom_k, top_k
+from olist.views import TabRegistry
+from olist.store import PartitionedStore
 sns.set(style='dark')
 
-def create_daily_orders_df(df):
-    daily_orders_df = df.resample(rule='D', on='order_purchase_timestamp').agg({
-        "order_id": "nunique",
-        "order_item_value": "sum"
-    })
-    daily_orders_df = daily_orders_df.reset_index()
-    daily_orders_df.rename(columns={
-        "order_id": "order_count",
-        "order_item_value": "revenue"
-    }, inplace=True)
-    
-    return daily_orders_df
-
-def create_sum_order_items_df(df):
-    sum_order_items_df = df.groupby("product_category_name_english").order_item_id.sum().sort_values(ascending=False).reset_index()
-    sum_order_items_df.rename(columns={
-        "product_category_name_english": "product_name",
-        "order_item_id" : "quantity"
-    }, inplace=True)
-    return sum_order_items_df
-
-def create_mean_product_score_df(df):
-    mean_product_score_df = df.groupby("product_category_name_english").review_score.mean().sort_values(ascending=False).reset_index()
-    mean_product_score_df.rename(columns={
-        "product_category_name_english": "product_name",
-        "review_score" : "Score"
-    }, inplace=True)
-    return mean_product_score_df
-
-def create_bystate_df(df):
-    bystate_df = df.groupby(by="customer_state").customer_id.nunique().reset_index()
-    bystate_df.rename(columns={
-        "customer_id": "customer_count"
-    }, inplace=True)
-    
-    return bystate_df
-
-def haversine(lat1, lng1, lat2, lng2):
-    # Jari-jari Bumi (dalam kilometer)
-    R = 6371.0
-    
-    # Konversi derajat ke radian
-    lat1, lng1, lat2, lng2 = map(m.radians, [lat1, lng1, lat2, lng2])
-    
-    # Selisih koordinat
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    
-    # Rumus Haversine
-    a = m.sin(dlat / 2)**2 + m.cos(lat1) * m.cos(lat2) * m.sin(dlng / 2)**2
-    c = 2 * m.atan2(m.sqrt(a), m.sqrt(1 - a))
-    
-    # Jarak dalam kilometer
-    jarak = R * c
-    return jarak
-
-def create_distance_df(df):
-    distance_df = df[["order_id","product_category_name_english","customer_id","seller_id","customer_geolocation_lat",
-                   "customer_geolocation_lng","seller_geolocation_lat","seller_geolocation_lng"]]
-    order_distance = list(map(haversine, distance_df["seller_geolocation_lat"],distance_df["seller_geolocation_lng"],
-                              distance_df["customer_geolocation_lat"],distance_df["customer_geolocation_lng"]))
-    order_distance = [round(x, 2) for x in order_distance]
-    distance_df["order_distance"] = order_distance
-    
-    return distance_df
-
-def create_delivery_time(df):
-    delivery_time = df[["delivery_time"]]
-    return delivery_time
-
-def create_rfm_df(df):
-    rfm_df = df.groupby(by="customer_unique_id", as_index=False).agg({
-        "order_purchase_timestamp": "max", #mengambil tanggal order terakhir
-        "order_id": "nunique",
-        "order_item_value": "sum"
-    })
-    rfm_df.columns = ["customer_id", "max_order_timestamp", "frequency", "monetary"]
-    
-    rfm_df["max_order_timestamp"] = rfm_df["max_order_timestamp"].dt.date
-    recent_date = df["order_purchase_timestamp"].dt.date.max()
-    rfm_df["recency"] = rfm_df["max_order_timestamp"].apply(lambda x: (recent_date - x).days)
-    rfm_df.drop("max_order_timestamp", axis=1, inplace=True)
-    
-    return rfm_df
-
-def plot_order(grouped_data,time_period):
-    # Create the plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.heatmap(grouped_data.T, annot=False, cmap="YlGnBu", cbar=True, fmt="d", ax=ax)
-    ax.set_title(f"Orders by State ({time_period})")
-    ax.set_xlabel(time_period)
-    ax.set_ylabel("Customer State")
-    
-    # Display the plot in Streamlit
-    st.pyplot(fig)
-
-def day_(df):
-    # Group by day
-    grouped_data, time_period =  df.groupby([df['order_purchase_timestamp'].dt.date, 'customer_state']).size().unstack(fill_value=0), "Daily"
-    plot_order(grouped_data, time_period)
-
-def week_(df):
-    # Group by week
-    grouped_data, time_period = df.groupby([pd.Grouper(key='order_purchase_timestamp', freq='W'), 'customer_state']).size().unstack(fill_value=0), "Weekly"
-    plot_order(grouped_data, time_period)
-
-def month_(df):
-    # Group by month
-    grouped_data, time_period = df.groupby([pd.Grouper(key='order_purchase_timestamp', freq='M'), 'customer_state']).size().unstack(fill_value=0), "Monthly"
-    plot_order(grouped_data, time_period)
-    
-def quarter_(df):
-    # Group by quarter
-    grouped_data, time_period = df.groupby([pd.Grouper(key='order_purchase_timestamp', freq='Q'), 'customer_state']).size().unstack(fill_value=0), "Quarterly"
-    plot_order(grouped_data, time_period)
-
-# Define a function to choose the grouping method based on the difference
-def group_data_by_date_diff(df, date_diff):
-    st.subheader("Count order by date")
-    if date_diff < 7:
-        day_(df)
-        
-    elif 7 <= date_diff < 30:
-        tab_count1, tab_count2 = st.tabs(["Daily","Weekly"])
-        with tab_count1:
-            day_(df)
-        with tab_count2:
-            week_(df)
-        
-    elif 30 <= date_diff < 90:
-        tab_count1, tab_count2,tab_count3 = st.tabs(["Daily","Weekly","Monthly"])
-        with tab_count1:
-            day_(df)
-        with tab_count2:
-            week_(df)
-        with tab_count3:
-            month_(df)
-
-    else:
-        tab_count1, tab_count2, tab_count3, tab_count4 = st.tabs(["Daily","Weekly","Monthly","Quarter"])
-        with tab_count1:
-            day_(df)
-        with tab_count2:
-            week_(df)
-        with tab_count3:
-            month_(df)
-        with tab_count4:
-            quarter_(df)
-
-# File ID from Google Drive link
-file_id = "1O05uX_AkbrFRh0zXXzh5fU7bteSbBtgG"
-
-# URL format for direct download
-url = f"https://drive.google.com/uc?id={file_id}"
-
-# Download the CSV file
-output = "downloaded_file.csv"
-gdown.download(url, output, quiet=False)
-
-# Read into DataFrame
-all_df = pd.read_csv(output)
-
-datetime_columns = ["order_purchase_timestamp", "order_delivered_customer_date"]
-all_df.sort_values(by="order_purchase_timestamp", inplace=True)
-all_df.reset_index(inplace=True)
- 
-for column in datetime_columns:
-    all_df[column] = pd.to_datetime(all_df[column])
-
-
-
-min_date = all_df["order_purchase_timestamp"].min()
-max_date = all_df["order_purchase_timestamp"].max()
- 
-with st.sidebar:
-    
-    # # Mengambil start_date & end_date dari date_input
-    # start_date, end_date = st.date_input(
-    #     label='Time Span',min_value=min_date,
-    #     max_value=max_date,
-    #     value=[min_date, max_date]
-    # )
-    st.write("**Choose Filter :**")
-    start_date = st.date_input("Start Date", min_value=min_date, 
-                               max_value=max_date, value=None)
-    end_date = st.date_input("End Date", min_value=start_date, 
-                               max_value=max_date, value=None)
-    
-    try:
-        # Jika pengguna tidak memilih tanggal, gunakan default min/max
-        if start_date is None:
-            start_date = min_date
-        if end_date is None:
-            end_date = max_date
-    
-        # Konversi ke datetime
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
-    
-    except Exception as e:
-        st.error(f"Terjadi kesalahan dalam filter tanggal: {e}")
-
-    choose_state = st.multiselect("State", all_df["customer_state"].unique())
-
-
-    if not choose_state:
-        choose_state = all_df["customer_state"].unique()
-
-    dummy1 = all_df[(all_df["customer_state"].isin(choose_state))]
-    
-    choose_city = st.multiselect("City", dummy1["customer_city"].unique())
-
-    # st.write(choose_city is None)
-
-    if not choose_city:
-        choose_city = dummy1["customer_city"].unique()
-
-main_df = all_df[(all_df["order_purchase_timestamp"] >= str(start_date)) & 
-                (all_df["order_purchase_timestamp"] <= str(end_date)) & 
-                (all_df["customer_state"].isin(choose_state)) & 
-                (all_df["customer_city"].isin(choose_city))]
-
-daily_orders_df = create_daily_orders_df(main_df)
-sum_order_items_df = create_sum_order_items_df(main_df)
-mean_product_score_df = create_mean_product_score_df(main_df)
-bystate_df = create_bystate_df(main_df)
-distance_df = create_distance_df(main_df)
-delivery_time = create_delivery_time(main_df)
-rfm_df = create_rfm_df(main_df)
-
-st.title('Dashboard of Brazilian E-Commerce Public Dataset by Olist :sparkles:')
-
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Orders", "Products", "Score", "Demograpics", "RFM"])
- 
-with tab1:
-    st.header("Daily Orders")
-    col1, col2 = st.columns(2)
-     
-    with col1:
-        total_orders = daily_orders_df.order_count.sum()
-        st.metric("Total orders", value=total_orders)
-     
-    with col2:
-        total_revenue = format_currency(daily_orders_df.revenue.sum(), "BRL", locale='pt_BR') 
-        st.metric("Total Revenue", value=total_revenue)
- 
-    fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(
-        daily_orders_df["order_purchase_timestamp"],
-        daily_orders_df["order_count"],
-        marker='o', 
-        linewidth=2,
-        color="#90CAF9"
-    )
-    ax.tick_params(axis='y', labelsize=20)
-    ax.tick_params(axis='x', labelsize=15)
-     
-    st.pyplot(fig)
-    
-    fig, ax = plt.subplots(figsize=(20, 10))
-    sns.histplot(x=delivery_time["delivery_time"],
-                 bins=20
-                 )
-    
-    ax.set_title("Delivery Time", loc="center", fontsize=30)
-    ax.set_ylabel("Number of Order", fontdict={'fontsize': 20})
-    ax.set_xlabel("Days", fontdict={'fontsize': 20})
-    ax.tick_params(axis='y', labelsize=20)
-    ax.tick_params(axis='x', labelsize=15)
-    st.pyplot(fig)
- 
-with tab2:
-    st.header("Best & Worst Performing Product")
-    fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(35, 15))
-     
-    colors = ["#90CAF9", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
-     
-    sns.barplot(x="quantity", y="product_name", data=sum_order_items_df.head(5), palette=colors, ax=ax[0])
-    ax[0].set_ylabel(None)
-    ax[0].set_xlabel("Number of Sales", fontsize=30)
-    ax[0].set_title("Best Performing Product", loc="center", fontsize=50)
-    ax[0].tick_params(axis='y', labelsize=35)
-    ax[0].tick_params(axis='x', labelsize=30)
-     
-    sns.barplot(x="quantity", y="product_name", data=sum_order_items_df.sort_values(by="quantity", ascending=True).head(5), palette=colors, ax=ax[1])
-    ax[1].set_ylabel(None)
-    ax[1].set_xlabel("Number of Sales", fontsize=30)
-    ax[1].invert_xaxis()
-    ax[1].yaxis.set_label_position("right")
-    ax[1].yaxis.tick_right()
-    ax[1].set_title("Worst Performing Product", loc="center", fontsize=50)
-    ax[1].tick_params(axis='y', labelsize=35)
-    ax[1].tick_params(axis='x', labelsize=30)
-    
-    st.pyplot(fig)
- 
-with tab3:
-    st.header("Highest & Lowest Product Score") 
-    fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(35, 15))
-     
-    colors = ["#90CAF9", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
-     
-    sns.barplot(x="Score", y="product_name", data=mean_product_score_df.head(5), palette=colors, ax=ax[0])
-    ax[0].set_ylabel(None)
-    ax[0].set_xlabel("Mean Product Score", fontsize=30)
-    ax[0].set_title("Highest Product Score Product", loc="center", fontsize=50)
-    ax[0].tick_params(axis='y', labelsize=35)
-    ax[0].tick_params(axis='x', labelsize=30)
-     
-    sns.barplot(x="Score", y="product_name", data=mean_product_score_df.sort_values(by="Score", ascending=True).head(5), palette=colors, ax=ax[1])
-    ax[1].set_ylabel(None)
-    ax[1].set_xlabel("Mean Product Score", fontsize=30)
-    ax[1].invert_xaxis()
-    ax[1].yaxis.set_label_position("right")
-    ax[1].yaxis.tick_right()
-    ax[1].set_title("Lowest Product Score", loc="center", fontsize=50)
-    ax[1].tick_params(axis='y', labelsize=35)
-    ax[1].tick_params(axis='x', labelsize=30)
-    
-    st.pyplot(fig)
-
-
-with tab4:
-    st.header("Demographic")
-    st.subheader("Distance")
-    
-    fig, ax = plt.subplots(figsize=(20, 10))
-    sns.histplot(x=distance_df["order_distance"],
-                 bins=10
-                 )
-    
-    ax.set_title("Distance from Seller to Customer", loc="center", fontsize=30)
-    ax.set_ylabel("Number of Order", fontdict={'fontsize': 20})
-    ax.set_xlabel("Distance in kilometers", fontdict={'fontsize': 20})
-    ax.tick_params(axis='y', labelsize=20)
-    ax.tick_params(axis='x', labelsize=15)
-    st.pyplot(fig)
-
-    st.subheader("State")
-    fig, ax = plt.subplots(figsize=(20, 10))
-    colors = ["#90CAF9", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3","#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3","#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3","#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3","#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
-    sns.barplot(
-        x="customer_count", 
-        y="customer_state",
-        data=bystate_df.sort_values(by="customer_count", ascending=False),
-        palette=colors,
-        ax=ax
-    )
-    ax.set_title("Number of Customer by States", loc="center", fontsize=30)
-    ax.set_ylabel(None)
-    ax.set_xlabel(None)
-    ax.tick_params(axis='y', labelsize=20)
-    ax.tick_params(axis='x', labelsize=15)
-    st.pyplot(fig)
-
-    # tab_demo1, tab_demo
-
-    # Find the min and max date
-    min_date = main_df['order_purchase_timestamp'].min()
-    max_date = main_df['order_purchase_timestamp'].max()
-    
-    # Calculate the difference in days between the min and max dates
-    date_diff = (max_date - min_date).days
-
-    group_data_by_date_diff(main_df, date_diff)
-
-with tab5:
-    st.header("Best Customer Based on RFM Parameters")
-     
-    col1, col2, col3 = st.columns(3)
-     
-    with col1:
-        avg_recency = round(rfm_df.recency.mean(), 1)
-        st.metric("Average Recency (days)", value=avg_recency)
-     
-    with col2:
-        avg_frequency = round(rfm_df.frequency.mean(), 2)
-        st.metric("Average Frequency", value=avg_frequency)
-     
-    with col3:
-        avg_frequency = format_currency(rfm_df.monetary.mean(), "BRL", locale='pt_BR') 
-        st.metric("Average Monetary", value=avg_frequency)
-     
-    fig, ax = plt.subplots(nrows=1, ncols=3, figsize=(35, 15))
-    colors = ["#90CAF9", "#90CAF9", "#90CAF9", "#90CAF9", "#90CAF9"]
-     
-    sns.barplot(y="recency", x="customer_id", data=rfm_df.sort_values(by="recency", ascending=True).head(5), palette=colors, ax=ax[0])
-    ax[0].set_ylabel(None)
-    ax[0].set_xlabel("customer_id", fontsize=30)
-    ax[0].set_title("By Recency (days)", loc="center", fontsize=50)
-    ax[0].tick_params(axis='y', labelsize=30)
-    ax[0].tick_params(axis='x', labelrotation=90, labelsize=35)
-     
-    sns.barplot(y="frequency", x="customer_id", data=rfm_df.sort_values(by="frequency", ascending=False).head(5), palette=colors, ax=ax[1])
-    ax[1].set_ylabel(None)
-    ax[1].set_xlabel("customer_id", fontsize=30)
-    ax[1].set_title("By Frequency", loc="center", fontsize=50)
-    ax[1].tick_params(axis='y', labelsize=30)
-    ax[1].tick_params(axis='x', labelrotation=90, labelsize=35)
-     
-    sns.barplot(y="monetary", x="customer_id", data=rfm_df.sort_values(by="monetary", ascending=False).head(5), palette=colors, ax=ax[2])
-    ax[2].set_ylabel(None)
-    ax[2].set_xlabel("customer_id", fontsize=30)
-    ax[2].set_title("By Monetary", loc="center", fontsize=50)
-    ax[2].tick_params(axis='y', labelsize=30)
-    ax[2].tick_params(axis='x', labelrotation=90, labelsize=35)
-     
-    st.pyplot(fig)
+# Rendered PNGs of recent aggregates, shared by all sessions
+@st.cache_resource(max_entries=2)
+def get_figure_cache(sha256):
+    return FigureCache(maxsize=64)
+
+# Download once and re-parse only when the file content changes; the memory-mapped
+# dataset, filter index, rollup cube and aggregate memo are shared by all sessions
+@st.cache_resource(ttl=6 * 60 * 60, max_entries=2, show_spinner="Loading dataset...")
+def get_analytics(path, sha256):
+    analytics = Analytics(path, sha256)
+    # Build the indexes while the spinner is shown rather than on the first filter
+    for index in ("filter_index", "rollup_cube", "sketch_cube", "distinct_cube", "seller_cube", "spatial_index"):
+        getattr(analytics, index)
+    return analytics
+
+# Per-partition aggregates of a partitioned store (OLIST_DATA_PATH=<store dir>)
+@st.cache_resource
+def get_partition_aggregates(path):
+    return PartitionAggregates(PartitionedStore(path))
+
+
+def main():
+    """One rerun of the dashboard: sidebar filters, the selected tab and the cache stats."""
+    def show_chart(name, data, draw, native=None):
+        """Cached PNG of ``draw(data)``, or a Vega-Lite chart when native charts are on.
+
+        ``native`` is a ``(frame, spec)`` pair or a callable returning one.
+        """
+        with stage(f"chart:{name}"):
+            if native_charts and native is not None:
+                frame, spec = native() if callable(native) else native
+                st.vega_lite_chart(frame, spec, width="stretch")
+            else:
+                st.image(figure_cache.png(name, data, draw), width="stretch")
+
+    def histogram_edges(hist_df):
+        # Binned counts (sketch histogram) drawn with the same bars as histplot over the raw values
+        return hist_df["start"].tolist() + [hist_df["end"].iloc[-1]]
+
+    def show_outlier_bounds(sketch, unit):
+        if not len(sketch):
+            return
+        lower, upper = sketch.iqr_bounds()
+        st.caption(f"IQR outlier bounds: {max(lower, 0):,.0f} – {upper:,.0f} {unit} "
+                   f"(from merged sketches, within {sketch.bounds_error():g} {unit})")
+
+    def draw_orders_heatmap(grouped_data, time_period):
+        # Create the plot
+        fig, ax = plt.subplots(figsize=(10, 6))
+        sns.heatmap(grouped_data.T, annot=False, cmap="YlGnBu", cbar=True, fmt="d", ax=ax)
+        ax.set_title(f"Orders by State ({time_period})")
+        ax.set_xlabel(time_period)
+        ax.set_ylabel("Customer State")
+        return fig
+
+    def plot_order(grouped_data,time_period):
+        # Display the plot in Streamlit
+        show_chart(f"heatmap_{time_period}", grouped_data, lambda data: draw_orders_heatmap(data, time_period),
+                   native=lambda: (heatmap_frame(grouped_data), heatmap_spec(f"Orders by State ({time_period})")))
+
+    def day_(cube, cells):
+        # Group by day
+        grouped_data, time_period = cube.orders_by_state(cells, "Daily"), "Daily"
+        plot_order(grouped_data, time_period)
+
+    def week_(cube, cells):
+        # Group by week
+        grouped_data, time_period = cube.orders_by_state(cells, "Weekly"), "Weekly"
+        plot_order(grouped_data, time_period)
+
+    def month_(cube, cells):
+        # Group by month
+        grouped_data, time_period = cube.orders_by_state(cells, "Monthly"), "Monthly"
+        plot_order(grouped_data, time_period)
+
+    def quarter_(cube, cells):
+        # Group by quarter
+        grouped_data, time_period = cube.orders_by_state(cells, "Quarterly"), "Quarterly"
+        plot_order(grouped_data, time_period)
+
+    HEATMAPS = {"Daily": day_, "Weekly": week_, "Monthly": month_, "Quarter": quarter_}
+
+    # Define a function to choose the grouping method based on the difference
+    def group_data_by_date_diff(cube, cells, date_diff):
+        st.subheader("Count order by date")
+        if date_diff < 7:
+            periods = ["Daily"]
+        elif 7 <= date_diff < 30:
+            periods = ["Daily", "Weekly"]
+        elif 30 <= date_diff < 90:
+            periods = ["Daily", "Weekly", "Monthly"]
+        else:
+            periods = ["Daily", "Weekly", "Monthly", "Quarter"]
+
+        # Only the selected heatmap is drawn
+        period = st.radio("Period", periods, horizontal=True, label_visibility="collapsed",
+                          key="heatmap_period") if len(periods) > 1 else periods[0]
+        HEATMAPS[period](cube, cells)
+
+    data_path, data_sha256 = fetch_dataset(output="downloaded_file.csv")
+    analytics = get_analytics(data_path, data_sha256)
+    all_df = analytics.all_df
+    rollup_cube = analytics.rollup_cube
+    filter_index = analytics.filter_index
+    aggregate_memo = analytics.memo
+    figure_cache = get_figure_cache(data_sha256)
+
+    min_date = analytics.min_date
+    max_date = analytics.max_date
+
+    with st.sidebar:
+
+        # # Mengambil start_date & end_date dari date_input
+        # start_date, end_date = st.date_input(
+        #     label='Time Span',min_value=min_date,
+        #     max_value=max_date,
+        #     value=[min_date, max_date]
+        # )
+        st.write("**Choose Filter :**")
+        start_date = st.date_input("Start Date", min_value=min_date, 
+                                   max_value=max_date, value=None)
+        end_date = st.date_input("End Date", min_value=start_date, 
+                                   max_value=max_date, value=None)
+
+        try:
+            # Jika pengguna tidak memilih tanggal, gunakan default min/max
+            if start_date is None:
+                start_date = min_date
+            if end_date is None:
+                end_date = max_date
+
+            # Konversi ke datetime
+            start_date = pd.to_datetime(start_date)
+            end_date = pd.to_datetime(end_date)
+
+        except Exception as e:
+            st.error(f"Terjadi kesalahan dalam filter tanggal: {e}")
+
+        # An empty selection means every state/city; Filter applies that default
+        selected_states = list(st.multiselect("State", all_df["customer_state"].unique()))
+        selected_cities = list(st.multiselect("City", filter_index.city_options(selected_states)))
+
+        # Vega-Lite charts drawn in the browser instead of Matplotlib images
+        native_charts = st.toggle("Native charts", value=False)
+        # Unique customers/orders merged from HyperLogLog registers instead of counted on the rows
+        approx_distinct = st.toggle("Approximate distinct counts", value=False,
+                                    help=f"HyperLogLog, about {standard_error():.1%} standard error")
+
+    # End date is inclusive at day precision, same as the rollup cube
+    current_filter = analytics.make_filter(start_date, end_date, selected_states, selected_cities)
+    start_date, end_date = current_filter.start, current_filter.end
+
+    @profiled("filter main_df")
+    def create_main_df():
+        # Binary search on the sorted timestamps plus per-state/per-city row positions
+        return analytics.main_df(current_filter)
+
+    # main_df is only filtered when one of the aggregates below is not cached yet
+    main_view = aggregate_memo.bind(current_filter.key, create_main_df)
+    unfiltered = analytics.is_unfiltered(current_filter)
+
+    def get_cube_cells(view):
+        # Shared by the Orders and Demograpics tabs
+        return analytics.cube_cells(current_filter)
+
+    def get_category_df(view):
+        # Shared by the Products and Score tabs
+        return view.get("category", create_category_df)
+
+    @profiled()
+    def compute_orders(view):
+        if os.path.isdir(data_path) and unfiltered:
+            # Unfiltered view of a store: only partitions touched by new batches are re-aggregated
+            daily_orders_df = get_partition_aggregates(data_path).daily_orders()
+        else:
+            daily_orders_df = rollup_cube.daily_orders(get_cube_cells(view))
+        return {
+            "daily_orders_df": daily_orders_df,
+            "delivery_time": analytics.sketch("delivery_time", current_filter),
+        }
+
+    @profiled()
+    def compute_products(view):
+        best_products_df, worst_products_df = top_bottom_k(get_category_df(view), "quantity", 5)
+        return {"best_products_df": best_products_df, "worst_products_df": worst_products_df}
+
+    @profiled()
+    def compute_score(view):
+        best_score_df, worst_score_df = top_bottom_k(get_category_df(view), "Score", 5)
+        return {"best_score_df": best_score_df, "worst_score_df": worst_score_df}
+
+    @profiled()
+    def compute_demographics(view):
+        df = view.df
+        return {
+            "distance": analytics.sketch("order_distance", current_filter),
+            "bystate_df": create_bystate_df(df),
+            "date_range": (df['order_purchase_timestamp'].min(), df['order_purchase_timestamp'].max()),
+            "cube_cells": get_cube_cells(view),
+        }
+
+    @profiled()
+    def compute_rfm(view):
+        if os.path.isdir(data_path) and unfiltered:
+            # Unfiltered view: only partitions touched by new batches are re-aggregated
+            rfm_df = score_rfm(get_partition_aggregates(data_path).rfm())
+        else:
+            rfm_df = create_rfm_df(view.df)
+        return {"rfm_df": rfm_df, "segment_df": segment_summary(rfm_df)}
+
+    @profiled()
+    def compute_cohorts(view):
+        return {"cohort_df": view.get("cohort", create_cohort_df)}
+
+    @profiled()
+    def compute_sellers(view):
+        # Merged from the seller cells and shared with the top_sellers aggregate of the API
+        return {"seller_df": analytics.seller_table(current_filter)}
+
+    @profiled()
+    def compute_map(view):
+        # Cell counts of both locations, merged from the spatial density tables
+        return {"density": {location: analytics.aggregate("density", current_filter, column=location)
+                            for location in LOCATIONS}}
+
+    tabs = TabRegistry()
+
+    @tabs.register("Orders", compute_orders)
+    def render_orders(data):
+        daily_orders_df, delivery_time = data["daily_orders_df"], data["delivery_time"]
+        st.header("Daily Orders")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            total_orders = daily_orders_df.order_count.sum()
+            st.metric("Total orders", value=total_orders)
+
+        with col2:
+            total_revenue = format_currency(daily_orders_df.revenue.sum(), "BRL", locale='pt_BR') 
+            st.metric("Total Revenue", value=total_revenue)
+
+        def draw_daily_orders(daily_orders_df):
+            fig, ax = plt.subplots(figsize=(16, 8))
+            ax.plot(
+                daily_orders_df["order_purchase_timestamp"],
+                daily_orders_df["order_count"],
+                marker='o', 
+                linewidth=2,
+                color="#90CAF9"
+            )
+            ax.tick_params(axis='y', labelsize=20)
+            ax.tick_params(axis='x', labelsize=15)
+            return fig
+
+        show_chart("daily_orders", daily_orders_df, draw_daily_orders,
+                   native=(daily_orders_df, line_spec("order_purchase_timestamp", "order_count")))
+
+        def draw_delivery_time(delivery_time):
+            fig, ax = plt.subplots(figsize=(20, 10))
+            sns.histplot(data=delivery_time, x="start",
+                         weights="count",
+                         bins=histogram_edges(delivery_time)
+                         )
+
+            ax.set_title("Delivery Time", loc="center", fontsize=30)
+            ax.set_ylabel("Number of Order", fontdict={'fontsize': 20})
+            ax.set_xlabel("Days", fontdict={'fontsize': 20})
+            ax.tick_params(axis='y', labelsize=20)
+            ax.tick_params(axis='x', labelsize=15)
+            return fig
+
+        show_chart("delivery_time", delivery_time.histogram(20), draw_delivery_time,
+                   native=lambda: (delivery_time.histogram(20),
+                                   histogram_spec("Delivery Time", "Days", "Number of Order")))
+        show_outlier_bounds(delivery_time, "days")
+
+    def draw_best_worst(best_df, worst_df, x, xlabel, best_title, worst_title):
+        fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(35, 15))
+
+        colors = ["#90CAF9", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
+
+        sns.barplot(x=x, y="product_name", data=best_df, palette=colors, ax=ax[0])
+        ax[0].set_ylabel(None)
+        ax[0].set_xlabel(xlabel, fontsize=30)
+        ax[0].set_title(best_title, loc="center", fontsize=50)
+        ax[0].tick_params(axis='y', labelsize=35)
+        ax[0].tick_params(axis='x', labelsize=30)
+
+        sns.barplot(x=x, y="product_name", data=worst_df, palette=colors, ax=ax[1])
+        ax[1].set_ylabel(None)
+        ax[1].set_xlabel(xlabel, fontsize=30)
+        ax[1].invert_xaxis()
+        ax[1].yaxis.set_label_position("right")
+        ax[1].yaxis.tick_right()
+        ax[1].set_title(worst_title, loc="center", fontsize=50)
+        ax[1].tick_params(axis='y', labelsize=35)
+        ax[1].tick_params(axis='x', labelsize=30)
+        return fig
+
+    def show_best_worst(name, best_df, worst_df, x, xlabel, best_title, worst_title):
+        if native_charts:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.vega_lite_chart(best_df, bar_spec(x, "product_name", best_title), width="stretch")
+            with col2:
+                st.vega_lite_chart(worst_df, bar_spec(x, "product_name", worst_title, reverse=True), width="stretch")
+            return
+        show_chart(name, (best_df, worst_df),
+                   lambda pair: draw_best_worst(*pair, x, xlabel, best_title, worst_title))
+
+    @tabs.register("Products", compute_products)
+    def render_products(data):
+        st.header("Best & Worst Performing Product")
+        show_best_worst("products", data["best_products_df"], data["worst_products_df"], "quantity",
+                        "Number of Sales", "Best Performing Product", "Worst Performing Product")
+
+    @tabs.register("Score", compute_score)
+    def render_score(data):
+        st.header("Highest & Lowest Product Score") 
+        show_best_worst("score", data["best_score_df"], data["worst_score_df"], "Score",
+                        "Mean Product Score", "Highest Product Score Product", "Lowest Product Score")
+
+
+    @tabs.register("Demograpics", compute_demographics)
+    def render_demographics(data):
+        distance, bystate_df, date_range, cube_cells = data["distance"], data["bystate_df"], data["date_range"], data["cube_cells"]
+        st.header("Demographic")
+        distinct_counts_df = analytics.aggregate("distinct_counts", current_filter,
+                                                 mode="approx" if approx_distinct else "exact")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Unique customers", value=int(distinct_counts_df.customers.iloc[0]))
+        with col2:
+            st.metric("Unique orders", value=int(distinct_counts_df.orders.iloc[0]))
+
+        st.subheader("Distance")
+
+        def draw_distance(order_distance):
+            fig, ax = plt.subplots(figsize=(20, 10))
+            sns.histplot(data=order_distance, x="start",
+                         weights="count",
+                         bins=histogram_edges(order_distance)
+                         )
+
+            ax.set_title("Distance from Seller to Customer", loc="center", fontsize=30)
+            ax.set_ylabel("Number of Order", fontdict={'fontsize': 20})
+            ax.set_xlabel("Distance in kilometers", fontdict={'fontsize': 20})
+            ax.tick_params(axis='y', labelsize=20)
+            ax.tick_params(axis='x', labelsize=15)
+            return fig
+
+        show_chart("distance", distance.histogram(10), draw_distance,
+                   native=lambda: (distance.histogram(10),
+                                   histogram_spec("Distance from Seller to Customer", "Distance in kilometers",
+                                                  "Number of Order")))
+        show_outlier_bounds(distance, "km")
+
+        st.subheader("State")
+        bystate_df = bystate_df.sort_values(by="customer_count", ascending=False)
+
+        def draw_bystate(bystate_df):
+            fig, ax = plt.subplots(figsize=(20, 10))
+            colors = ["#90CAF9"] + ["#D3D3D3"] * (len(bystate_df) - 1)
+            sns.barplot(
+                x="customer_count", 
+                y="customer_state",
+                data=bystate_df,
+                palette=colors,
+                ax=ax
+            )
+            ax.set_title("Number of Customer by States", loc="center", fontsize=30)
+            ax.set_ylabel(None)
+            ax.set_xlabel(None)
+            ax.tick_params(axis='y', labelsize=20)
+            ax.tick_params(axis='x', labelsize=15)
+            return fig
+
+        show_chart("bystate", bystate_df, draw_bystate,
+                   native=(bystate_df, bar_spec("customer_count", "customer_state", "Number of Customer by States")))
+
+        # tab_demo1, tab_demo
+
+        # Find the min and max date
+        min_date, max_date = date_range
+
+        # Calculate the difference in days between the min and max dates
+        date_diff = (max_date - min_date).days
+
+        group_data_by_date_diff(rollup_cube, cube_cells, date_diff)
+
+    @tabs.register("RFM", compute_rfm)
+    def render_rfm(data):
+        rfm_df, segment_df = data["rfm_df"], data["segment_df"]
+        st.header("Best Customer Based on RFM Parameters")
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            avg_recency = round(rfm_df.recency.mean(), 1)
+            st.metric("Average Recency (days)", value=avg_recency)
+
+        with col2:
+            avg_frequency = round(rfm_df.frequency.mean(), 2)
+            st.metric("Average Frequency", value=avg_frequency)
+
+        with col3:
+            avg_frequency = format_currency(rfm_df.monetary.mean(), "BRL", locale='pt_BR') 
+            st.metric("Average Monetary", value=avg_frequency)
+
+        st.subheader("Customer Segments")
+        segment_chart_df = segment_df[["segment", "customers", "revenue"]].astype({"segment": str})
+
+        def draw_segments(segment_df):
+            fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(35, 15))
+            colors = ["#90CAF9", "#90CAF9", "#90CAF9", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
+
+            sns.barplot(x="customers", y="segment", data=segment_df, palette=colors, ax=ax[0])
+            ax[0].set_ylabel(None)
+            ax[0].set_xlabel("Number of Customer", fontsize=30)
+            ax[0].set_title("Customers by Segment", loc="center", fontsize=50)
+            ax[0].tick_params(axis='y', labelsize=35)
+            ax[0].tick_params(axis='x', labelsize=30)
+
+            sns.barplot(x="revenue", y="segment", data=segment_df, palette=colors, ax=ax[1])
+            ax[1].set_ylabel(None)
+            ax[1].set_xlabel("Revenue", fontsize=30)
+            ax[1].invert_xaxis()
+            ax[1].yaxis.set_label_position("right")
+            ax[1].yaxis.tick_right()
+            ax[1].set_title("Revenue by Segment", loc="center", fontsize=50)
+            ax[1].tick_params(axis='y', labelsize=35)
+            ax[1].tick_params(axis='x', labelsize=30)
+            return fig
+
+        if native_charts:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.vega_lite_chart(segment_chart_df, bar_spec("customers", "segment", "Customers by Segment", 3),
+                                   width="stretch")
+            with col2:
+                st.vega_lite_chart(segment_chart_df, bar_spec("revenue", "segment", "Revenue by Segment", 3, reverse=True),
+                                   width="stretch")
+        else:
+            show_chart("segments", segment_chart_df, draw_segments)
+
+        st.dataframe(segment_df.style.format({
+            "revenue": lambda x: format_currency(x, "BRL", locale='pt_BR'),
+            "avg_recency": "{:.1f}",
+            "avg_frequency": "{:.2f}",
+            "revenue_share": "{:.1%}",
+        }), hide_index=True)
+
+    @tabs.register("Cohorts", compute_cohorts)
+    def render_cohorts(data):
+        cohort_df = data["cohort_df"]
+        st.header("Customer Cohorts")
+        cohort_sizes = cohort_df.loc[cohort_df.months_since == 0, "customers"]
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Cohorts (first purchase month)", value=len(cohort_sizes))
+
+        with col2:
+            st.metric("Customers", value=int(cohort_sizes.sum()))
+
+        with col3:
+            # Share of customers who bought again one month after their first purchase
+            returning = cohort_df.loc[cohort_df.months_since == 1, "customers"].sum()
+            st.metric("Month 1 retention", value=f"{returning / max(cohort_sizes.sum(), 1):.2%}")
+
+        # Month 0 is always 100%; the chart shows the months after it
+        retention = cohort_matrix(cohort_df, "retention", max_months=13).drop(columns=0, errors="ignore")
+
+        def draw_retention(retention):
+            fig, ax = plt.subplots(figsize=(16, 10))
+            sns.heatmap(retention, annot=True, fmt=".1%", cmap="YlGnBu", cbar=False, ax=ax)
+            ax.set_title("Retention by Cohort", loc="center", fontsize=20)
+            ax.set_xlabel("Months since first purchase")
+            ax.set_ylabel("Cohort")
+            return fig
+
+        if retention.empty:
+            # One purchase month, no orders, or nobody bought again: nothing after month 0
+            st.caption("No purchases after the first month in this selection, so there is no retention to chart.")
+        else:
+            show_chart("cohorts", retention, draw_retention,
+                       native=lambda: (cohort_frame(retention), cohort_spec("Retention by Cohort")))
+
+        st.subheader("Revenue by Cohort")
+        st.dataframe(cohort_matrix(cohort_df, "revenue", max_months=13).style.format(
+            lambda x: format_currency(x, "BRL", locale='pt_BR'), na_rep=""))
+
+    SELLER_METRICS = {
+        "revenue": "Revenue",
+        "orders": "Orders",
+        "review_score": "Mean Review Score",
+        "delivery_time_p50": "Median Delivery Time (days)",
+        "order_distance_p50": "Median Distance (km)",
+    }
+
+    @tabs.register("Sellers", compute_sellers)
+    def render_sellers(data):
+        seller_df = data["seller_df"]
+        st.header("Sellers")
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Active sellers", value=len(seller_df))
+
+        with col2:
+            st.metric("Median seller revenue",
+                      value=format_currency(seller_df.revenue.median() if len(seller_df) else 0, "BRL", locale='pt_BR'))
+
+        with col3:
+            top10_share = top_k(seller_df, "revenue", 10).revenue.sum() / max(seller_df.revenue.sum(), 1)
+            st.metric("Revenue share of top 10", value=f"{top10_share:.1%}")
+
+        metric = st.selectbox("Rank sellers by", list(SELLER_METRICS), format_func=SELLER_METRICS.get, key="seller_metric")
+        best_df, worst_df = top_bottom_k(seller_df.reset_index(), metric, 10)
+        for frame in (best_df, worst_df):
+            frame["seller"] = analytics.decode("seller_id", frame["seller_id"]).astype(str).str[:8]
+
+        def draw_sellers(pair):
+            fig, ax = plt.subplots(nrows=1, ncols=2, figsize=(35, 15))
+            for axis, frame, title in zip(ax, pair, ["Top", "Bottom"]):
+                sns.barplot(x=metric, y="seller", data=frame, color="#90CAF9", ax=axis)
+                axis.set_ylabel(None)
+                axis.set_xlabel(SELLER_METRICS[metric], fontsize=30)
+                axis.set_title(f"{title} Sellers", loc="center", fontsize=50)
+                axis.tick_params(axis='y', labelsize=30)
+                axis.tick_params(axis='x', labelsize=30)
+            ax[1].invert_xaxis()
+            ax[1].yaxis.set_label_position("right")
+            ax[1].yaxis.tick_right()
+            return fig
+
+        if native_charts:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.vega_lite_chart(best_df, bar_spec(metric, "seller", "Top Sellers"), width="stretch")
+            with col2:
+                st.vega_lite_chart(worst_df, bar_spec(metric, "seller", "Bottom Sellers", reverse=True), width="stretch")
+        else:
+            show_chart(f"sellers_{metric}", (best_df[["seller", metric]], worst_df[["seller", metric]]), draw_sellers)
+
+        seller_query = st.text_input("Look up a seller id", key="seller_lookup").strip()
+        if seller_query:
+            lookup = analytics.id_lookups.get("seller_id")
+            code = seller_query if lookup is None else lookup.get_indexer([seller_query])[0]
+            # Binary search on the seller-sorted index
+            found = seller_df.loc[seller_df.index.intersection([code])]
+            if len(found):
+                st.dataframe(found.assign(seller_id=seller_query).set_index("seller_id"))
+            else:
+                st.caption("No sales for this seller under the current filters.")
+
+    MAP_LOCATIONS = {"customer": "Customers", "seller": "Sellers"}
+
+    @tabs.register("Map", compute_map)
+    def render_map(data):
+        st.header("Order Density")
+        location = st.radio("Locations", list(MAP_LOCATIONS), format_func=MAP_LOCATIONS.get, horizontal=True,
+                            key="map_location")
+        density_df = data["density"][location]
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Occupied cells", value=len(density_df))
+
+        with col2:
+            st.metric("Items in busiest cell", value=int(density_df["items"].max()) if len(density_df) else 0)
+
+        with col3:
+            top10_share = density_df["items"].head(10).sum() / max(density_df["items"].sum(), 1)
+            st.metric("Item share of top 10 cells", value=f"{top10_share:.1%}")
+
+        def draw_density(density_df):
+            fig, ax = plt.subplots(figsize=(12, 12))
+            points = ax.scatter(density_df["lng"], density_df["lat"], c=np.log10(density_df["items"]),
+                                s=5 + 200 * density_df["items"] / max(density_df["items"].max(), 1),
+                                cmap="YlGnBu", alpha=0.8)
+            fig.colorbar(points, ax=ax, label="Items (log10)", shrink=0.6)
+            ax.set_aspect("equal")
+            ax.set_title(f"Items per {CELL_DEGREES:g}° Cell", loc="center", fontsize=20)
+            ax.set_xlabel("Longitude")
+            ax.set_ylabel("Latitude")
+            return fig
+
+        # One point per occupied cell rather than per row
+        if native_charts:
+            # Marker radius in meters, up to half a cell
+            size = 50 + 5_000 * np.sqrt(density_df["items"] / max(density_df["items"].max(), 1))
+            st.map(density_df.assign(size=size), latitude="lat", longitude="lng", size="size")
+        else:
+            show_chart(f"map_{location}", density_df[["lat", "lng", "items"]], draw_density)
+
+        st.subheader("Orders Near a Point")
+        # Defaults to the busiest cell
+        center = density_df.iloc[0] if len(density_df) else pd.Series({"lat": -23.55, "lng": -46.63})
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            lat = st.number_input("Latitude", min_value=-90.0, max_value=90.0, value=float(center["lat"]), format="%.4f",
+                                  key="map_lat")
+        with col2:
+            lng = st.number_input("Longitude", min_value=-180.0, max_value=180.0, value=float(center["lng"]),
+                                  format="%.4f", key="map_lng")
+        with col3:
+            radius_km = st.slider("Radius (km)", min_value=1, max_value=500, value=25, key="map_radius")
+
+        nearby = analytics.aggregate("nearby", current_filter, column=location, lat=lat, lng=lng,
+                                     radius_km=radius_km).iloc[0]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Orders", value=int(nearby["orders"]))
+        with col2:
+            st.metric("Items", value=int(nearby["items"]))
+        with col3:
+            st.metric("Revenue", value=format_currency(nearby["revenue"], "BRL", locale='pt_BR'))
+        st.caption(f"{MAP_LOCATIONS[location]} within {radius_km} km; haversine checked on {int(nearby['candidates']):,} "
+                   f"of {len(all_df):,} rows from the grid cells around the point.")
+
+    st.title('Dashboard of Brazilian E-Commerce Public Dataset by Olist :sparkles:')
+
+    # Only the selected tab is computed and drawn; its aggregates stay cached until the filters change
+    selected_tab = st.radio("Tab", tabs.names, horizontal=True, label_visibility="collapsed", key="tab")
+    with stage(f"tab:{selected_tab}"):
+        tabs.show(selected_tab, main_view)
+
+    with st.sidebar:
+        with st.expander("Aggregate cache"):
+            st.caption(f"Engine: {analytics.engine}")
+            st.dataframe(aggregate_memo.stats(), hide_index=True)
+            st.dataframe(figure_cache.stats(), hide_index=True)
+    return analytics
+
+
+# Timings of this rerun; memory tracing is switched on from the debug section in the sidebar.
+# The profiler is also deactivated on reruns, st.stop and errors
+with StageProfiler(trace_memory=st.session_state.get("trace_memory", False)) as profiler:
+    analytics = main()
+
+if os.environ.get(PROFILE_LOG_ENV):
+    profiler.append_jsonl(os.environ[PROFILE_LOG_ENV])
 
+with st.sidebar:
+    with st.expander("Debug: stage timings"):
+        st.toggle("Trace memory (tracemalloc)", key="trace_memory",
+                  help="Applies from the next rerun; slows every allocation down while on.")
+        st.dataframe(profiler.frame().drop(columns=["run_id", "started_at"]), hide_index=True)
+        st.download_button("Export JSON lines", profiler.to_jsonl(), file_name=f"profile-{profiler.run_id}.jsonl",
+                           mime="application/json")
+    with st.expander("Debug: memory"):
+        id_lookups, memory_report_df = analytics.id_lookups, analytics.memory_report
+        st.caption(f"Shared all_df: {memory_report_df['mb_after'].iloc[-1]:.1f} MiB "
+                   f"(was {memory_report_df['mb_before'].iloc[-1]:.1f} MiB), "
+                   f"id lookups {lookups_mb(id_lookups):.1f} MiB")
+        st.dataframe(memory_report_df.style.format({"mb_before": "{:.2f}", "mb_after": "{:.2f}", "saved": "{:.0%}"}),
+                     hide_index=True)
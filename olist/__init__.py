@@ -0,0 +1 @@
+"""Helpers shared by the Olist e-commerce dashboards."""
@@ -0,0 +1,127 @@
+"""Aggregates behind the dashboard tabs, computed from a (filtered) all_df."""
+import numpy as np
+import pandas as pd
+
+from olist import parallel
+from olist.cohort import cohort_table
+from olist.cube import orders_by_period
+from olist.hll import DISTINCT_COLUMNS
+from olist.profiling import profiled
+from olist.rfm import rfm_from_state, score_rfm
+from olist.sellers import seller_table
+
+
+@profiled()
+def create_daily_orders_df(df):
+    daily_orders_df = df.resample(rule='D', on='order_purchase_timestamp').agg({
+        "order_id": "nunique",
+        "order_item_value": "sum"
+    })
+    daily_orders_df = daily_orders_df.reset_index()
+    daily_orders_df.rename(columns={
+        "order_id": "order_count",
+        "order_item_value": "revenue"
+    }, inplace=True)
+    
+    return daily_orders_df
+
+
+@profiled()
+def create_sum_order_items_df(df):
+    sum_order_items_df = df.groupby("product_category_name_english", observed=True).order_item_id.sum().sort_values(ascending=False).reset_index()
+    sum_order_items_df.rename(columns={
+        "product_category_name_english": "product_name",
+        "order_item_id" : "quantity"
+    }, inplace=True)
+    sum_order_items_df["product_name"] = sum_order_items_df["product_name"].astype(str)
+    return sum_order_items_df
+
+
+@profiled()
+def create_mean_product_score_df(df):
+    mean_product_score_df = df.groupby("product_category_name_english", observed=True).review_score.mean().sort_values(ascending=False).reset_index()
+    mean_product_score_df.rename(columns={
+        "product_category_name_english": "product_name",
+        "review_score" : "Score"
+    }, inplace=True)
+    mean_product_score_df["product_name"] = mean_product_score_df["product_name"].astype(str)
+    return mean_product_score_df
+
+
+@profiled()
+def create_category_df(df):
+    # Quantity and mean score per category in one groupby, shared by the Products and Score tabs
+    category_df = df.groupby("product_category_name_english", observed=True).agg({
+        "order_item_id": "sum",
+        "review_score": "mean"
+    }).reset_index()
+    category_df.rename(columns={
+        "product_category_name_english": "product_name",
+        "order_item_id" : "quantity",
+        "review_score" : "Score"
+    }, inplace=True)
+    category_df["product_name"] = category_df["product_name"].astype(str)
+    return category_df
+
+
+@profiled()
+def create_bystate_df(df):
+    bystate_df = df.groupby(by="customer_state", observed=True).customer_id.nunique().reset_index()
+    bystate_df.rename(columns={
+        "customer_id": "customer_count"
+    }, inplace=True)
+    bystate_df["customer_state"] = bystate_df["customer_state"].astype(str)
+    
+    return bystate_df
+
+
+@profiled()
+def create_distinct_counts_df(df):
+    # Exact unique customers and orders per state, with the whole selection as "All"
+    total = pd.DataFrame([{name: df[column].nunique() for name, column in DISTINCT_COLUMNS.items()}], index=["All"])
+    bystate_df = df.groupby("customer_state", observed=True).agg(
+        **{name: (column, "nunique") for name, column in DISTINCT_COLUMNS.items()})
+    bystate_df.index = bystate_df.index.astype(str)
+    distinct_counts_df = pd.concat([total, bystate_df]).rename_axis("customer_state").reset_index()
+    return distinct_counts_df.astype({name: np.int64 for name in DISTINCT_COLUMNS})
+
+
+@profiled()
+def create_distance_df(df):
+    # order_distance is precomputed when the dataset is built (olist.etl.add_order_distance)
+    distance_df = df[["order_id","product_category_name_english","customer_id","seller_id","order_distance"]]
+    return distance_df
+
+
+@profiled()
+def create_delivery_time(df):
+    delivery_time = df[["delivery_time"]]
+    return delivery_time
+
+
+@profiled()
+def create_rfm_df(df, engine=None):
+    # Recency/frequency/monetary per customer_unique_id with quintile scores and segments
+    rfm_df = score_rfm(rfm_from_state(parallel.run("rfm_state", df, engine)))
+    return rfm_df
+
+
+@profiled()
+def create_cohort_df(df):
+    # Customers, revenue and retention per first-purchase month x months since
+    cohort_df = cohort_table(df)
+    return cohort_df
+
+
+@profiled()
+def create_seller_df(df):
+    # Orders, items, revenue, review score and delivery/distance percentiles per seller
+    seller_df = seller_table(df)
+    return seller_df
+
+
+@profiled()
+def orders_by_state(df, time_period, engine=None):
+    """Order items per period x state straight from the rows, as the heatmaps group them."""
+    grouped_data = orders_by_period(parallel.run("state_day_counts", df, engine), time_period)
+    return grouped_data.rename_axis(index=grouped_data.index.name and "order_purchase_timestamp")
@@ -0,0 +1,102 @@
+"""HTTP/JSON access to the dashboard aggregates.
+
+    uvicorn olist.api:app --workers 4
+
+The dataset comes from the same place as the dashboard's (``OLIST_DATA_PATH``
+or the download). Workers memory-map the same Arrow artifact, so extra
+workers add little memory.
+
+    GET /health
+    GET /aggregates
+    GET /aggregates/{name}?start=2017-01-01&end=2017-12-31&state=SP&state=RJ&city=...
+        parameters of some aggregates: period=Monthly, bins=10, column=..., mode=approx, k=10,
+        lat=-23.55, lng=-46.63, radius_km=10
+    GET /stats
+"""
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from olist.loader import fetch_dataset
+from olist.service import AGGREGATES, Analytics, aggregate_params
+
+
+def _payload(frame):
+    return frame.to_json(orient="records", date_format="iso").encode()
+
+
+def create_app(path=None, sha256=None):
+    """App serving ``path`` (default: the dashboard's dataset), loaded once at startup."""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        def load():
+            data_path, data_sha256 = (path, sha256) if path and sha256 else fetch_dataset(local_path=path)
+            return Analytics(data_path, data_sha256)
+        app.state.analytics = await run_in_threadpool(load)
+        # Warm the lazily built indexes so the first requests do not pay for them
+        await run_in_threadpool(lambda: (app.state.analytics.filter_index, app.state.analytics.rollup_cube,
+                                         app.state.analytics.sketch_cube, app.state.analytics.distinct_cube,
+                                         app.state.analytics.seller_cube, app.state.analytics.spatial_index))
+        yield
+
+    app = FastAPI(title="Olist aggregates", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        analytics = app.state.analytics
+        return {"rows": len(analytics.all_df), "sha256": analytics.sha256,
+                "min_date": analytics.min_date.isoformat(), "max_date": analytics.max_date.isoformat()}
+
+    @app.get("/aggregates")
+    async def list_aggregates():
+        return {name: defaults for name, (_, defaults) in AGGREGATES.items()}
+
+    @app.get("/aggregates/{name}")
+    async def get_aggregate(name: str,
+                            start: Optional[str] = None,
+                            end: Optional[str] = None,
+                            state: List[str] = Query(default=[]),
+                            city: List[str] = Query(default=[]),
+                            period: Optional[str] = None,
+                            bins: Optional[int] = Query(default=None, ge=1, le=1000),
+                            column: Optional[str] = None,
+                            mode: Optional[str] = None,
+                            k: Optional[int] = Query(default=None, ge=1, le=1000),
+                            lat: Optional[float] = Query(default=None, ge=-90, le=90),
+                            lng: Optional[float] = Query(default=None, ge=-180, le=180),
+                            radius_km: Optional[float] = Query(default=None, gt=0, le=5000)):
+        if name not in AGGREGATES:
+            raise HTTPException(404, f"unknown aggregate {name!r}")
+        analytics = app.state.analytics
+
+        def compute():
+            flt = analytics.make_filter(start, end, state, city)
+            # The encoded JSON is memoized next to the frame, so a hit skips serialization too
+            params = {"period": period, "bins": bins, "column": column, "mode": mode, "k": k,
+                      "lat": lat, "lng": lng, "radius_km": radius_km}
+            # Keyed like the frame, so parameters the aggregate ignores do not add entries
+            memo_name, params = aggregate_params(name, **params)
+            return analytics.memo.get("json:" + memo_name, flt.key,
+                                      lambda: _payload(analytics.aggregate(name, flt, **params)))
+
+        # pandas work runs in the threadpool so the event loop keeps accepting requests
+        try:
+            body = await run_in_threadpool(compute)
+        except ValueError as e:
+            raise HTTPException(422, str(e))
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/stats")
+    async def stats():
+        memo = app.state.analytics.memo
+        return {"entries": len(memo), "evictions": memo.evictions,
+                "aggregates": memo.stats().to_dict(orient="records")}
+
+    return app
+
+
+app = create_app()
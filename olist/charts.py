@@ -0,0 +1,147 @@
+"""Chart layer for the dashboards.
+
+Matplotlib figures are rendered once to PNG bytes, closed right away and
+cached on a hash of the aggregate they were drawn from, so a rerun with the
+same data only ships the cached image. The ``*_spec`` builders describe the
+same charts as Vega-Lite specs for a lightweight native rendering.
+"""
+import hashlib
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from olist.memo import AggregateMemo
+
+# st.pyplot saves at 200 dpi; the wide figures stay sharp at 100
+DEFAULT_DPI = 100
+
+
+def data_hash(data):
+    """Content hash of an aggregate: a frame, series, array, scalar or tuple of those."""
+    digest = hashlib.sha1()
+
+    def update(value):
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr((list(map(str, value.columns)), list(map(str, value.dtypes)))).encode())
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        elif isinstance(value, (pd.Series, pd.Index)):
+            digest.update(str(value.dtype).encode())
+            digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        elif isinstance(value, np.ndarray):
+            digest.update(str(value.dtype).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (tuple, list)):
+            for item in value:
+                update(item)
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"|")
+
+    update(data)
+    return digest.hexdigest()
+
+
+def render_png(fig, dpi=DEFAULT_DPI):
+    """PNG bytes of ``fig``; the figure is always closed afterwards."""
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class FigureCache(AggregateMemo):
+    """LRU of rendered PNG bytes keyed on (chart name, aggregate hash)."""
+
+    def __init__(self, maxsize=64, dpi=DEFAULT_DPI):
+        super().__init__(maxsize=maxsize)
+        self.dpi = dpi
+
+    def png(self, name, data, draw):
+        """``draw(data)`` must return a Matplotlib figure; it only runs on a miss."""
+        return self.get(name, data_hash(data), lambda: render_png(draw(data), self.dpi))
+
+
+def bar_spec(x, y, title=None, highlight=1, reverse=False):
+    """Horizontal bars in row order, the first ``highlight`` bars in blue."""
+    return {
+        "title": title,
+        "mark": "bar",
+        "transform": [{"window": [{"op": "row_number", "as": "_rank"}]}],
+        "encoding": {
+            "x": {"field": x, "type": "quantitative", "scale": {"reverse": reverse}},
+            "y": {"field": y, "type": "nominal", "sort": None, "title": None},
+            "color": {
+                "condition": {"test": f"datum._rank <= {highlight}", "value": "#90CAF9"},
+                "value": "#D3D3D3",
+            },
+        },
+    }
+
+
+def line_spec(x, y, title=None):
+    return {
+        "title": title,
+        "mark": {"type": "line", "point": True, "color": "#90CAF9"},
+        "encoding": {
+            "x": {"field": x, "type": "temporal", "title": None},
+            "y": {"field": y, "type": "quantitative", "title": None},
+        },
+    }
+
+
+def histogram_spec(title=None, x_title=None, y_title=None):
+    return {
+        "title": title,
+        "mark": {"type": "bar", "color": "#90CAF9"},
+        "encoding": {
+            "x": {"field": "start", "type": "quantitative", "bin": {"binned": True}, "title": x_title},
+            "x2": {"field": "end"},
+            "y": {"field": "count", "type": "quantitative", "title": y_title},
+        },
+    }
+
+
+def heatmap_frame(grouped_data, period_column="period", value_column="orders"):
+    """Long form of an orders-by-state pivot (periods x states)."""
+    long_df = grouped_data.rename_axis(index=period_column, columns="customer_state").stack()
+    long_df = long_df.rename(value_column).reset_index()
+    long_df[period_column] = long_df[period_column].astype(str)
+    long_df["customer_state"] = long_df["customer_state"].astype(str)
+    return long_df
+
+
+def heatmap_spec(title=None, period_column="period", value_column="orders"):
+    return {
+        "title": title,
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": period_column, "type": "ordinal", "sort": None, "title": None},
+            "y": {"field": "customer_state", "type": "nominal", "title": "Customer State"},
+            "color": {"field": value_column, "type": "quantitative", "scale": {"scheme": "yellowgreenblue"}},
+        },
+    }
+
+
+def cohort_frame(matrix, value_column="retention"):
+    """Long form of a cohort x months-since matrix, empty cells dropped."""
+    long_df = matrix.rename_axis(index="cohort", columns="months_since").stack().rename(value_column).reset_index()
+    long_df["cohort"] = long_df["cohort"].astype(str)
+    return long_df
+
+
+def cohort_spec(title=None, value_column="retention"):
+    return {
+        "title": title,
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "months_since", "type": "ordinal", "title": "Months since first purchase"},
+            "y": {"field": "cohort", "type": "ordinal", "title": "Cohort"},
+            "color": {"field": value_column, "type": "quantitative", "scale": {"scheme": "yellowgreenblue"}},
+            "tooltip": [{"field": "cohort"}, {"field": "months_since"},
+                        {"field": value_column, "type": "quantitative", "format": ".2%"}],
+        },
+    }
@@ -0,0 +1,73 @@
+"""Monthly purchase cohorts of ``customer_unique_id``.
+
+A customer's cohort is the month of their first purchase. Every purchase
+month then falls ``months_since`` months after it, so retention is the
+number of distinct customers per (cohort, months_since) cell. Everything is
+computed with integer month numbers, bincounts and a dedup of (customer,
+month) pairs, in time linear in the rows, with no self-join.
+"""
+import numpy as np
+import pandas as pd
+
+COHORT_COLUMNS = {
+    "cohort": "datetime64[ns]",
+    "months_since": "int64",
+    "customers": "int64",
+    "revenue": "float64",
+    "cohort_size": "int64",
+    "retention": "float64",
+}
+
+
+def month_numbers(timestamps):
+    """Months since 1970-01 of each timestamp."""
+    return timestamps.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+
+
+def cohort_table(df, customer_column="customer_unique_id"):
+    """Customers, revenue and retention per cohort month x months since the first purchase.
+
+    Long form with COHORT_COLUMNS; ``retention`` is ``customers / cohort_size``.
+    """
+    customer_codes, customers = pd.factorize(df[customer_column])
+    keep = customer_codes >= 0
+    customer_codes = customer_codes[keep]
+    month = month_numbers(df["order_purchase_timestamp"])[keep]
+    revenue = df["order_item_value"].to_numpy(dtype=np.float64)[keep]
+    if not len(month):
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in COHORT_COLUMNS.items()})
+
+    first_month = np.full(len(customers), month.max(), dtype=np.int64)
+    np.minimum.at(first_month, customer_codes, month)
+    base = month.min()
+    n_cohorts = n_ages = month.max() - base + 1
+
+    cohort = first_month[customer_codes] - base
+    age = month - base - cohort
+    cell = cohort * n_ages + age
+
+    # A customer counts once per active month, however many items they bought in it
+    active = np.unique(customer_codes * n_ages + (month - base))
+    active_cohort = first_month[active // n_ages] - base
+    active_cell = active_cohort * n_ages + (active % n_ages - active_cohort)
+    customers_per_cell = np.bincount(active_cell, minlength=n_cohorts * n_ages)
+    revenue_per_cell = np.bincount(cell, weights=revenue, minlength=n_cohorts * n_ages)
+
+    cells = np.flatnonzero(customers_per_cell)
+    table = pd.DataFrame({
+        "cohort": (base + cells // n_ages).astype("datetime64[M]").astype("datetime64[ns]"),
+        "months_since": cells % n_ages,
+        "customers": customers_per_cell[cells],
+        "revenue": revenue_per_cell[cells],
+    })
+    table["cohort_size"] = table.groupby("cohort")["customers"].transform("first")
+    table["retention"] = table["customers"] / table["cohort_size"]
+    return table
+
+
+def cohort_matrix(table, value="retention", max_months=None):
+    """Cohorts x months since first purchase of one ``cohort_table`` column (first ``max_months``)."""
+    table = table[table["months_since"] < max_months] if max_months else table
+    matrix = table.pivot(index="cohort", columns="months_since", values=value)
+    matrix.index = matrix.index.strftime("%Y-%m")
+    return matrix
@@ -0,0 +1,92 @@
+"""Memory-compact dtypes for the all_df shared by every dashboard session.
+
+The dashboard keeps a single compacted frame in ``st.cache_resource`` for all
+sessions; with copy-on-write, per-session filtering and column selection
+never modify it.
+
+    python -m olist.compact [path/to/all_data.parquet]
+"""
+import numpy as np
+import pandas as pd
+
+from olist.schema import SCHEMA, apply_schema
+
+# 32-char hex ids. The dashboard only counts distinct ids, so they are replaced by int32
+# codes and the labels are kept once in a lookup table
+ID_COLUMNS = ["order_id", "customer_id", "customer_unique_id", "seller_id", "product_id"]
+
+# Measures where float32 (~7 significant digits) is plenty; money stays float64 so sums keep cents
+FLOAT32_COLUMNS = [
+    "delivery_time", "review_score", "order_distance",
+    "customer_geolocation_lat", "customer_geolocation_lng",
+    "seller_geolocation_lat", "seller_geolocation_lng",
+]
+
+
+def encode_ids(series):
+    """(int32 codes, lookup Index of labels); missing ids get code -1."""
+    codes, lookup = pd.factorize(series)
+    return codes.astype(np.int32), lookup
+
+
+def decode_ids(codes, lookup):
+    """Labels of ``codes`` (array or Series) from an ``encode_ids`` lookup; -1 becomes missing."""
+    return lookup.take(np.asarray(codes), allow_fill=True, fill_value=np.nan)
+
+
+def compact_frame(df, id_columns=ID_COLUMNS, float32_columns=FLOAT32_COLUMNS):
+    """``(compact_df, lookups)``: ids as int32 codes, downcast numerics, only SCHEMA columns.
+
+    ``lookups`` maps each encoded id column to the labels of its codes.
+    Columns that are not part of the schema (such as the ``index`` column
+    a ``reset_index()`` leaves behind) are dropped.
+    """
+    df = apply_schema(df[[c for c in df.columns if c in SCHEMA]])
+    columns = {}
+    lookups = {}
+    for column in df.columns:
+        series = df[column]
+        if column in id_columns:
+            codes, lookups[column] = encode_ids(series)
+            series = pd.Series(codes, index=series.index, name=column)
+        elif column in float32_columns and series.dtype == np.float64:
+            series = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast="integer")
+        columns[column] = series
+    return pd.DataFrame(columns, index=df.index), lookups
+
+
+def lookups_mb(lookups):
+    return sum(lookup.memory_usage(deep=True) for lookup in lookups.values()) / 2**20
+
+
+def memory_report(before, after):
+    """Per-column deep memory (MiB) and dtype of two versions of a frame, with a total row."""
+    before_mb = before.memory_usage(deep=True, index=False) / 2**20
+    after_mb = after.memory_usage(deep=True, index=False) / 2**20
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str).reindex(before.columns, fill_value="dropped"),
+        "mb_before": before_mb,
+        "mb_after": after_mb.reindex(before.columns, fill_value=0.0),
+    })
+    report.loc["total"] = ["", "", report["mb_before"].sum(), report["mb_after"].sum()]
+    report["saved"] = 1 - report["mb_after"] / report["mb_before"].where(report["mb_before"] > 0)
+    return report.rename_axis("column").reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from olist.loader import fetch_dataset, read_all_df
+
+    parser = argparse.ArgumentParser(description="Memory of all_df before and after compact_frame")
+    parser.add_argument("path", nargs="?", help="defaults to the downloaded dataset")
+    args = parser.parse_args()
+
+    all_df = read_all_df(args.path or fetch_dataset()[0])
+    with pd.option_context("display.width", 120, "display.max_rows", 100):
+        compact_df, lookups = compact_frame(all_df)
+        print(memory_report(all_df, compact_df).to_string(index=False, float_format="{:.2f}".format))
+        print(f"id lookups: {lookups_mb(lookups):.2f} MiB")
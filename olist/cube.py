@@ -0,0 +1,78 @@
+import pandas as pd
+
+# Daily rollup grain; coarser periods are derived from it
+CUBE_KEYS = ["day", "customer_state", "customer_city"]
+
+PERIODS = {
+    "Daily": "D",
+    "Weekly": "W",
+    "Monthly": "ME",
+    "Quarterly": "QE",
+}
+
+
+def build_rollup(all_df):
+    """Order items, revenue and distinct orders per day x state x city.
+
+    An order belongs to exactly one purchase day and one customer, so the
+    distinct-order counts add up exactly across cells.
+    """
+    day = all_df["order_purchase_timestamp"].dt.floor("D").rename("day")
+    rollup = all_df.groupby([day, all_df["customer_state"], all_df["customer_city"]], observed=True).agg(
+        items=("order_id", "size"),
+        revenue=("order_item_value", "sum"),
+        orders=("order_id", "nunique"),
+    )
+    return rollup.reset_index().sort_values("day", kind="stable", ignore_index=True)
+
+
+def orders_by_period(cells, time_period, value="items"):
+    """``value`` per period x state from day-level ``cells`` (day, customer_state, value)."""
+    grouped = cells.groupby([pd.Grouper(key="day", freq=PERIODS[time_period]), "customer_state"], observed=True)
+    grouped_data = grouped[value].sum().unstack(fill_value=0)
+    if time_period == "Daily":
+        grouped_data.index = grouped_data.index.date
+    return grouped_data
+
+
+def slice_cells(table, start=None, end=None, states=None, cities=None, time_column="day"):
+    """Rows of a day-sorted cell ``table`` in ``[start, end]`` (inclusive) and the given states/cities."""
+    day = table[time_column]
+    lo = 0 if start is None else day.searchsorted(pd.Timestamp(start).floor("D"), side="left")
+    hi = len(table) if end is None else day.searchsorted(pd.Timestamp(end).floor("D"), side="right")
+    table = table.iloc[lo:hi]
+
+    mask = None
+    if states is not None:
+        mask = table["customer_state"].isin(states)
+    if cities is not None:
+        city_mask = table["customer_city"].isin(cities)
+        mask = city_mask if mask is None else mask & city_mask
+    return table if mask is None else table[mask]
+
+
+class RollupCube:
+    def __init__(self, all_df, engine="pandas"):
+        if engine == "pandas":
+            self.table = build_rollup(all_df)
+        else:
+            from olist.parallel import run
+            self.table = run("rollup", all_df, engine)
+
+    def __len__(self):
+        return len(self.table)
+
+    def slice(self, start=None, end=None, states=None, cities=None):
+        """Cells whose day lies in ``[start, end]`` (both inclusive, day precision)."""
+        return slice_cells(self.table, start, end, states, cities)
+
+    def daily_orders(self, cells):
+        """Same frame as create_daily_orders_df on the raw rows of ``cells``."""
+        daily = cells.groupby("day").agg(order_count=("orders", "sum"), revenue=("revenue", "sum"))
+        if len(daily):
+            daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"), fill_value=0)
+        return daily.rename_axis("order_purchase_timestamp").reset_index()
+
+    def orders_by_state(self, cells, time_period):
+        """Order items per period x state, as grouped for the heatmaps."""
+        return orders_by_period(cells, time_period)
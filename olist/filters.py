@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+
+def _codes(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, categories = pd.factorize(series)
+    return codes, categories
+
+
+def _rows_by_code(codes, n_categories):
+    # Row positions grouped per code; a stable sort keeps each group ascending
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes[codes >= 0], minlength=n_categories)
+    skip = np.count_nonzero(codes < 0)
+    return np.split(order[skip:], np.cumsum(counts)[:-1])
+
+
+class FilterIndex:
+    """Row lookups on all_df, which is sorted by ``order_purchase_timestamp``.
+
+    The date range is two ``searchsorted`` calls on the timestamp column, and
+    states/cities come from precomputed per-value row positions, so a filter
+    costs O(log n + k) for k matching rows instead of a scan of every row.
+    """
+
+    def __init__(self, all_df, time_column="order_purchase_timestamp",
+                 state_column="customer_state", city_column="customer_city"):
+        self.df = all_df
+        self.times = all_df[time_column].to_numpy()
+        if len(self.times) and not (self.times[1:] >= self.times[:-1]).all():
+            raise ValueError(f"all_df must be sorted by {time_column}")
+
+        self.state_codes, self.states = _codes(all_df[state_column])
+        self.city_codes, self.cities = _codes(all_df[city_column])
+        self.rows_by_state = _rows_by_code(self.state_codes, len(self.states))
+        self.rows_by_city = _rows_by_code(self.city_codes, len(self.cities))
+
+        pairs = pd.DataFrame({"state": self.state_codes, "city": self.city_codes}).drop_duplicates()
+        self._cities_by_state = {s: np.sort(g["city"].to_numpy()) for s, g in pairs.groupby("state")}
+
+    def date_bounds(self, start_date=None, end_date=None):
+        """Positions ``[lo, hi)`` of rows with start_date <= timestamp < end_date."""
+        lo = 0 if start_date is None else self.times.searchsorted(np.datetime64(pd.Timestamp(start_date)), side="left")
+        hi = len(self.times) if end_date is None else self.times.searchsorted(np.datetime64(pd.Timestamp(end_date)), side="left")
+        return lo, max(lo, hi)
+
+    def city_options(self, states=None):
+        if not states:
+            return self.cities
+        chunks = [self._cities_by_state[c] for c in self.states.get_indexer(list(states)) if c in self._cities_by_state]
+        if not chunks:
+            return self.cities[:0]
+        return self.cities[np.unique(np.concatenate(chunks))]
+
+    @staticmethod
+    def _rows_in_range(rows_by_code, codes, lo, hi):
+        parts = []
+        for code in codes:
+            if code < 0:
+                continue
+            rows = rows_by_code[code]
+            parts.append(rows[rows.searchsorted(lo):rows.searchsorted(hi)])
+        rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        rows.sort()
+        return rows
+
+    def positions(self, start_date=None, end_date=None, states=None, cities=None):
+        """A slice when only dates are filtered, otherwise sorted row positions."""
+        lo, hi = self.date_bounds(start_date, end_date)
+        if not states and not cities:
+            return slice(lo, hi)
+
+        state_codes = self.states.get_indexer(list(states)) if states else None
+        city_codes = self.cities.get_indexer(list(cities)) if cities else None
+        # Walk the smaller selection, then check the other one through a code lookup
+        if city_codes is not None and (state_codes is None or
+                                       sum(len(self.rows_by_city[c]) for c in city_codes if c >= 0)
+                                       < sum(len(self.rows_by_state[c]) for c in state_codes if c >= 0)):
+            rows = self._rows_in_range(self.rows_by_city, city_codes, lo, hi)
+            other_codes, allowed, size = self.state_codes, state_codes, len(self.states)
+        else:
+            rows = self._rows_in_range(self.rows_by_state, state_codes, lo, hi)
+            other_codes, allowed, size = self.city_codes, city_codes, len(self.cities)
+
+        if allowed is not None:
+            lookup = np.zeros(size + 1, dtype=bool)
+            lookup[allowed] = True
+            lookup[-1] = False  # code -1 (missing or unknown) never matches
+            rows = rows[lookup[other_codes[rows]]]
+        return rows
+
+    def filter(self, start_date=None, end_date=None, states=None, cities=None):
+        """Filtered rows of all_df; a plain date range is returned as a positional slice."""
+        return self.df.iloc[self.positions(start_date, end_date, states, cities)]
@@ -0,0 +1,51 @@
+import math as m
+
+import numpy as np
+
+# Jari-jari Bumi (dalam kilometer)
+EARTH_RADIUS_KM = 6371.0
+
+# Rows per chunk keeps the temporaries of haversine_np at a few MB
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    # Jari-jari Bumi (dalam kilometer)
+    R = EARTH_RADIUS_KM
+
+    # Konversi derajat ke radian
+    lat1, lng1, lat2, lng2 = map(m.radians, [lat1, lng1, lat2, lng2])
+
+    # Selisih koordinat
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+
+    # Rumus Haversine
+    a = m.sin(dlat / 2)**2 + m.cos(lat1) * m.cos(lat2) * m.sin(dlng / 2)**2
+    c = 2 * m.atan2(m.sqrt(a), m.sqrt(1 - a))
+
+    # Jarak dalam kilometer
+    jarak = R * c
+    return jarak
+
+
+def _haversine_chunk(lat1, lng1, lat2, lng2, out):
+    lat1, lng1, lat2, lng2 = (np.radians(x) for x in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    np.arctan2(np.sqrt(a), np.sqrt(1 - a), out=out)
+    out *= out.dtype.type(2 * EARTH_RADIUS_KM)
+
+
+def haversine_np(lat1, lng1, lat2, lng2, dtype=np.float64, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Vectorized ``haversine`` over array-likes, evaluated in chunks of ``chunk_size`` rows.
+
+    Pass ``dtype=np.float32`` to halve memory at roughly metre-level precision.
+    """
+    lat1, lng1, lat2, lng2 = (np.asarray(x, dtype=dtype) for x in (lat1, lng1, lat2, lng2))
+    out = np.empty(lat1.shape, dtype=dtype)
+    n = len(out)
+    step = chunk_size or n or 1
+    for start in range(0, n, step):
+        sl = slice(start, start + step)
+        _haversine_chunk(lat1[sl], lng1[sl], lat2[sl], lng2[sl], out[sl])
+    return out
@@ -0,0 +1,132 @@
+"""HyperLogLog distinct counts of customers and orders per day x state x city.
+
+Every value is hashed to 64 bits; the top ``precision`` bits pick one of
+``m = 2**precision`` registers, which keeps the largest rank (leading zeros
++ 1) of the remaining bits. The registers of a set of cells are the
+element-wise max of the cells' registers, so distinct counts of any
+date/state/city selection merge from the cells instead of the rows.
+
+With the default precision of 12 (4096 registers) an estimate has a relative
+standard error of about 1.04 / sqrt(m) = 1.6%; small counts switch to linear
+counting and are nearly exact. ``python -m benchmarks.distinct`` measures the
+error against exact ``nunique`` on random filters.
+
+Cells only store the (register, rank) pairs that are set, as in the sparse
+representation of HyperLogLog++.
+"""
+import numpy as np
+import pandas as pd
+
+from olist.cube import slice_cells
+
+PRECISION = 12
+
+# Output column -> counted column
+DISTINCT_COLUMNS = {
+    "customers": "customer_unique_id",
+    "orders": "order_id",
+}
+
+
+def standard_error(precision=PRECISION):
+    return 1.04 / np.sqrt(1 << precision)
+
+
+def hash_values(values):
+    return pd.util.hash_array(np.asarray(values))
+
+
+def _leading_zeros(hashes):
+    x = hashes.copy()
+    zeros = np.zeros(len(x), dtype=np.int8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> np.uint64(64 - shift)) == 0
+        zeros[empty] += shift
+        x[empty] <<= np.uint64(shift)
+    zeros[hashes == 0] = 64
+    return zeros
+
+
+def registers_and_ranks(hashes, precision=PRECISION):
+    """Register index and rank of each 64-bit hash."""
+    register = (hashes >> np.uint64(64 - precision)).astype(np.int32)
+    rest = hashes << np.uint64(precision)
+    rank = np.minimum(_leading_zeros(rest), 64 - precision) + 1
+    return register, rank.astype(np.int8)
+
+
+def estimate(registers):
+    """Distinct count from full register arrays (the last axis)."""
+    registers = np.asarray(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    # Linear counting is more accurate while many registers are still empty
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    def __init__(self, registers):
+        self.registers = np.asarray(registers, dtype=np.int8)
+
+    @classmethod
+    def from_values(cls, values, precision=PRECISION):
+        register, rank = registers_and_ranks(hash_values(values), precision)
+        return cls.from_pairs(register, rank, precision)
+
+    @classmethod
+    def from_pairs(cls, register, rank, precision=PRECISION):
+        registers = np.zeros(1 << precision, dtype=np.int8)
+        np.maximum.at(registers, register, rank)
+        return cls(registers)
+
+    @classmethod
+    def from_cells(cls, cells, precision=PRECISION):
+        """Merge the ``register``/``rank`` rows of a slice of a ``DistinctCube`` table."""
+        return cls.from_pairs(cells["register"].to_numpy(), cells["rank"].to_numpy(), precision)
+
+    def merge(self, other):
+        return HyperLogLog(np.maximum(self.registers, other.registers))
+
+    def count(self):
+        return int(np.rint(estimate(self.registers)))
+
+
+def build_registers(all_df, column, precision=PRECISION):
+    """Largest rank per day x state x city x register of ``column``, sorted by day."""
+    register, rank = registers_and_ranks(hash_values(all_df[column].to_numpy()), precision)
+    day = all_df["order_purchase_timestamp"].dt.floor("D").rename("day")
+    pairs = pd.DataFrame({"register": register, "rank": rank}, index=all_df.index)
+    table = pairs.groupby([day, all_df["customer_state"], all_df["customer_city"], pairs["register"]],
+                          observed=True)["rank"].max()
+    return table.reset_index()
+
+
+class DistinctCube:
+    def __init__(self, all_df, columns=None, precision=PRECISION):
+        self.columns = dict(DISTINCT_COLUMNS if columns is None else columns)
+        self.precision = precision
+        self.tables = {name: build_registers(all_df, column, precision) for name, column in self.columns.items()}
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def sketch(self, name, start=None, end=None, states=None, cities=None):
+        cells = slice_cells(self.tables[name], start, end, states, cities)
+        return HyperLogLog.from_cells(cells, self.precision)
+
+    def distinct_counts(self, start=None, end=None, states=None, cities=None):
+        """Same frame as create_distinct_counts_df, estimated from the registers."""
+        counts = {}
+        for name in self.columns:
+            cells = slice_cells(self.tables[name], start, end, states, cities)
+            codes, labels = pd.factorize(cells["customer_state"], sort=True)
+            # One register array per state, all merged in a single pass; "All" is their max
+            registers = np.zeros((len(labels), 1 << self.precision), dtype=np.int8)
+            np.maximum.at(registers, (codes, cells["register"].to_numpy()), cells["rank"].to_numpy())
+            registers = np.vstack([registers.max(axis=0, initial=0), registers])
+            counts[name] = pd.Series(np.rint(estimate(registers)).astype(np.int64),
+                                     index=["All"] + [str(state) for state in labels])
+        return pd.DataFrame(counts).rename_axis("customer_state").reset_index()
@@ -0,0 +1,174 @@
+"""Append daily order batches to a partitioned store without rebuilding all_df.
+
+A batch directory holds new rows of the order tables, with the same file
+names as the raw Olist export (orders and order_items are required,
+payments and reviews are optional). Customers, sellers, products,
+categories and geolocation come from the reference raw directory; a batch
+may also carry new customers/sellers/products files, which are added to
+the reference rows.
+
+    python -m olist.incremental init path/to/raw_csvs --store dataset
+    python -m olist.incremental append path/to/batch --raw-dir path/to/raw_csvs --store dataset
+"""
+import os
+import threading
+
+import pandas as pd
+
+from olist.pipeline import (RAW_FILES, Pipeline, fit_thresholds, read_raw, stage_all_df,
+                            stage_geolocation, stage_merge, stage_order_items, stage_orders,
+                            stage_payments, stage_products)
+from olist.rfm import merge_states, rfm_from_state, rfm_state
+from olist.store import PartitionedStore
+
+DIMENSION_KEYS = {"customers": "customer_id", "sellers": "seller_id", "products": "product_id"}
+
+
+def _read_batch_table(batch_dir, name, required=False):
+    filename, columns = RAW_FILES[name]
+    path = os.path.join(batch_dir, filename)
+    if os.path.exists(path):
+        return read_raw(path, columns)
+    if required:
+        raise FileNotFoundError(path)
+    return None
+
+
+def _empty(name):
+    _, columns = RAW_FILES[name]
+    return pd.DataFrame({c: pd.Series(dtype="datetime64[ns]" if t == "datetime" else t)
+                         for c, t in columns.items()})
+
+
+def _dimension(pipeline, batch_dir, name):
+    df = pipeline.load(name)
+    extra = _read_batch_table(batch_dir, name)
+    if extra is not None:
+        df = pd.concat([df, extra], ignore_index=True).drop_duplicates(DIMENSION_KEYS[name], keep="last")
+    return df
+
+
+def enrich_batch(batch_dir, pipeline, thresholds, distance_cache=None):
+    """Run a batch through the same enrichment as the full pipeline."""
+    orders_df = stage_orders(_read_batch_table(batch_dir, "orders", required=True))
+    order_items_df = stage_order_items(_read_batch_table(batch_dir, "order_items", required=True))
+    payments_df = _read_batch_table(batch_dir, "order_payments")
+    payments_df = stage_payments(payments_df if payments_df is not None else _empty("order_payments"),
+                                 thresholds.get("payment_value_max"))
+    reviews_df = _read_batch_table(batch_dir, "order_reviews")
+    reviews_df = reviews_df if reviews_df is not None else _empty("order_reviews")
+
+    products_df = stage_products(_dimension(pipeline, batch_dir, "products"), pipeline.load("category_name"))
+    all_df = stage_merge(order_items_df, orders_df, payments_df,
+                         _dimension(pipeline, batch_dir, "customers"),
+                         _dimension(pipeline, batch_dir, "sellers"),
+                         products_df, reviews_df,
+                         review_score_fill=thresholds.get("review_score_fill"))
+    all_df = stage_geolocation(all_df, pipeline.load("geolocation"))
+    return stage_all_df(all_df, distance_cache)
+
+
+def init_store(raw_dir, store_root, cache_dir=".olist_cache"):
+    pipeline = Pipeline(raw_dir, cache_dir)
+    store = PartitionedStore(store_root)
+    if store.partitions():
+        raise ValueError(f"{store_root} already holds data, use append")
+    store.set_thresholds(**fit_thresholds(pipeline))
+    return store.append(pipeline.run(), batch_id="initial")
+
+
+def append_batch(batch_dir, raw_dir, store_root, cache_dir=".olist_cache", batch_id=None):
+    """Enrich ``batch_dir`` and append it; returns the affected purchase months."""
+    store = PartitionedStore(store_root)
+    batch_df = enrich_batch(batch_dir, Pipeline(raw_dir, cache_dir), store.thresholds)
+    return store.append(batch_df, batch_id or os.path.basename(os.path.normpath(batch_dir)))
+
+
+# Per-partition partial aggregates; each pair is (partial, combine)
+def _daily_orders_partial(df):
+    return df.groupby(df["order_purchase_timestamp"].dt.floor("D")).agg(
+        order_count=("order_id", "nunique"),
+        revenue=("order_item_value", "sum"),
+    )
+
+
+def _daily_orders_combine(partials):
+    daily_orders_df = pd.concat(partials).sort_index()
+    # Same empty days as df.resample(rule='D') over the whole range
+    full_range = pd.date_range(daily_orders_df.index.min(), daily_orders_df.index.max(), freq="D")
+    daily_orders_df = daily_orders_df.reindex(full_range, fill_value=0)
+    return daily_orders_df.rename_axis("order_purchase_timestamp").reset_index()
+
+
+def _rfm_combine(partials):
+    # An order has a single purchase timestamp, so order ids never span partitions
+    return rfm_from_state(merge_states(partials))
+
+
+AGGREGATES = {
+    "daily_orders": (_daily_orders_partial, _daily_orders_combine,
+                     ["order_purchase_timestamp", "order_id", "order_item_value"]),
+    "rfm": (rfm_state, _rfm_combine,
+            ["customer_unique_id", "order_purchase_timestamp", "order_id", "order_item_value"]),
+}
+
+
+class PartitionAggregates:
+    """daily_orders / rfm over a PartitionedStore, recomputing only changed partitions.
+
+    Only these two aggregates are incremental; the dashboard's other indexes
+    are rebuilt from the whole store after an append.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        # (aggregate, month) -> (partition version, partial frame)
+        self._partials = {}
+        self.recomputed = []
+        self._lock = threading.Lock()
+
+    def _partial(self, name, month, version):
+        cached = self._partials.get((name, month))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        partial, _, columns = AGGREGATES[name]
+        frame = partial(self.store.read_partition(month, columns))
+        self._partials[(name, month)] = (version, frame)
+        self.recomputed.append((name, month))
+        return frame
+
+    def get(self, name):
+        _, combine, _ = AGGREGATES[name]
+        with self._lock:
+            self.store.reload()
+            partials = [self._partial(name, month, version) for month, version in self.store.partitions().items()]
+        return combine(partials)
+
+    def daily_orders(self):
+        return self.get("daily_orders")
+
+    def rfm(self):
+        return self.get("rfm")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incrementally maintain the partitioned Olist dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    init = sub.add_parser("init", help="build the store from the full raw export")
+    init.add_argument("raw_dir")
+    append = sub.add_parser("append", help="append a batch of new orders")
+    append.add_argument("batch_dir")
+    append.add_argument("--raw-dir", required=True, help="reference raw CSVs (customers, sellers, ...)")
+    append.add_argument("--batch-id")
+    for p in (init, append):
+        p.add_argument("--store", default="dataset")
+        p.add_argument("--cache-dir", default=".olist_cache")
+    args = parser.parse_args()
+
+    if args.command == "init":
+        months = init_store(args.raw_dir, args.store, args.cache_dir)
+    else:
+        months = append_batch(args.batch_dir, args.raw_dir, args.store, args.cache_dir, args.batch_id)
+    print(f"{len(months)} partitions written: {', '.join(months)}")
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import pandas as pd
+
+from olist.etl import add_order_distance
+from olist.profiling import profiled
+from olist.schema import DATETIME_COLUMNS, SCHEMA, SORT_COLUMN, apply_schema
+from olist.store import MANIFEST, PartitionedStore
+
+# File ID from Google Drive link
+DATASET_FILE_ID = "1O05uX_AkbrFRh0zXXzh5fU7bteSbBtgG"
+DATASET_URL = f"https://drive.google.com/uc?id={DATASET_FILE_ID}"
+DEFAULT_OUTPUT = "downloaded_file.csv"
+
+# Set this to a local CSV to run the dashboard without network access
+LOCAL_PATH_ENV = "OLIST_DATA_PATH"
+
+# Bump when the columnar artifact gains or changes columns
+ARTIFACT_VERSION = 2
+
+# Re-check the remote file at most once per day
+REVALIDATE_AFTER = 24 * 60 * 60
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _meta_path(path):
+    return f"{path}.meta.json"
+
+
+def _read_meta(path):
+    try:
+        with open(_meta_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    tmp = _meta_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, _meta_path(path))
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _remote_headers(url, timeout=5):
+    # ETag-style validators; an empty dict means the remote is unreachable
+    try:
+        import requests
+
+        response = requests.head(url, allow_redirects=True, timeout=timeout)
+        response.raise_for_status()
+    except Exception:
+        return {}
+    headers = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": response.headers.get("Content-Length"),
+    }
+    return {k: v for k, v in headers.items() if v}
+
+
+def _local_copy_sha256(path, meta, sha256=None):
+    # Only rehash when size/mtime changed since the last recorded check
+    if not os.path.exists(path):
+        return None
+    if meta.get("stat") == _stat_key(path) and meta.get("sha256"):
+        digest = meta["sha256"]
+    else:
+        digest = file_sha256(path)
+    if sha256 is not None and digest != sha256:
+        return None
+    return digest
+
+
+def _validators_match(meta, headers):
+    known = meta.get("validators", {})
+    shared = set(known) & set(headers)
+    return all(known[k] == headers[k] for k in shared)
+
+
+@profiled()
+def fetch_dataset(url=DATASET_URL, output=DEFAULT_OUTPUT, sha256=None,
+                  revalidate_after=REVALIDATE_AFTER, local_path=None):
+    """Return ``(path, sha256)`` of the merged dataset, downloading only when needed."""
+    local_path = local_path or os.environ.get(LOCAL_PATH_ENV)
+    if local_path and os.path.isdir(local_path):
+        # Partitioned store, its manifest changes on every append
+        return local_path, file_sha256(os.path.join(local_path, MANIFEST))
+    if local_path:
+        meta = _read_meta(local_path)
+        digest = _local_copy_sha256(local_path, meta, sha256)
+        if digest is None:
+            raise ValueError(f"{local_path} does not match the expected sha256")
+        if meta.get("stat") != _stat_key(local_path) or meta.get("sha256") != digest:
+            meta.update(stat=_stat_key(local_path), sha256=digest)
+            try:
+                _write_meta(local_path, meta)
+            except OSError:
+                # Read-only data directory; hash again next time
+                pass
+        return local_path, digest
+
+    meta = _read_meta(output)
+    digest = _local_copy_sha256(output, meta, sha256)
+    if digest is not None and meta.get("url") == url:
+        if time.time() - meta.get("checked_at", 0) < revalidate_after:
+            return output, digest
+        headers = _remote_headers(url)
+        # Offline, or the remote still matches what we downloaded
+        if not headers or _validators_match(meta, headers):
+            meta.update(checked_at=time.time(), stat=_stat_key(output), sha256=digest)
+            _write_meta(output, meta)
+            return output, digest
+
+    import gdown
+
+    tmp = output + ".part"
+    try:
+        downloaded = gdown.download(url, tmp, quiet=False)
+    except Exception:
+        downloaded = None
+    if downloaded is None:
+        if digest is not None:
+            # Keep serving the stale copy rather than failing the whole app
+            return output, digest
+        raise RuntimeError(f"Unable to download dataset from {url}")
+
+    new_digest = file_sha256(tmp)
+    if sha256 is not None and new_digest != sha256:
+        os.remove(tmp)
+        raise ValueError(f"Downloaded file does not match the expected sha256 {sha256}")
+    os.replace(tmp, output)
+    _write_meta(output, {
+        "url": url,
+        "sha256": new_digest,
+        "stat": _stat_key(output),
+        "validators": _remote_headers(url),
+        "checked_at": time.time(),
+    })
+    return output, new_digest
+
+
+@profiled()
+def _read_csv(path, columns=None):
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in header if columns is None or c in columns]
+    dtype = {c: SCHEMA[c] for c in usecols if c in SCHEMA and c not in DATETIME_COLUMNS}
+    parse_dates = [c for c in DATETIME_COLUMNS if c in usecols]
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, parse_dates=parse_dates)
+
+
+def _with_order_distance(all_df):
+    if "order_distance" in all_df.columns:
+        return all_df
+    return add_order_distance(all_df)
+
+
+def write_columnar(all_df, output):
+    """Write all_df typed and sorted by purchase timestamp to Parquet (or ``.feather``)."""
+    all_df = apply_schema(all_df).sort_values(by=SORT_COLUMN, kind="stable", ignore_index=True)
+
+    tmp = output + ".part"
+    if output.endswith(".feather"):
+        all_df.to_feather(tmp)
+    else:
+        all_df.to_parquet(tmp, index=False)
+    os.replace(tmp, output)
+    return output
+
+
+def convert_to_columnar(csv_path, output):
+    """One-time conversion of the merged CSV into a typed, pre-sorted Parquet/Feather file."""
+    return write_columnar(_with_order_distance(_read_csv(csv_path)), output)
+
+
+def columnar_path(csv_path, sha256, suffix=".parquet"):
+    root, _ = os.path.splitext(csv_path)
+    return f"{root}.{sha256[:16]}.v{ARTIFACT_VERSION}{suffix}"
+
+
+def prune_artifacts(path, sha256, suffix):
+    """Delete the ``suffix`` artifacts of ``path`` left by other dataset versions or ARTIFACT_VERSIONs."""
+    root, _ = os.path.splitext(path.rstrip(os.sep))
+    directory, base = os.path.split(root)
+    pattern = re.compile(re.escape(base) + r"\.([0-9a-f]{16})\.v(\d+)\..*")
+    removed = []
+    for name in os.listdir(directory or "."):
+        match = pattern.fullmatch(name)
+        if not match or not name.endswith(suffix):
+            continue
+        if match.group(1) == sha256[:16] and int(match.group(2)) == ARTIFACT_VERSION:
+            continue
+        stale = os.path.join(directory, name)
+        # Processes still mapping an old artifact keep reading it until they reload
+        if os.path.isdir(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+        else:
+            try:
+                os.remove(stale)
+            except OSError:
+                continue
+        removed.append(stale)
+    return removed
+
+
+@profiled()
+def ensure_columnar(csv_path, sha256):
+    """Return the columnar copy of ``csv_path``, falling back to the CSV itself."""
+    if os.path.isdir(csv_path) or csv_path.endswith((".parquet", ".feather")):
+        return csv_path
+    output = columnar_path(csv_path, sha256)
+    if os.path.exists(output):
+        return output
+    try:
+        convert_to_columnar(csv_path, output)
+    except ImportError:
+        # pyarrow is not installed
+        return csv_path
+    prune_artifacts(csv_path, sha256, ".parquet")
+    return output
+
+
+@profiled()
+def read_all_df(path, columns=None):
+    if os.path.isdir(path):
+        return PartitionedStore(path).read(columns)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    if path.endswith(".feather"):
+        return pd.read_feather(path, columns=columns)
+
+    all_df = _with_order_distance(_read_csv(path))
+    all_df.sort_values(by=SORT_COLUMN, inplace=True, kind="stable")
+    all_df.reset_index(drop=True, inplace=True)
+    return all_df if columns is None else all_df[columns]
+
+
+def load_all_df(url=DATASET_URL, output=DEFAULT_OUTPUT, sha256=None, local_path=None, columns=None):
+    path, digest = fetch_dataset(url, output, sha256=sha256, local_path=local_path)
+    return read_all_df(ensure_columnar(path, digest), columns=columns)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert the merged Olist CSV to Parquet/Feather")
+    parser.add_argument("csv_path")
+    parser.add_argument("output", nargs="?", help="defaults to <csv>.<sha256>.v<version>.parquet")
+    args = parser.parse_args()
+
+    output = args.output or columnar_path(args.csv_path, file_sha256(args.csv_path))
+    print(convert_to_columnar(args.csv_path, output))
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def filter_key(start_date, end_date, states=(), cities=()):
+    """Normalized, hashable form of the sidebar filters.
+
+    Empty selections mean "everything", and the order in which states or
+    cities were picked does not matter.
+    """
+    return (
+        pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+        pd.Timestamp(end_date).strftime("%Y-%m-%d"),
+        tuple(sorted(map(str, states))),
+        tuple(sorted(map(str, cities))),
+    )
+
+
+class AggregateMemo:
+    """Process-wide LRU of aggregate frames keyed on (aggregate name, filter key)."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # name -> [hits, misses]
+        self.counters = {}
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _count(self, name, hit):
+        counter = self.counters.setdefault(name, [0, 0])
+        counter[0 if hit else 1] += 1
+
+    def get(self, name, key, compute):
+        entry = (name, key)
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                self._count(name, True)
+                return self._entries[entry]
+            self._count(name, False)
+
+        # Computed outside the lock; two sessions may race on the same miss
+        value = compute()
+        with self._lock:
+            self._entries[entry] = value
+            self._entries.move_to_end(entry)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            rows = [{"aggregate": name, "hits": hits, "misses": misses}
+                    for name, (hits, misses) in sorted(self.counters.items())]
+        return pd.DataFrame(rows, columns=["aggregate", "hits", "misses"])
+
+    def bind(self, key, make_df):
+        return FilterView(self, key, make_df)
+
+
+class FilterView:
+    """Aggregates of one filter combination; the filtered frame is built only on a miss."""
+
+    def __init__(self, memo, key, make_df):
+        self.memo = memo
+        self.key = key
+        self._make_df = make_df
+        self._df = None
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = self._make_df()
+        return self._df
+
+    def get(self, name, builder):
+        return self.memo.get(name, self.key, lambda: builder(self.df))
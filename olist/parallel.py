@@ -0,0 +1,247 @@
+"""Partitioned aggregation with a choice of engine.
+
+Each operation is a partial aggregate of a slice of rows plus an exact merge
+of the partials, so every engine returns the same frame as the single-pass
+pandas path:
+
+- ``pandas``: one partial over all rows, in process.
+- ``process``: the rows are split into partitions that are aggregated in a
+  process pool and merged.
+- ``polars`` / ``duckdb``: the same operation run by that library, if it is
+  installed. Operations they do not implement run on ``process``.
+
+Time partitions are cut at day boundaries of the (sorted) purchase timestamp,
+so no order or customer_id is split across partitions; ``rfm_state`` can
+also partition by a hash of the customer. Revenue is summed in integer cents
+(``rfm``) or per cell inside a single partition (``rollup``) so the float
+results do not depend on how the rows were split.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from olist.cube import build_rollup
+from olist.rfm import merge_states, rfm_state
+
+ENGINE_ENV = "OLIST_ENGINE"
+ENGINES = ["pandas", "process", "polars", "duckdb"]
+DEFAULT_ENGINE = "pandas"
+
+TIME_COLUMN = "order_purchase_timestamp"
+# Below this many rows per partition the pickling and scheduling cost more than they save
+MIN_PARTITION_ROWS = 250_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_engine():
+    engine = os.environ.get(ENGINE_ENV, DEFAULT_ENGINE)
+    if engine not in ENGINES:
+        raise ValueError(f"{ENGINE_ENV} must be one of {', '.join(ENGINES)}")
+    return engine
+
+
+def available_engines():
+    engines = ["pandas", "process"]
+    for name in ("polars", "duckdb"):
+        try:
+            __import__(name)
+            engines.append(name)
+        except ImportError:
+            pass
+    return engines
+
+
+def get_pool(max_workers=None):
+    """Process pool shared by all calls; spawned, since Streamlit and uvicorn run threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+        return _pool
+
+
+# Partials: aggregate of a slice of rows ------------------------------------
+
+def state_day_counts(df):
+    """Order items per day x customer_state, sorted by day then state."""
+    day = df[TIME_COLUMN].dt.floor("D").rename("day")
+    counts = df.groupby([day, df["customer_state"]], observed=True).size().rename("items")
+    return counts.reset_index()
+
+
+def _concat(partials):
+    # Day-aligned time partitions produce disjoint, already ordered keys
+    return pd.concat(partials, ignore_index=True)
+
+
+OPERATIONS = {
+    # name -> (partial, combine over time partitions, columns read)
+    "rfm_state": (rfm_state, merge_states,
+                  ["customer_unique_id", "order_id", TIME_COLUMN, "order_item_value"]),
+    "state_day_counts": (state_day_counts, _concat, [TIME_COLUMN, "customer_state"]),
+    "rollup": (build_rollup, _concat,
+               [TIME_COLUMN, "customer_state", "customer_city", "order_id", "order_item_value"]),
+}
+
+
+# Partitioning ---------------------------------------------------------------
+
+def partition_count(n_rows, max_workers=None):
+    workers = max_workers or os.cpu_count() or 1
+    return max(1, min(2 * workers, n_rows // MIN_PARTITION_ROWS))
+
+
+def time_partitions(df, n_partitions):
+    """Row bounds ``[(lo, hi), ...]`` of about equal size, each cut at the start of a day."""
+    days = df[TIME_COLUMN].to_numpy().astype("datetime64[D]")
+    if len(days) and not (days[1:] >= days[:-1]).all():
+        raise ValueError(f"time partitions need rows sorted by {TIME_COLUMN}")
+    cuts = np.linspace(0, len(days), n_partitions + 1).astype(np.intp)[1:-1]
+    cuts = np.unique(days.searchsorted(days[cuts], side="left")) if len(cuts) else cuts
+    bounds = np.concatenate([[0], cuts[(cuts > 0) & (cuts < len(days))], [len(days)]])
+    return [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def customer_partitions(df, n_partitions, column="customer_unique_id"):
+    """Row positions per partition, every customer's rows in exactly one partition."""
+    buckets = pd.util.hash_array(df[column].to_numpy()) % np.uint64(n_partitions)
+    order = np.argsort(buckets, kind="stable")
+    counts = np.bincount(buckets.astype(np.intp), minlength=n_partitions)
+    return [rows for rows in np.split(order, np.cumsum(counts)[:-1]) if len(rows)]
+
+
+def _partial(name, chunk):
+    return OPERATIONS[name][0](chunk)
+
+
+def _run_process(name, df, partition_by, max_workers):
+    partial, combine, columns = OPERATIONS[name]
+    df = df[[c for c in columns if c in df.columns]]
+    n_partitions = partition_count(len(df), max_workers)
+    if n_partitions == 1:
+        return partial(df)
+
+    if partition_by == "customer":
+        if name != "rfm_state":
+            raise ValueError(f"{name} can only be partitioned by time")
+        chunks = [df.take(rows) for rows in customer_partitions(df, n_partitions)]
+    else:
+        chunks = [df.iloc[lo:hi] for lo, hi in time_partitions(df, n_partitions)]
+
+    pool = get_pool(max_workers)
+    partials = list(pool.map(_partial, [name] * len(chunks), chunks))
+    if partition_by == "customer":
+        # Customers are disjoint; restore the first-appearance order of the single pass
+        state = pd.concat(partials)
+        return state.reindex(pd.Index(pd.unique(df["customer_unique_id"]), name=state.index.name))
+    return combine(partials)
+
+
+# Library engines --------------------------------------------------------------
+
+def _rfm_inputs(df):
+    customer_codes, customers = pd.factorize(df["customer_unique_id"])
+    order_codes, _ = pd.factorize(df["order_id"])
+    inputs = pd.DataFrame({
+        "customer": customer_codes,
+        "order": order_codes,
+        "ts": df[TIME_COLUMN].to_numpy(dtype="datetime64[ns]").view(np.int64),
+        "cents": np.rint(df["order_item_value"].to_numpy(dtype=np.float64) * 100).astype(np.int64),
+    })
+    return inputs, customers
+
+
+def _rfm_state_frame(result, customers):
+    # Codes follow first appearance, so sorting by code gives the pandas customer order
+    return pd.DataFrame({
+        "last_purchase": result["ts"].to_numpy(dtype=np.int64).view("datetime64[ns]"),
+        "frequency": result["frequency"].to_numpy(dtype=np.int64),
+        "monetary_cents": result["cents"].to_numpy(dtype=np.int64),
+    }, index=pd.Index(customers.take(result["customer"].to_numpy()), name="customer_id"))
+
+
+def _day_state_inputs(df):
+    codes = df["customer_state"].cat.codes.to_numpy() if isinstance(df["customer_state"].dtype, pd.CategoricalDtype) \
+        else pd.factorize(df["customer_state"], sort=True)[0]
+    inputs = pd.DataFrame({
+        "day": df[TIME_COLUMN].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").view(np.int64),
+        "state": codes.astype(np.int64),
+    })
+    return inputs[inputs["state"] >= 0]
+
+
+def _day_state_frame(result, df):
+    states = df["customer_state"]
+    categories = states.cat.categories if isinstance(states.dtype, pd.CategoricalDtype) \
+        else pd.factorize(states, sort=True)[1]
+    customer_state = pd.Categorical.from_codes(result["state"].to_numpy(), categories=categories)
+    if not isinstance(states.dtype, pd.CategoricalDtype):
+        customer_state = np.asarray(customer_state)
+    return pd.DataFrame({
+        "day": result["day"].to_numpy(dtype=np.int64).astype("datetime64[D]").astype("datetime64[ns]"),
+        "customer_state": customer_state,
+        "items": result["items"].to_numpy(dtype=np.int64),
+    })
+
+
+def _polars_rfm_state(df):
+    import polars as pl
+
+    inputs, customers = _rfm_inputs(df)
+    result = (pl.from_pandas(inputs).group_by("customer")
+              .agg(pl.col("ts").max(), pl.col("order").n_unique().alias("frequency"), pl.col("cents").sum())
+              .sort("customer").to_pandas())
+    return _rfm_state_frame(result, customers)
+
+
+def _polars_state_day_counts(df):
+    import polars as pl
+
+    result = (pl.from_pandas(_day_state_inputs(df)).group_by(["day", "state"])
+              .agg(pl.len().alias("items")).sort(["day", "state"]).to_pandas())
+    return _day_state_frame(result, df)
+
+
+def _duckdb_rfm_state(df):
+    import duckdb
+
+    inputs, customers = _rfm_inputs(df)
+    result = duckdb.query_df(inputs, "inputs", """
+        SELECT customer, max(ts) AS ts, count(DISTINCT "order") AS frequency, sum(cents)::BIGINT AS cents
+        FROM inputs GROUP BY customer ORDER BY customer""").df()
+    return _rfm_state_frame(result, customers)
+
+
+def _duckdb_state_day_counts(df):
+    import duckdb
+
+    result = duckdb.query_df(_day_state_inputs(df), "inputs", """
+        SELECT day, state, count(*) AS items FROM inputs GROUP BY day, state ORDER BY day, state""").df()
+    return _day_state_frame(result, df)
+
+
+LIBRARY_ENGINES = {
+    ("polars", "rfm_state"): _polars_rfm_state,
+    ("polars", "state_day_counts"): _polars_state_day_counts,
+    ("duckdb", "rfm_state"): _duckdb_rfm_state,
+    ("duckdb", "state_day_counts"): _duckdb_state_day_counts,
+}
+
+
+def run(name, df, engine=None, partition_by="time", max_workers=None):
+    """Result of operation ``name`` on ``df``; identical for every engine."""
+    engine = engine or default_engine()
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+    if engine == "pandas":
+        return OPERATIONS[name][0](df)
+    library = LIBRARY_ENGINES.get((engine, name))
+    if library is not None:
+        return library(df)
+    return _run_process(name, df, partition_by, max_workers)
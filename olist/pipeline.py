@@ -0,0 +1,270 @@
+"""Rebuild the merged all_df from the nine raw Olist CSVs.
+
+Each stage caches its output under ``cache_dir`` as ``<stage>-<key>.parquet``
+where the key hashes the stage version and the keys of its inputs (raw files
+are keyed by their sha256), so a rebuild only re-runs stages downstream of a
+changed file.
+
+    python -m olist.pipeline path/to/raw_csvs -o all_data.parquet
+"""
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from olist.etl import add_geolocation, add_order_distance
+from olist.loader import file_sha256, write_columnar
+from olist.schema import apply_schema
+
+# Raw Olist files with only the columns the merged frame needs
+RAW_FILES = {
+    "customers": ("olist_customers_dataset.csv", {
+        "customer_id": "str",
+        "customer_unique_id": "str",
+        "customer_zip_code_prefix": "int32",
+        "customer_city": "category",
+        "customer_state": "category",
+    }),
+    "geolocation": ("olist_geolocation_dataset.csv", {
+        "geolocation_zip_code_prefix": "int32",
+        "geolocation_lat": "float64",
+        "geolocation_lng": "float64",
+        # Only used so drop_duplicates() matches the notebook
+        "geolocation_city": "str",
+        "geolocation_state": "category",
+    }),
+    "order_items": ("olist_order_items_dataset.csv", {
+        "order_id": "str",
+        "order_item_id": "int16",
+        "product_id": "str",
+        "seller_id": "str",
+        "price": "float64",
+        "freight_value": "float64",
+    }),
+    "order_payments": ("olist_order_payments_dataset.csv", {
+        "order_id": "str",
+        "payment_value": "float64",
+    }),
+    "order_reviews": ("olist_order_reviews_dataset.csv", {
+        "order_id": "str",
+        "review_score": "float32",
+    }),
+    "orders": ("olist_orders_dataset.csv", {
+        "order_id": "str",
+        "customer_id": "str",
+        "order_status": "category",
+        "order_purchase_timestamp": "datetime",
+        "order_delivered_customer_date": "datetime",
+    }),
+    "products": ("olist_products_dataset.csv", {
+        "product_id": "str",
+        "product_category_name": "str",
+    }),
+    "sellers": ("olist_sellers_dataset.csv", {
+        "seller_id": "str",
+        "seller_zip_code_prefix": "int32",
+        "seller_city": "category",
+        "seller_state": "category",
+    }),
+    "category_name": ("product_category_name_translation.csv", {
+        "product_category_name": "str",
+        "product_category_name_english": "str",
+    }),
+}
+
+
+def read_raw(path, columns):
+    dtype = {c: t for c, t in columns.items() if t != "datetime"}
+    parse_dates = [c for c, t in columns.items() if t == "datetime"]
+    return pd.read_csv(path, usecols=list(columns), dtype=dtype, parse_dates=parse_dates)
+
+
+def iqr_upper_bound(series):
+    Q1 = series.quantile(0.25)
+    Q3 = series.quantile(0.75)
+    return Q3 + (1.5 * (Q3 - Q1))
+
+
+def clip_upper_iqr(series, maximum=None):
+    # Nilai di atas Q3 + 1.5*IQR diganti dengan batas atasnya
+    if maximum is None:
+        maximum = iqr_upper_bound(series)
+    return series.mask(series > maximum, maximum)
+
+
+def interpolate_datetime(series, limit_direction="forward"):
+    values = series.to_numpy(dtype="datetime64[ns]")
+    numeric = pd.Series(values.view("int64").astype("float64"), index=series.index)
+    numeric[np.isnat(values)] = np.nan
+    numeric = numeric.interpolate(method="linear", limit_direction=limit_direction)
+    filled = pd.to_datetime(numeric.round(), unit="ns")
+    return filled.astype(series.dtype)
+
+
+# Stages mirror the cleaning and merge cells of the notebook
+def stage_orders(orders_df):
+    orders_df = orders_df.sort_values(by="order_purchase_timestamp", kind="stable")
+    delivered = orders_df["order_delivered_customer_date"]
+    delivered = interpolate_datetime(delivered, "forward")
+    delivered = interpolate_datetime(delivered, "backward")
+    return orders_df.assign(order_delivered_customer_date=delivered)
+
+
+def stage_order_items(order_items_df):
+    return order_items_df.assign(
+        order_item_value=order_items_df["order_item_id"] * order_items_df["price"],
+        order_value=order_items_df["order_item_id"] * order_items_df["price"]
+        + order_items_df["order_item_id"] * order_items_df["freight_value"],
+    )
+
+
+def stage_payments(order_payments_df, maximum=None):
+    order_payments_df = order_payments_df.assign(payment_value=clip_upper_iqr(order_payments_df["payment_value"], maximum))
+    return order_payments_df.groupby(by="order_id", as_index=False).agg({"payment_value": "sum"})
+
+
+def stage_products(products_df, category_name_df):
+    products_df = products_df.assign(product_category_name=products_df["product_category_name"].fillna("-"))
+    products_df = pd.merge(products_df, category_name_df, how="left", on="product_category_name")
+    return products_df.assign(product_category_name_english=products_df["product_category_name_english"].fillna("-"))
+
+
+def stage_merge(order_items_df, orders_df, payment_df, customers_df, sellers_df, products_df, order_reviews_df,
+                review_score_fill=None):
+    all_df = pd.merge(order_items_df, orders_df, how="left", on="order_id")
+
+    delivery_time = (all_df["order_delivered_customer_date"] - all_df["order_purchase_timestamp"]).dt.total_seconds()
+    delivery_time = round(delivery_time / 86400)
+    # The notebook's IQR clip of delivery_time only applied to its local copy,
+    # so the published dataset keeps the unclipped values
+    all_df["delivery_time"] = delivery_time.mask(delivery_time < 0, 0)
+
+    all_df = pd.merge(all_df, payment_df, how="left", on="order_id")
+    all_df = pd.merge(all_df, customers_df, how="left", on="customer_id")
+    all_df = pd.merge(all_df, sellers_df, how="left", on="seller_id")
+    all_df = pd.merge(all_df, products_df, how="left", on="product_id")
+    for column in ["product_category_name", "product_category_name_english"]:
+        all_df[column] = all_df[column].fillna("-")
+
+    all_df = pd.merge(all_df, order_reviews_df, how="left", on="order_id")
+    if review_score_fill is None:
+        review_score_fill = all_df["review_score"].mean().round()
+    all_df["review_score"] = all_df["review_score"].fillna(review_score_fill)
+    return all_df
+
+
+def stage_geolocation(all_df, geolocation_df):
+    all_df = add_geolocation(all_df, geolocation_df.drop_duplicates())
+    missing = all_df["payment_value"].isna()
+    all_df.loc[missing, "payment_value"] = all_df.loc[missing, "order_value"]
+    return all_df
+
+
+def stage_all_df(all_df, distance_cache=None):
+    all_df = apply_schema(add_order_distance(all_df, distance_cache))
+    return all_df.sort_values(by="order_purchase_timestamp", kind="stable", ignore_index=True)
+
+
+# name -> (function, input stages, version); bump the version when a stage changes
+STAGES = {
+    "orders_clean": (stage_orders, ["orders"], 1),
+    "order_items_clean": (stage_order_items, ["order_items"], 1),
+    "payments_clean": (stage_payments, ["order_payments"], 1),
+    "products_clean": (stage_products, ["products", "category_name"], 1),
+    "merged": (stage_merge, ["order_items_clean", "orders_clean", "payments_clean", "customers",
+                             "sellers", "products_clean", "order_reviews"], 1),
+    "geolocated": (stage_geolocation, ["merged", "geolocation"], 1),
+    "all_df": (stage_all_df, ["geolocated"], 1),
+}
+
+
+class Pipeline:
+    def __init__(self, raw_dir, cache_dir=".olist_cache", verbose=False):
+        self.raw_dir = raw_dir
+        self.cache_dir = cache_dir
+        self.verbose = verbose
+        self._keys = {}
+        # name -> (seconds, rows, bytes, cached)
+        self.report = {}
+
+    def key(self, name):
+        if name not in self._keys:
+            if name in RAW_FILES:
+                filename, columns = RAW_FILES[name]
+                parts = [file_sha256(os.path.join(self.raw_dir, filename)), repr(sorted(columns.items()))]
+            else:
+                _, inputs, version = STAGES[name]
+                parts = [str(version)] + [self.key(i) for i in inputs]
+            self._keys[name] = hashlib.sha256("|".join([name] + parts).encode()).hexdigest()[:16]
+        return self._keys[name]
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)}.parquet")
+
+    def _compute(self, name):
+        if name in RAW_FILES:
+            filename, columns = RAW_FILES[name]
+            return read_raw(os.path.join(self.raw_dir, filename), columns)
+        func, inputs, _ = STAGES[name]
+        return func(*(self.load(i) for i in inputs))
+
+    def load(self, name):
+        # Frames are not kept in memory between stages; each stage holds only its inputs
+        start = time.perf_counter()
+        path = self.cache_path(name)
+        cached = os.path.exists(path)
+        if cached:
+            df = pd.read_parquet(path)
+        else:
+            df = self._compute(name)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                df.to_parquet(path + ".part", index=False)
+                os.replace(path + ".part", path)
+            except ImportError:
+                # pyarrow is not installed, keep the stage in memory only
+                pass
+
+        self.report[name] = (time.perf_counter() - start, len(df), int(df.memory_usage(deep=True).sum()), cached)
+        if self.verbose:
+            seconds, rows, nbytes, _ = self.report[name]
+            source = "cache" if cached else "built"
+            print(f"{name:<18} {source:<5} {rows:>9} rows {nbytes / 2**20:8.1f} MB {seconds:7.2f} s")
+        return df
+
+    def run(self, target="all_df"):
+        return self.load(target)
+
+
+def fit_thresholds(pipeline):
+    """Cleaning constants of a full build, reused when appending new batches."""
+    payments = pipeline.load("order_payments")["payment_value"]
+    merged = pipeline.load("merged")
+    return {
+        "payment_value_max": float(iqr_upper_bound(payments)),
+        "review_score_fill": float(merged["review_score"].mean().round()),
+    }
+
+
+def build_all_df(raw_dir, cache_dir=".olist_cache", verbose=False):
+    return Pipeline(raw_dir, cache_dir, verbose).run()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the merged Olist dataset from the raw CSVs")
+    parser.add_argument("raw_dir", help="directory with the nine olist_*.csv files")
+    parser.add_argument("-o", "--output", default="all_data.parquet",
+                        help="Parquet, Feather or CSV file to write")
+    parser.add_argument("--cache-dir", default=".olist_cache")
+    args = parser.parse_args()
+
+    all_df = build_all_df(args.raw_dir, args.cache_dir, verbose=True)
+    if args.output.endswith(".csv"):
+        all_df.to_csv(args.output, index=False)
+    else:
+        write_columnar(all_df, args.output)
+    print(args.output)
@@ -0,0 +1,212 @@
+"""Per-stage timing and memory of one dashboard rerun.
+
+Stages are recorded by the ``stage`` context manager or the ``profiled``
+decorator while a ``StageProfiler`` is active in the current thread
+(Streamlit runs every session's script in its own thread). Without an
+active profiler both are no-ops apart from a thread-local lookup.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_LOG_ENV = "OLIST_PROFILE_LOG"
+
+RECORD_COLUMNS = ["run_id", "started_at", "stage", "depth", "seconds", "rows",
+                  "rss_mb", "rss_delta_mb", "peak_rss_delta_mb", "traced_peak_mb"]
+
+_active = threading.local()
+
+# Profilers tracing memory right now, across threads; tracemalloc is process-wide, so
+# it is only stopped when the last of them deactivates, and only if they started it
+_tracers = 0
+_owns_tracing = False
+_tracers_lock = threading.Lock()
+
+
+def _start_tracing():
+    global _tracers, _owns_tracing
+    with _tracers_lock:
+        if _tracers == 0:
+            _owns_tracing = not tracemalloc.is_tracing()
+            if _owns_tracing:
+                tracemalloc.start()
+        _tracers += 1
+
+
+def _stop_tracing():
+    global _tracers, _owns_tracing
+    with _tracers_lock:
+        _tracers -= 1
+        if _tracers == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+
+def current_rss_mb():
+    """Resident set size now; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def count_rows(value):
+    """Row count of a frame/series/array result, or of the first one in a tuple."""
+    if isinstance(value, tuple):
+        for item in value:
+            rows = count_rows(item)
+            if rows is not None:
+                return rows
+        return None
+    if hasattr(value, "shape") and len(getattr(value, "shape", ())):
+        return int(value.shape[0])
+    return None
+
+
+class StageRecord:
+    """Mutable handle yielded by ``stage`` so the body can set ``rows``."""
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.rows = None
+
+
+class StageProfiler:
+    def __init__(self, trace_memory=False):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = pd.Timestamp.now(tz="UTC").isoformat()
+        self.trace_memory = trace_memory
+        self.records = []
+        self._depth = 0
+        # Highest traced memory seen so far by each open stage, innermost last
+        self._traced_peaks = []
+        self._tracing = False
+
+    def activate(self):
+        """Make this profiler the target of ``stage``/``profiled`` in this thread."""
+        _active.profiler = self
+        if self.trace_memory and not self._tracing:
+            _start_tracing()
+            self._tracing = True
+        return self
+
+    def deactivate(self):
+        if getattr(_active, "profiler", None) is self:
+            _active.profiler = None
+        if self._tracing:
+            _stop_tracing()
+            self._tracing = False
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, *exc_info):
+        self.deactivate()
+        return False
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = StageRecord(name, self._depth)
+        record.rows = rows
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            traced_before, traced_peak = tracemalloc.get_traced_memory()
+            # reset_peak is global, so the enclosing stage keeps what it has seen so far
+            if self._traced_peaks:
+                self._traced_peaks[-1] = max(self._traced_peaks[-1], traced_peak)
+            tracemalloc.reset_peak()
+            self._traced_peaks.append(traced_before)
+        rss_before = current_rss_mb()
+        peak_before = peak_rss_mb()
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            self._depth -= 1
+            traced_peak_mb = None
+            if tracing:
+                traced_peak = max(self._traced_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._traced_peaks:
+                    self._traced_peaks[-1] = max(self._traced_peaks[-1], traced_peak)
+                traced_peak_mb = (traced_peak - traced_before) / 2**20
+            rss_after = current_rss_mb()
+            self.records.append({
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "stage": name,
+                "depth": record.depth,
+                "seconds": seconds,
+                "rows": record.rows,
+                "rss_mb": rss_after,
+                "rss_delta_mb": rss_after - rss_before,
+                "peak_rss_delta_mb": peak_rss_mb() - peak_before,
+                "traced_peak_mb": traced_peak_mb,
+            })
+
+    def frame(self):
+        return pd.DataFrame(self.records, columns=RECORD_COLUMNS)
+
+    def to_jsonl(self):
+        return "".join(json.dumps(record) + "\n" for record in self.records)
+
+    def append_jsonl(self, path):
+        """Append this run's records to ``path``, one JSON object per line."""
+        with open(path, "a", encoding="utf-8") as log:
+            log.write(self.to_jsonl())
+
+
+def active_profiler():
+    return getattr(_active, "profiler", None)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Time the block under the active profiler; yields a record whose ``rows`` may be set."""
+    profiler = active_profiler()
+    if profiler is None:
+        yield StageRecord(name, 0)
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
+
+
+def profiled(name=None):
+    """Decorator recording each call as a stage, with the row count of its result."""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_profiler() is None:
+                return func(*args, **kwargs)
+            with stage(label) as record:
+                result = func(*args, **kwargs)
+                record.rows = count_rows(result)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,131 @@
+"""Vectorized RFM (recency, frequency, monetary) per ``customer_unique_id``.
+
+The per-customer state (last purchase, order count, revenue) is mergeable,
+so new orders can be folded in with ``merge_states`` without regrouping the
+full history; recency, scores and segments are derived from the merged state.
+"""
+import numpy as np
+import pandas as pd
+
+# Revenue is kept in integer cents so merged states add up exactly, in any order
+STATE_COLUMNS = ["last_purchase", "frequency", "monetary_cents"]
+
+# (segment, condition on R score and the mean of F and M scores), first match wins
+SEGMENTS = [
+    ("Champions", lambda r, fm: (r >= 4) & (fm >= 4)),
+    ("Loyal Customers", lambda r, fm: (r >= 3) & (fm >= 3)),
+    ("New Customers", lambda r, fm: (r >= 4) & (fm < 2)),
+    ("Potential Loyalists", lambda r, fm: r >= 3),
+    ("At Risk", lambda r, fm: fm >= 3),
+    ("Hibernating", lambda r, fm: r == 2),
+]
+DEFAULT_SEGMENT = "Lost"
+SEGMENT_ORDER = [name for name, _ in SEGMENTS] + [DEFAULT_SEGMENT]
+
+
+def rfm_state(df, customer_column="customer_unique_id"):
+    """Last purchase, distinct orders and revenue per customer, indexed by customer.
+
+    An order belongs to a single customer, so the order count is a bincount of
+    each distinct order's customer rather than a grouped nunique.
+    """
+    customer_codes, customers = pd.factorize(df[customer_column])
+    order_codes, orders = pd.factorize(df["order_id"])
+    timestamps = df["order_purchase_timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    last_purchase = np.full(len(customers), np.iinfo(np.int64).min)
+    np.maximum.at(last_purchase, customer_codes, timestamps)
+
+    order_customer = np.empty(len(orders), dtype=np.intp)
+    order_customer[order_codes] = customer_codes
+    frequency = np.bincount(order_customer, minlength=len(customers))
+
+    cents = np.rint(df["order_item_value"].to_numpy(dtype=np.float64) * 100)
+    monetary_cents = np.bincount(customer_codes, weights=cents, minlength=len(customers)).astype(np.int64)
+
+    return pd.DataFrame({
+        "last_purchase": last_purchase.view("datetime64[ns]"),
+        "frequency": frequency,
+        "monetary_cents": monetary_cents,
+    }, index=pd.Index(customers, name="customer_id"))
+
+
+def _empty_state():
+    return pd.DataFrame({
+        "last_purchase": pd.Series(dtype="datetime64[ns]"),
+        "frequency": pd.Series(dtype=np.int64),
+        "monetary_cents": pd.Series(dtype=np.int64),
+    }, index=pd.Index([], name="customer_id"))
+
+
+def merge_states(states):
+    """Combine states of disjoint order sets (e.g. an old snapshot and a new batch).
+
+    Customers keep the order in which they first appear across ``states``.
+    """
+    states = [s for s in states if len(s)]
+    if not states:
+        return _empty_state()
+    if len(states) == 1:
+        return states[0]
+    return pd.concat(states).groupby(level=0, sort=False).agg({
+        "last_purchase": "max",
+        "frequency": "sum",
+        "monetary_cents": "sum",
+    })
+
+
+def rfm_from_state(state, as_of=None):
+    """Same columns as create_rfm_df: customer_id, frequency, monetary, recency (days)."""
+    last_day = state["last_purchase"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    if as_of is not None:
+        as_of = np.datetime64(pd.Timestamp(as_of), "D")
+    elif len(last_day):
+        as_of = last_day.max()
+    else:
+        # No orders under the filter: an empty table rather than an error
+        as_of = np.datetime64("NaT", "D")
+    return pd.DataFrame({
+        "customer_id": state.index.to_numpy(),
+        "frequency": state["frequency"].to_numpy(),
+        "monetary": state["monetary_cents"].to_numpy() / 100,
+        "recency": (as_of - last_day).astype(np.int64),
+    })
+
+
+def quantile_scores(values, bins=5):
+    """1..bins by average-rank percentile; tied values share a score."""
+    values = np.asarray(values)
+    if not len(values):
+        return np.empty(0, dtype=np.int8)
+    unique, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    first_rank = np.cumsum(counts) - counts
+    average_rank = first_rank + (counts + 1) / 2
+    scores = np.clip(np.ceil(average_rank / len(values) * bins), 1, bins).astype(np.int8)
+    return scores[inverse.reshape(-1)]
+
+
+def score_rfm(rfm_df, bins=5):
+    """Add R/F/M quintile scores and a named segment to an RFM table."""
+    r = (bins + 1 - quantile_scores(rfm_df["recency"], bins)).astype(np.int8)
+    f = quantile_scores(rfm_df["frequency"], bins)
+    m = quantile_scores(rfm_df["monetary"], bins)
+    fm = (f.astype(np.float32) + m) / 2
+
+    segment = np.select([cond(r, fm) for _, cond in SEGMENTS], [name for name, _ in SEGMENTS],
+                        default=DEFAULT_SEGMENT)
+    return rfm_df.assign(
+        r_score=r, f_score=f, m_score=m,
+        segment=pd.Categorical(segment, categories=SEGMENT_ORDER),
+    )
+
+
+def segment_summary(scored_rfm_df):
+    summary = scored_rfm_df.groupby("segment", observed=False).agg(
+        customers=("customer_id", "size"),
+        revenue=("monetary", "sum"),
+        avg_recency=("recency", "mean"),
+        avg_frequency=("frequency", "mean"),
+    )
+    summary["revenue_share"] = summary["revenue"] / max(summary["revenue"].sum(), 1e-9)
+    return summary.reset_index()
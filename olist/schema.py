@@ -0,0 +1,78 @@
+# Typed schema of the merged all_df produced by the notebook
+SCHEMA = {
+    "order_id": "object",
+    "order_item_id": "int64",
+    "product_id": "object",
+    "seller_id": "object",
+    "price": "float64",
+    "freight_value": "float64",
+    "order_item_value": "float64",
+    "order_value": "float64",
+    "customer_id": "object",
+    "order_status": "category",
+    "order_purchase_timestamp": "datetime64[ns]",
+    "order_delivered_customer_date": "datetime64[ns]",
+    "delivery_time": "float64",
+    "payment_value": "float64",
+    "customer_unique_id": "object",
+    "customer_zip_code_prefix": "int64",
+    "customer_city": "category",
+    "customer_state": "category",
+    "seller_zip_code_prefix": "int64",
+    "seller_city": "category",
+    "seller_state": "category",
+    "product_category_name": "category",
+    "product_category_name_english": "category",
+    "review_score": "float64",
+    "customer_geolocation_lat": "float64",
+    "customer_geolocation_lng": "float64",
+    "seller_geolocation_lat": "float64",
+    "seller_geolocation_lng": "float64",
+    # Materialized by olist.etl.add_order_distance
+    "order_distance": "float64",
+}
+
+DATETIME_COLUMNS = [c for c, t in SCHEMA.items() if t.startswith("datetime")]
+CATEGORY_COLUMNS = [c for c, t in SCHEMA.items() if t == "category"]
+
+SORT_COLUMN = "order_purchase_timestamp"
+
+# Columns read by the sidebar filters and by each dashboard tab
+FILTER_COLUMNS = ["order_purchase_timestamp", "customer_state", "customer_city"]
+TAB_COLUMNS = {
+    "orders": ["order_id", "order_item_value", "delivery_time"],
+    "products": ["product_category_name_english", "order_item_id"],
+    "score": ["product_category_name_english", "review_score"],
+    "demographics": ["order_id", "product_category_name_english", "customer_id", "seller_id",
+                     "order_distance"],
+    "rfm": ["customer_unique_id", "order_id", "order_item_value"],
+    "sellers": ["seller_id", "seller_state", "seller_city", "order_id", "order_item_value", "review_score",
+                "delivery_time", "order_distance"],
+    "map": ["customer_geolocation_lat", "customer_geolocation_lng", "seller_geolocation_lat",
+            "seller_geolocation_lng", "order_id", "order_item_value"],
+}
+
+
+def columns_for(*tabs):
+    columns = list(FILTER_COLUMNS)
+    for tab in tabs:
+        for column in TAB_COLUMNS[tab]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+DASHBOARD_COLUMNS = columns_for(*TAB_COLUMNS)
+
+
+def apply_schema(df):
+    """Cast the known columns of ``df`` to their SCHEMA dtype."""
+    dtypes = {}
+    for column, dtype in SCHEMA.items():
+        if column not in df.columns or dtype == "object":
+            continue
+        if dtype.startswith("datetime") and str(df[column].dtype).startswith("datetime"):
+            continue
+        if str(df[column].dtype) != dtype:
+            dtypes[column] = dtype
+    return df.astype(dtypes) if dtypes else df
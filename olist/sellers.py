@@ -0,0 +1,204 @@
+"""Per-seller revenue, volume, review score, delivery time and distance.
+
+Sums and counts are pre-aggregated per month x customer state x seller, and
+delivery_time / order_distance as fixed-bin counts at the same grain (see
+``olist.sketches``). A day grain would keep nearly one cell per row, since
+most sellers sell a few items a day; per month it is well under half of them.
+A date/state filter merges the cells of the months it fully covers and adds
+the rows of the partial months at either end, which are contiguous in the
+timestamp-sorted all_df. The cells have no city, so a city filter aggregates
+its rows the same way.
+
+An order has one purchase month and customer state, so distinct orders per
+seller add up exactly across cells and edge rows. Percentiles are read from
+the merged bin counts like ``Sketch.quantile``: exact for delivery_time
+(whole days), within one width for order_distance.
+
+The result is indexed and sorted by seller, so a lookup is a binary search on
+the index and a top-k query an argpartition (``olist.topk``).
+"""
+import numpy as np
+import pandas as pd
+
+from olist.cube import slice_cells
+from olist.sketches import SKETCH_WIDTHS, bin_codes
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9}
+SUM_COLUMNS = ["orders", "items", "revenue", "review_sum", "review_count"]
+LOCATION_COLUMNS = ["seller_state", "seller_city"]
+
+SELLER_COLUMNS = ["orders", "items", "revenue", "review_score"] + [
+    f"{column}_{name}" for column in SKETCH_WIDTHS for name in PERCENTILES]
+
+
+def _month(df):
+    months = df["order_purchase_timestamp"].to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+    return pd.Series(months, index=df.index, name="month")
+
+
+def build_seller_cells(df, seller_codes, keys):
+    """Orders, items, revenue and review score sum/count per ``keys`` x seller."""
+    seller = pd.Series(seller_codes, index=df.index, name="seller")
+    cells = df.groupby(keys + [seller], observed=True).agg(
+        orders=("order_id", "nunique"),
+        items=("order_id", "size"),
+        revenue=("order_item_value", "sum"),
+        review_sum=("review_score", "sum"),
+        review_count=("review_score", "count"),
+    )
+    return cells.reset_index()
+
+
+def build_seller_bins(df, seller_codes, column, width, keys):
+    """Row counts per ``keys`` x seller x bin of ``column``."""
+    values = df[column].to_numpy(dtype=np.float64)
+    keep = ~np.isnan(values)
+    rows = df[keep]
+    seller = pd.Series(seller_codes[keep], index=rows.index, name="seller")
+    bins = pd.Series(bin_codes(values[keep], width), index=rows.index, name="bin")
+    keys = [key[keep] for key in keys]
+    return rows.groupby(keys + [seller, bins], observed=True).size().rename("count").reset_index()
+
+
+def row_cells(df, seller_codes):
+    """The rows of ``df`` as seller cells: one item each, the first row of each (seller, order) one order."""
+    order_codes, orders = pd.factorize(df["order_id"])
+    pairs = seller_codes.astype(np.int64) * max(len(orders), 1) + order_codes
+    first = np.zeros(len(pairs), dtype=np.int64)
+    first[np.unique(pairs, return_index=True)[1]] = 1
+    scores = df["review_score"].to_numpy(dtype=np.float64)
+    rated = ~np.isnan(scores)
+    return pd.DataFrame({
+        "seller": seller_codes,
+        "orders": first,
+        "items": np.ones(len(pairs), dtype=np.int64),
+        "revenue": df["order_item_value"].to_numpy(dtype=np.float64),
+        "review_sum": np.where(rated, scores, 0),
+        "review_count": rated.astype(np.int64),
+    })
+
+
+def row_bins(df, seller_codes, column, width):
+    """The rows of ``df`` with a ``column`` value as (seller, bin, count=1) entries."""
+    values = df[column].to_numpy(dtype=np.float64)
+    keep = ~np.isnan(values)
+    return pd.DataFrame({"seller": seller_codes[keep], "bin": bin_codes(values[keep], width),
+                         "count": np.ones(int(keep.sum()), dtype=np.int64)})
+
+
+def grouped_quantiles(groups, bins, counts, q, width):
+    """Quantile ``q`` per group from bin counts sorted by (group, bin), like ``Sketch.quantile``."""
+    if not len(groups):
+        return groups, np.empty(0)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    cumulative = np.cumsum(counts)
+    before = np.r_[0, cumulative[starts[1:] - 1]]
+    totals = np.add.reduceat(counts, starts)
+    position = (totals - 1) * q
+    lo, hi = np.floor(position).astype(np.int64), np.ceil(position).astype(np.int64)
+    values = bins * width
+    lo_value = values[cumulative.searchsorted(before + lo, side="right")]
+    hi_value = values[cumulative.searchsorted(before + hi, side="right")]
+    return groups[starts], lo_value + (position - lo) * (hi_value - lo_value)
+
+
+def merge_seller_cells(cells, bins, n_sellers):
+    """SELLER_COLUMNS per seller code, from lists of cell frames and of bin frames per column."""
+    seller = np.concatenate([part["seller"].to_numpy() for part in cells])
+    sums = {column: np.bincount(seller, minlength=n_sellers,
+                                weights=np.concatenate([part[column].to_numpy(dtype=np.float64) for part in cells]))
+            for column in SUM_COLUMNS}
+    active = np.flatnonzero(sums["items"])
+    table = pd.DataFrame({
+        "orders": sums["orders"][active].astype(np.int64),
+        "items": sums["items"][active].astype(np.int64),
+        "revenue": sums["revenue"][active],
+    }, index=pd.Index(active))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table["review_score"] = sums["review_sum"][active] / sums["review_count"][active]
+
+    for column, width in SKETCH_WIDTHS.items():
+        sellers, codes, counts = (np.concatenate([part[name].to_numpy() for part in bins[column]])
+                                  for name in ["seller", "bin", "count"])
+        # Sum the counts of equal (seller, bin) pairs, sorted by seller then bin
+        low, span = codes.min(initial=0), codes.max(initial=0) - codes.min(initial=0) + 1
+        keys, inverse = np.unique(sellers.astype(np.int64) * span + (codes - low), return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1), weights=counts, minlength=len(keys)).astype(np.int64)
+        sellers, codes = np.divmod(keys, span)
+        codes += low
+        for name, q in PERCENTILES.items():
+            groups, values = grouped_quantiles(sellers, codes, counts, q, width)
+            table[f"{column}_{name}"] = pd.Series(values, index=groups)
+    return table
+
+
+def seller_locations(df, seller_codes, n_sellers):
+    # Where each seller ships from is constant per seller, so any of its rows will do
+    some_row = np.empty(n_sellers, dtype=np.intp)
+    some_row[seller_codes] = np.arange(len(seller_codes))
+    return pd.DataFrame({column: df[column].take(some_row).array for column in LOCATION_COLUMNS})
+
+
+def _label(table, sellers, locations):
+    for column in LOCATION_COLUMNS:
+        table[column] = locations[column].take(table.index).array
+    table.index = pd.Index(sellers.take(table.index), name="seller_id")
+    return table
+
+
+def seller_table(df):
+    """SELLER_COLUMNS, seller_state and seller_city per seller of ``df``, indexed (and sorted) by seller_id."""
+    seller_codes, sellers = pd.factorize(df["seller_id"], sort=True)
+    table = merge_seller_cells(
+        [row_cells(df, seller_codes)],
+        {column: [row_bins(df, seller_codes, column, width)] for column, width in SKETCH_WIDTHS.items()},
+        len(sellers))
+    return _label(table, sellers, seller_locations(df, seller_codes, len(sellers)))
+
+
+class SellerCube:
+    def __init__(self, all_df):
+        self.all_df = all_df
+        self.times = all_df["order_purchase_timestamp"].to_numpy()
+        # Dense seller codes, so merging cells per seller is a bincount
+        self.seller_codes, self.sellers = pd.factorize(all_df["seller_id"], sort=True)
+        keys = [_month(all_df), all_df["customer_state"]]
+        self.cells = build_seller_cells(all_df, self.seller_codes, keys)
+        self.bins = {column: build_seller_bins(all_df, self.seller_codes, column, width, keys)
+                     for column, width in SKETCH_WIDTHS.items()}
+        self.locations = seller_locations(all_df, self.seller_codes, len(self.sellers))
+
+    def __len__(self):
+        return len(self.cells) + sum(len(table) for table in self.bins.values())
+
+    def _rows(self, start, end, states):
+        """Rows in ``[start, end)`` and ``states``, with their seller codes."""
+        lo = self.times.searchsorted(np.datetime64(start), side="left")
+        hi = self.times.searchsorted(np.datetime64(end), side="left")
+        rows, codes = self.all_df.iloc[lo:hi], self.seller_codes[lo:hi]
+        if states is not None:
+            mask = rows["customer_state"].isin(states).to_numpy()
+            rows, codes = rows[mask], codes[mask]
+        return rows, codes
+
+    def table(self, start=None, end=None, states=None):
+        """Same frame as ``seller_table`` on the rows whose day is in ``[start, end]`` and ``states``."""
+        start = pd.Timestamp(self.times[0] if start is None else start).floor("D")
+        # Exclusive end, at day precision like the other cubes
+        end = pd.Timestamp(self.times[-1] if end is None else end).floor("D") + pd.Timedelta(days=1)
+        first = start if start.day == 1 else start + pd.offsets.MonthBegin(1)
+        last = end if end.day == 1 else end - pd.offsets.MonthBegin(1)
+
+        # Months fully inside the range; an empty slice when there are none
+        cells = [slice_cells(self.cells, first, last - pd.Timedelta(days=1), states, time_column="month")]
+        bins = {column: [slice_cells(self.bins[column], first, last - pd.Timedelta(days=1), states,
+                                     time_column="month")] for column in SKETCH_WIDTHS}
+        edges = [(start, first), (last, end)] if first < last else [(start, end)]
+        # Rows of the partial months at either end
+        for lo, hi in edges:
+            if lo < hi:
+                rows, codes = self._rows(lo, hi, states)
+                cells.append(row_cells(rows, codes))
+                for column, width in SKETCH_WIDTHS.items():
+                    bins[column].append(row_bins(rows, codes, column, width))
+        return _label(merge_seller_cells(cells, bins, len(self.sellers)), self.sellers, self.locations)
@@ -0,0 +1,261 @@
+"""Filtered aggregates of one dataset version, shared by the dashboard and the HTTP API.
+
+An ``Analytics`` holds the memory-mapped all_df, its filter index, the daily
+rollup cube, the histogram, distinct-count, seller and spatial tables and the
+aggregate memo, so every consumer in a process answers the same filter from
+the same cache.
+"""
+import threading
+
+import pandas as pd
+
+from olist import aggregates, parallel
+from olist.cube import PERIODS, RollupCube
+from olist.filters import FilterIndex
+from olist.compact import decode_ids
+from olist.hll import DistinctCube
+from olist.memo import AggregateMemo, filter_key
+from olist.profiling import stage
+from olist.rfm import segment_summary
+from olist.schema import DASHBOARD_COLUMNS
+from olist.sellers import SELLER_COLUMNS, SellerCube
+from olist.shared import load_shared
+from olist.sketches import SKETCH_WIDTHS, Sketch, SketchCube
+from olist.spatial import LOCATIONS, SpatialIndex, density_from_rows
+from olist.topk import top_k
+
+
+class Filter:
+    """Sidebar filters with defaults applied: inclusive day range, optional states/cities."""
+
+    def __init__(self, start, end, states=(), cities=()):
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize()
+        self.states = list(states)
+        self.cities = list(cities)
+        self.key = filter_key(self.start, self.end, self.states, self.cities)
+
+
+class Analytics:
+    def __init__(self, path, sha256, columns=DASHBOARD_COLUMNS, memo_size=128, engine=None):
+        self.path = path
+        self.sha256 = sha256
+        # Every engine gives identical results, so the memo is shared regardless
+        self.engine = engine or parallel.default_engine()
+        with stage("load all_df") as record:
+            self.all_df, self.id_lookups, self.memory_report = load_shared(path, sha256, columns)
+            record.rows = len(self.all_df)
+        self.memo = AggregateMemo(maxsize=memo_size)
+        self._lock = threading.Lock()
+        self._filter_index = None
+        self._rollup_cube = None
+        self._sketch_cube = None
+        self._distinct_cube = None
+        self._seller_cube = None
+        self._spatial_index = None
+
+        timestamps = self.all_df["order_purchase_timestamp"]
+        self.min_date = timestamps.min()
+        self.max_date = timestamps.max()
+
+    @property
+    def filter_index(self):
+        with self._lock:
+            if self._filter_index is None:
+                with stage("filter index"):
+                    self._filter_index = FilterIndex(self.all_df)
+            return self._filter_index
+
+    @property
+    def rollup_cube(self):
+        with self._lock:
+            if self._rollup_cube is None:
+                with stage("rollup cube") as record:
+                    self._rollup_cube = RollupCube(self.all_df, self.engine)
+                    record.rows = len(self._rollup_cube)
+            return self._rollup_cube
+
+    @property
+    def sketch_cube(self):
+        with self._lock:
+            if self._sketch_cube is None:
+                with stage("sketch cube") as record:
+                    self._sketch_cube = SketchCube(self.all_df)
+                    record.rows = len(self._sketch_cube)
+            return self._sketch_cube
+
+    @property
+    def distinct_cube(self):
+        with self._lock:
+            if self._distinct_cube is None:
+                with stage("distinct cube") as record:
+                    self._distinct_cube = DistinctCube(self.all_df)
+                    record.rows = len(self._distinct_cube)
+            return self._distinct_cube
+
+    @property
+    def seller_cube(self):
+        with self._lock:
+            if self._seller_cube is None:
+                with stage("seller cube") as record:
+                    self._seller_cube = SellerCube(self.all_df)
+                    record.rows = len(self._seller_cube)
+            return self._seller_cube
+
+    @property
+    def spatial_index(self):
+        with self._lock:
+            if self._spatial_index is None:
+                with stage("build spatial index") as record:
+                    self._spatial_index = SpatialIndex(self.all_df)
+                    record.rows = len(self._spatial_index)
+            return self._spatial_index
+
+    def make_filter(self, start=None, end=None, states=(), cities=()):
+        return Filter(self.min_date if start is None else start,
+                      self.max_date if end is None else end, states, cities)
+
+    def is_unfiltered(self, flt):
+        return flt.key == filter_key(self.min_date, self.max_date)
+
+    def main_df(self, flt):
+        # End date is inclusive at day precision, same as the rollup cube
+        return self.filter_index.filter(flt.start, flt.end + pd.Timedelta(days=1), flt.states, flt.cities)
+
+    def view(self, flt):
+        """Memoized aggregates of ``flt``; main_df is only filtered on a miss."""
+        return self.memo.bind(flt.key, lambda: self.main_df(flt))
+
+    def cube_cells(self, flt):
+        return self.memo.get("cube_cells", flt.key, lambda: self.rollup_cube.slice(
+            flt.start, flt.end, flt.states or None, flt.cities or None))
+
+    def sketch(self, column, flt):
+        """Histogram sketch of ``column`` under ``flt``, merged from the day x state cells."""
+        def build():
+            if flt.cities:
+                return Sketch.from_values(self.main_df(flt)[column], SKETCH_WIDTHS[column])
+            return self.sketch_cube.sketch(column, flt.start, flt.end, flt.states or None)
+        return self.memo.get(f"sketch:{column}", flt.key, build)
+
+    def seller_table(self, flt):
+        """Per-seller aggregates under ``flt``, indexed by (encoded) seller_id, merged from the seller cells."""
+        def build():
+            if flt.cities:
+                # The seller cells have no city; aggregate the filtered rows
+                return aggregates.create_seller_df(self.main_df(flt))
+            return self.seller_cube.table(flt.start, flt.end, flt.states or None)
+        return self.memo.get("seller_table", flt.key, build)
+
+    def decode(self, column, codes):
+        """Original ids of an encoded id column; other columns are returned as they are."""
+        lookup = self.id_lookups.get(column)
+        return codes if lookup is None else decode_ids(codes, lookup)
+
+    def aggregate(self, name, flt, **params):
+        """One of ``AGGREGATES`` for ``flt``, memoized per name, parameters and filter."""
+        build, _ = AGGREGATES[name]
+        memo_name, params = aggregate_params(name, **params)
+        return self.memo.get(memo_name, flt.key, lambda: build(self, flt, **params))
+
+
+def _daily_orders(analytics, flt):
+    return analytics.rollup_cube.daily_orders(analytics.cube_cells(flt))
+
+
+def _orders_by_state(analytics, flt, period):
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    grouped_data = analytics.rollup_cube.orders_by_state(analytics.cube_cells(flt), period)
+    return grouped_data.rename_axis(index="period", columns=None).reset_index()
+
+
+def _from_rows(create):
+    def build(analytics, flt):
+        return analytics.view(flt).get(create.__name__, create)
+    return build
+
+
+def _histogram(column):
+    def build(analytics, flt, bins):
+        return analytics.sketch(column, flt).histogram(int(bins))
+    return build
+
+
+def _outlier_bounds(analytics, flt, column):
+    if column not in SKETCH_WIDTHS:
+        raise ValueError(f"column must be one of {', '.join(SKETCH_WIDTHS)}")
+    return pd.DataFrame([{"column": column, **analytics.sketch(column, flt).summary()}])
+
+
+def _distinct_counts(analytics, flt, mode):
+    if mode == "exact":
+        return analytics.view(flt).get("create_distinct_counts_df", aggregates.create_distinct_counts_df)
+    if mode == "approx":
+        return analytics.distinct_cube.distinct_counts(flt.start, flt.end, flt.states or None, flt.cities or None)
+    raise ValueError("mode must be exact or approx")
+
+
+def _top_sellers(analytics, flt, column, k):
+    if column not in SELLER_COLUMNS:
+        raise ValueError(f"column must be one of {', '.join(SELLER_COLUMNS)}")
+    top_df = top_k(analytics.seller_table(flt).reset_index(), column, int(k))
+    return top_df.assign(seller_id=analytics.decode("seller_id", top_df["seller_id"]).astype(str),
+                         seller_state=top_df["seller_state"].astype(str),
+                         seller_city=top_df["seller_city"].astype(str))
+
+
+def _location(column):
+    if column not in LOCATIONS:
+        raise ValueError(f"column must be one of {', '.join(LOCATIONS)}")
+    return column
+
+
+def _density(analytics, flt, column):
+    if flt.cities:
+        # The density cells have no city; count the filtered rows
+        return density_from_rows(analytics.main_df(flt), _location(column))
+    return analytics.spatial_index.density(_location(column), flt.start, flt.end, flt.states or None)
+
+
+def _nearby(analytics, flt, column, lat, lng, radius_km):
+    lat, lng, radius_km = float(lat), float(lng), float(radius_km)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+        raise ValueError("lat must be in [-90, 90], lng in [-180, 180] and radius_km positive")
+    rows, candidates = analytics.spatial_index.within(_location(column), lat, lng, radius_km, flt.start, flt.end,
+                                                      flt.states or None, flt.cities or None)
+    return pd.DataFrame([{"column": column, "lat": lat, "lng": lng, "radius_km": radius_km,
+                          "orders": rows["order_id"].nunique(), "items": len(rows),
+                          "revenue": float(rows["order_item_value"].sum()), "candidates": candidates}])
+
+
+def _rfm_segments(analytics, flt):
+    rfm_df = analytics.view(flt).get("rfm", lambda df: aggregates.create_rfm_df(df, analytics.engine))
+    return segment_summary(rfm_df).astype({"segment": str})
+
+
+# name -> (build(analytics, filter, **params), default params)
+AGGREGATES = {
+    "daily_orders": (_daily_orders, {}),
+    "orders_by_state": (_orders_by_state, {"period": "Monthly"}),
+    "category_sales": (_from_rows(aggregates.create_sum_order_items_df), {}),
+    "review_scores": (_from_rows(aggregates.create_mean_product_score_df), {}),
+    "state_counts": (_from_rows(aggregates.create_bystate_df), {}),
+    "distinct_counts": (_distinct_counts, {"mode": "exact"}),
+    "distance_histogram": (_histogram("order_distance"), {"bins": 10}),
+    "delivery_time_histogram": (_histogram("delivery_time"), {"bins": 20}),
+    "outlier_bounds": (_outlier_bounds, {"column": "delivery_time"}),
+    "rfm_segments": (_rfm_segments, {}),
+    "cohorts": (_from_rows(aggregates.create_cohort_df), {}),
+    "top_sellers": (_top_sellers, {"column": "revenue", "k": 10}),
+    "density": (_density, {"column": "customer"}),
+    # Centre of Sao Paulo by default
+    "nearby": (_nearby, {"column": "customer", "lat": -23.55, "lng": -46.63, "radius_km": 10}),
+}
+
+
+def aggregate_params(name, **params):
+    """Memo name and parameters of aggregate ``name``: its defaults, overridden by the given ones it accepts."""
+    _, defaults = AGGREGATES[name]
+    params = {**defaults, **{k: v for k, v in params.items() if k in defaults and v is not None}}
+    return name + "".join(f"|{k}={params[k]}" for k in sorted(params)), params
@@ -0,0 +1,129 @@
+"""Compacted all_df as a memory-mapped Arrow IPC file, shared zero-copy.
+
+The artifact is an uncompressed Arrow file written once per dataset version
+and column set. Opening it maps the file instead of reading it: numeric and
+datetime columns become read-only numpy views over the mapping, so every
+session of a process shares one copy, and worker processes on the same host
+share the same page-cache pages. Date-only filters are ``iloc`` slices of
+those views and copy nothing.
+
+    python -m olist.shared path/to/downloaded_file.csv
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from olist.compact import compact_frame, memory_report
+from olist.loader import ARTIFACT_VERSION, ensure_columnar, prune_artifacts, read_all_df
+
+DATA_FILE = "all_df.arrow"
+REPORT_FILE = "memory_report.json"
+LOOKUP_PREFIX = "lookup."
+
+
+def shared_path(path, sha256, columns=None):
+    """Artifact directory for one dataset version and column set, next to ``path``."""
+    root, _ = os.path.splitext(path.rstrip(os.sep))
+    tag = hashlib.sha256(json.dumps(columns).encode()).hexdigest()[:8]
+    return f"{root}.{sha256[:16]}.v{ARTIFACT_VERSION}.{tag}.shared"
+
+
+def _to_arrow(df):
+    import pyarrow as pa
+
+    arrays = []
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, np.dtype):
+            # From numpy directly: NaN stays a value instead of becoming a null,
+            # so the column maps back without a validity bitmap or a copy
+            arrays.append(pa.array(series.to_numpy()))
+        else:
+            arrays.append(pa.array(series))
+    return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+
+def _write_table(table, path):
+    import pyarrow as pa
+
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_table(path):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def build_shared(path, sha256, columns=None, output=None):
+    """Read, compact and write the mapped artifact of ``path``; returns its directory."""
+    import pyarrow as pa
+
+    output = output or shared_path(path, sha256, columns)
+    raw_df = read_all_df(ensure_columnar(path, sha256), columns=columns)
+    all_df, lookups = compact_frame(raw_df)
+
+    # Per-process temp dir: several workers may build the same artifact at once
+    tmp = f"{output}.{os.getpid()}.part"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    _write_table(_to_arrow(all_df), os.path.join(tmp, DATA_FILE))
+    for column, lookup in lookups.items():
+        _write_table(pa.table({column: pa.array(lookup)}), os.path.join(tmp, f"{LOOKUP_PREFIX}{column}.arrow"))
+    memory_report(raw_df, all_df).to_json(os.path.join(tmp, REPORT_FILE), orient="records")
+
+    try:
+        os.replace(tmp, output)
+    except OSError:
+        if not os.path.isdir(output):
+            raise
+        # Another process finished first; its artifact has the same content
+        shutil.rmtree(tmp, ignore_errors=True)
+    return output
+
+
+def open_shared(directory):
+    """``(all_df, lookups, memory_report)`` mapped from a ``build_shared`` directory."""
+    all_df = _read_table(os.path.join(directory, DATA_FILE)).to_pandas(split_blocks=True)
+    lookups = {}
+    for name in sorted(os.listdir(directory)):
+        if name.startswith(LOOKUP_PREFIX):
+            column = name[len(LOOKUP_PREFIX):-len(".arrow")]
+            lookups[column] = pd.Index(_read_table(os.path.join(directory, name)).column(0).to_pandas(),
+                                       name=column)
+    report = pd.read_json(os.path.join(directory, REPORT_FILE), orient="records")
+    return all_df, lookups, report
+
+
+def load_shared(path, sha256, columns=None):
+    """Mapped, compacted all_df of ``path``; built on first use, in memory if pyarrow is missing."""
+    try:
+        directory = shared_path(path, sha256, columns)
+        if not os.path.isdir(directory):
+            build_shared(path, sha256, columns, directory)
+            # An appended store or a replaced CSV leaves the previous version's artifacts behind
+            prune_artifacts(path, sha256, ".shared")
+        return open_shared(directory)
+    except ImportError:
+        raw_df = read_all_df(ensure_columnar(path, sha256), columns=columns)
+        all_df, lookups = compact_frame(raw_df)
+        return all_df, lookups, memory_report(raw_df, all_df)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from olist.loader import fetch_dataset
+    from olist.schema import DASHBOARD_COLUMNS
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped artifact the dashboard shares")
+    parser.add_argument("path", help="merged CSV, Parquet/Feather file or partitioned store")
+    args = parser.parse_args()
+
+    path, sha256 = fetch_dataset(local_path=args.path)
+    print(build_shared(path, sha256, DASHBOARD_COLUMNS))
@@ -0,0 +1,134 @@
+"""Mergeable histogram sketches of delivery_time and order_distance per day x state.
+
+A value ``v`` is counted in bin ``floor(v / width)``. The sketch of a set of
+rows is the count per bin, so the sketch of any filter is the sum of its
+cells' counts: merging is exact and does not depend on the order. Anything
+read from a sketch treats each value as the lower edge of its bin, so
+
+- counts and ranks are exact;
+- quantiles and histogram bin assignment are off by less than one ``width``
+  (in the column's unit) from the same figures computed on the rows;
+- the IQR outlier bounds ``Q3 + k * IQR`` / ``Q1 - k * IQR`` combine the
+  errors of two quantiles, so they are off by less than ``(1 + k) * width``
+  (2.5 widths for the usual k = 1.5).
+
+delivery_time holds whole days, so with a width of one day its histograms and
+quantiles equal the ones from the rows. order_distance (km, 2 decimals) is
+kept at 1 km (outlier bounds within 2.5 km). The cells have the rollup cube's grain without the city, so a
+city filter still sketches the filtered rows.
+"""
+import numpy as np
+import pandas as pd
+
+from olist.cube import slice_cells
+
+# column -> bin width, in the column's unit; also the error bound of that column's sketches
+SKETCH_WIDTHS = {
+    "delivery_time": 1.0,
+    "order_distance": 1.0,
+}
+
+
+def bin_codes(values, width):
+    return np.floor(np.asarray(values, dtype=np.float64) / width).astype(np.int64)
+
+
+class Sketch:
+    """Counts per fixed-width bin; ``bins`` sorted, only non-empty bins stored."""
+
+    def __init__(self, bins, counts, width):
+        self.bins = np.asarray(bins, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.width = width
+
+    @classmethod
+    def from_values(cls, values, width):
+        values = np.asarray(values, dtype=np.float64)
+        bins, counts = np.unique(bin_codes(values[~np.isnan(values)], width), return_counts=True)
+        return cls(bins, counts, width)
+
+    @classmethod
+    def from_cells(cls, cells, width):
+        """Merge the ``bin``/``count`` rows of a slice of a ``SketchCube`` table."""
+        bins, inverse = np.unique(cells["bin"].to_numpy(), return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1), weights=cells["count"].to_numpy(), minlength=len(bins))
+        return cls(bins, counts.astype(np.int64), width)
+
+    def merge(self, other):
+        if other.width != self.width:
+            raise ValueError("sketches with different bin widths cannot be merged")
+        bins, inverse = np.unique(np.concatenate([self.bins, other.bins]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, other.counts]), minlength=len(bins))
+        return Sketch(bins, counts.astype(np.int64), self.width)
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    @property
+    def error(self):
+        """Largest difference between a value read from the sketch and the true value."""
+        return self.width
+
+    def bounds_error(self, k=1.5):
+        """Largest difference between ``iqr_bounds(k)`` and the bounds computed on the rows."""
+        # Both quartiles read low by less than one width, so Q3 + k*IQR is off by less than (1 + k) widths
+        return (1 + k) * self.error
+
+    def values(self):
+        return self.bins * self.width
+
+    def quantile(self, q):
+        """Like ``Series.quantile`` (linear interpolation) over the bins' lower edges."""
+        n = len(self)
+        q = np.asarray(q, dtype=np.float64)
+        if not n:
+            return np.full(q.shape, np.nan)[()]
+        position = (n - 1) * q
+        lo, hi = np.floor(position).astype(np.int64), np.ceil(position).astype(np.int64)
+        cumulative = np.cumsum(self.counts)
+        values = self.values()
+        lo_value = values[cumulative.searchsorted(lo, side="right")]
+        hi_value = values[cumulative.searchsorted(hi, side="right")]
+        return (lo_value + (position - lo) * (hi_value - lo_value))[()]
+
+    def iqr_bounds(self, k=1.5):
+        """``(Q1 - k*IQR, Q3 + k*IQR)``, the notebook's outlier thresholds."""
+        q1, q3 = self.quantile([0.25, 0.75])
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+
+    def histogram(self, bins):
+        """``bins`` equal-width bins (``start``, ``end``, ``count``), as ``histogram_spec`` draws them."""
+        counts, edges = np.histogram(self.values(), bins=bins, weights=self.counts)
+        return pd.DataFrame({"start": edges[:-1], "end": edges[1:], "count": counts.astype(np.int64)})
+
+    def summary(self):
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        lower, upper = self.iqr_bounds()
+        return {"count": len(self), "q1": q1, "median": median, "q3": q3,
+                "lower_bound": lower, "upper_bound": upper, "error": self.error,
+                "bounds_error": self.bounds_error()}
+
+
+def build_sketches(all_df, column, width):
+    """Bin counts of ``column`` per day x state x bin, sorted by day."""
+    values = all_df[column].to_numpy(dtype=np.float64)
+    keep = ~np.isnan(values)
+    rows = all_df.loc[keep, ["order_purchase_timestamp", "customer_state"]]
+    day = rows["order_purchase_timestamp"].dt.floor("D").rename("day")
+    bins = pd.Series(bin_codes(values[keep], width), index=rows.index, name="bin")
+    table = rows.groupby([day, rows["customer_state"], bins], observed=True).size().rename("count")
+    return table.reset_index()
+
+
+class SketchCube:
+    def __init__(self, all_df, widths=None):
+        self.widths = dict(SKETCH_WIDTHS if widths is None else widths)
+        self.tables = {column: build_sketches(all_df, column, width) for column, width in self.widths.items()}
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def sketch(self, column, start=None, end=None, states=None):
+        """Merged sketch of ``column`` over the cells in ``[start, end]`` and ``states``."""
+        cells = slice_cells(self.tables[column], start, end, states)
+        return Sketch.from_cells(cells, self.widths[column])
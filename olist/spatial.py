@@ -0,0 +1,190 @@
+"""Grid index of customer and seller coordinates.
+
+Coordinates are binned into square cells of ``CELL_DEGREES`` (0.1 degree,
+about 11 km north-south). Two structures are built once per dataset:
+
+- density tables: items, distinct orders and revenue per day x customer state
+  x grid cell, so the density map of a date/state filter is a slice and a
+  bincount over the occupied cells, with one point per occupied cell instead
+  of one per row. Like the sketches, the cells leave out the city (which
+  would make them nearly as many as the rows); a city filter counts its rows;
+- ``GridIndex``: the rows sorted by grid cell. A radius query reads the cells
+  that overlap the circle's bounding box (one contiguous range per grid row)
+  and only runs haversine on those candidate rows.
+
+The bounding box does not wrap around the antimeridian, which Brazil is far
+from.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from olist.cube import slice_cells
+from olist.geo import EARTH_RADIUS_KM, haversine_np
+
+CELL_DEGREES = 0.1
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+LOCATIONS = {
+    "customer": ("customer_geolocation_lat", "customer_geolocation_lng"),
+    "seller": ("seller_geolocation_lat", "seller_geolocation_lng"),
+}
+
+
+def grid_columns(cell_degrees=CELL_DEGREES):
+    return int(math.ceil(360 / cell_degrees))
+
+
+def grid_cells(lat, lng, cell_degrees=CELL_DEGREES):
+    """Cell key ``row * grid_columns + column`` of each coordinate; -1 where it is missing."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    missing = np.isnan(lat) | np.isnan(lng)
+    rows = np.floor((np.where(missing, 0, lat) + 90) / cell_degrees).astype(np.int64)
+    columns = np.floor((np.where(missing, 0, lng) + 180) / cell_degrees).astype(np.int64)
+    keys = rows * grid_columns(cell_degrees) + columns
+    keys[missing] = -1
+    return keys
+
+
+def cell_centers(keys, cell_degrees=CELL_DEGREES):
+    """``(lat, lng)`` of the centers of cell ``keys``."""
+    rows, columns = np.divmod(np.asarray(keys, dtype=np.int64), grid_columns(cell_degrees))
+    return (rows + 0.5) * cell_degrees - 90, (columns + 0.5) * cell_degrees - 180
+
+
+def _located(df, location, cell_degrees):
+    """Rows of ``df`` with a ``location``, and their cell keys."""
+    lat_column, lng_column = LOCATIONS[location]
+    keys = grid_cells(df[lat_column], df[lng_column], cell_degrees)
+    return df[keys >= 0], keys[keys >= 0]
+
+
+def _density_frame(cells, items, orders, revenue, cell_degrees):
+    lat, lng = cell_centers(cells, cell_degrees)
+    density = pd.DataFrame({"cell": cells, "items": items, "orders": orders, "revenue": revenue,
+                            "lat": lat, "lng": lng})
+    return density.sort_values("items", ascending=False, kind="stable", ignore_index=True)
+
+
+def density_from_rows(df, location, cell_degrees=CELL_DEGREES):
+    """Same frame as ``SpatialIndex.density``, counted on the rows of ``df``."""
+    rows, keys = _located(df, location, cell_degrees)
+    density = rows.groupby(pd.Series(keys, index=rows.index, name="cell")).agg(
+        items=("order_id", "size"),
+        orders=("order_id", "nunique"),
+        revenue=("order_item_value", "sum"),
+    )
+    return _density_frame(density.index.to_numpy(), density["items"].to_numpy(), density["orders"].to_numpy(),
+                          density["revenue"].to_numpy(), cell_degrees)
+
+
+def build_density(all_df, location, cell_degrees=CELL_DEGREES):
+    """Items, distinct orders and revenue per day x state x cell, sorted by day; and the cell keys.
+
+    ``cell`` holds dense codes into the returned (sorted) cell keys.
+    """
+    rows, keys = _located(all_df, location, cell_degrees)
+    codes, cells = pd.factorize(keys, sort=True)
+    day = rows["order_purchase_timestamp"].dt.floor("D").rename("day")
+    cell = pd.Series(codes.astype(np.int32), index=rows.index, name="cell")
+    density = rows.groupby([day, rows["customer_state"], cell], observed=True).agg(
+        items=("order_id", "size"),
+        orders=("order_id", "nunique"),
+        revenue=("order_item_value", "sum"),
+    )
+    return density.reset_index(), cells
+
+
+class GridIndex:
+    """Row positions sorted by grid cell, for radius queries."""
+
+    def __init__(self, lat, lng, cell_degrees=CELL_DEGREES):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        keys = grid_cells(self.lat, self.lng, cell_degrees)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def candidates(self, lat, lng, radius_km):
+        """Positions of the rows in cells overlapping the bounding box of the circle."""
+        d = self.cell_degrees
+        dlat = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink with latitude; use the widest point of the box
+        widest = min(abs(lat) + dlat, 89.9)
+        dlng = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest))), 180)
+        n_columns = grid_columns(d)
+        row_lo = int(math.floor((max(lat - dlat, -90) + 90) / d))
+        row_hi = int(math.floor((min(lat + dlat, 90) + 90) / d))
+        column_lo = max(int(math.floor((lng - dlng + 180) / d)), 0)
+        column_hi = min(int(math.floor((lng + dlng + 180) / d)), n_columns - 1)
+
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64)
+        lo = self.keys.searchsorted(rows * n_columns + column_lo, side="left")
+        hi = self.keys.searchsorted(rows * n_columns + column_hi, side="right")
+        if not len(rows) or not (hi > lo).any():
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self.order[a:b] for a, b in zip(lo, hi) if b > a])
+
+    def within(self, lat, lng, radius_km, candidates=None):
+        """Sorted positions of the rows at most ``radius_km`` from ``(lat, lng)``.
+
+        ``candidates`` are the positions from ``candidates()``, if already known.
+        """
+        positions = self.candidates(lat, lng, radius_km) if candidates is None else candidates
+        distance = haversine_np(np.full(len(positions), lat), np.full(len(positions), lng),
+                                self.lat[positions], self.lng[positions])
+        return np.sort(positions[distance <= radius_km])
+
+
+class SpatialIndex:
+    def __init__(self, all_df, cell_degrees=CELL_DEGREES):
+        self.all_df = all_df
+        self.cell_degrees = cell_degrees
+        self.density_tables, self.cells = {}, {}
+        for location in LOCATIONS:
+            self.density_tables[location], self.cells[location] = build_density(all_df, location, cell_degrees)
+        self.grids = {location: GridIndex(all_df[lat], all_df[lng], cell_degrees)
+                      for location, (lat, lng) in LOCATIONS.items()}
+
+    def __len__(self):
+        return sum(len(table) for table in self.density_tables.values())
+
+    def density(self, location, start=None, end=None, states=None):
+        """Items, orders and revenue per occupied cell (center lat/lng), busiest first.
+
+        ``orders`` are distinct per grid cell; an order whose items fall in
+        several cells counts in each of them.
+        """
+        cells = slice_cells(self.density_tables[location], start, end, states)
+        code = cells["cell"].to_numpy()
+        n = len(self.cells[location])
+        # An order has one purchase day and state, so its day cells add up exactly per grid cell
+        sums = {column: np.bincount(code, weights=cells[column].to_numpy(dtype=np.float64), minlength=n)
+                for column in ["items", "orders", "revenue"]}
+        active = np.flatnonzero(sums["items"])
+        return _density_frame(self.cells[location][active], sums["items"][active].astype(np.int64),
+                              sums["orders"][active].astype(np.int64), sums["revenue"][active], self.cell_degrees)
+
+    def within(self, location, lat, lng, radius_km, start=None, end=None, states=None, cities=None):
+        """Rows whose ``location`` is within ``radius_km`` of ``(lat, lng)`` under the filters.
+
+        Returns ``(rows, candidates)``: the matching rows and how many rows the
+        grid index had to check.
+        """
+        grid = self.grids[location]
+        candidates = grid.candidates(lat, lng, radius_km)
+        rows = self.all_df.iloc[grid.within(lat, lng, radius_km, candidates)]
+        timestamps = rows["order_purchase_timestamp"]
+        mask = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            mask &= (timestamps >= pd.Timestamp(start).floor("D")).to_numpy()
+        if end is not None:
+            mask &= (timestamps < pd.Timestamp(end).floor("D") + pd.Timedelta(days=1)).to_numpy()
+        if states:
+            mask &= rows["customer_state"].isin(states).to_numpy()
+        if cities:
+            mask &= rows["customer_city"].isin(cities).to_numpy()
+        return rows[mask], len(candidates)
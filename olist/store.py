@@ -0,0 +1,101 @@
+"""all_df stored as Parquet files partitioned by purchase month.
+
+    <root>/_manifest.json
+    <root>/purchase_month=2017-01/part-<batch>.parquet
+
+The manifest records a version per partition that is bumped on every append,
+so derived aggregates only need recomputing for partitions whose version changed.
+"""
+import json
+import os
+import time
+
+import pandas as pd
+
+from olist.schema import SORT_COLUMN, apply_schema
+
+MANIFEST = "_manifest.json"
+PARTITION_PREFIX = "purchase_month="
+
+
+def purchase_month(df):
+    return df[SORT_COLUMN].dt.strftime("%Y-%m")
+
+
+class PartitionedStore:
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except OSError:
+            return {"partitions": {}, "batches": [], "thresholds": {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def reload(self):
+        self.manifest = self._load_manifest()
+
+    @property
+    def thresholds(self):
+        return self.manifest["thresholds"]
+
+    def set_thresholds(self, **thresholds):
+        self.manifest["thresholds"].update(thresholds)
+        self._save_manifest()
+
+    def partitions(self):
+        """``{month: version}`` of every stored partition."""
+        return {month: p["version"] for month, p in sorted(self.manifest["partitions"].items())}
+
+    def partition_dir(self, month):
+        return os.path.join(self.root, PARTITION_PREFIX + month)
+
+    def append(self, df, batch_id=None):
+        """Write ``df`` into its month partitions and return the affected months."""
+        batch_id = batch_id or time.strftime("%Y%m%dT%H%M%S")
+        if batch_id in self.manifest["batches"]:
+            raise ValueError(f"Batch {batch_id} was already appended")
+
+        df = apply_schema(df)
+        months = purchase_month(df)
+        affected = []
+        for month, part in df.groupby(months, sort=True):
+            os.makedirs(self.partition_dir(month), exist_ok=True)
+            path = os.path.join(self.partition_dir(month), f"part-{batch_id}.parquet")
+            part.sort_values(by=SORT_COLUMN, kind="stable").to_parquet(path + ".part", index=False)
+            os.replace(path + ".part", path)
+
+            entry = self.manifest["partitions"].setdefault(month, {"version": 0, "rows": 0})
+            entry["version"] += 1
+            entry["rows"] += len(part)
+            affected.append(month)
+
+        self.manifest["batches"].append(batch_id)
+        self._save_manifest()
+        return affected
+
+    def read_partition(self, month, columns=None):
+        directory = self.partition_dir(month)
+        files = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet"))
+        df = pd.concat([pd.read_parquet(f, columns=columns) for f in files], ignore_index=True)
+        if SORT_COLUMN in df.columns:
+            df = df.sort_values(by=SORT_COLUMN, kind="stable", ignore_index=True)
+        return df
+
+    def read(self, columns=None):
+        parts = [self.read_partition(month, columns) for month in self.partitions()]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        # Partitions are months in order, so the concatenation stays sorted;
+        # categoricals from different files are re-unified by apply_schema
+        return apply_schema(pd.concat(parts, ignore_index=True))
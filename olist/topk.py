@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def _order(values, positions, largest):
+    # Sort only the k selected positions; stable so ties keep their row order
+    keys = -values[positions] if largest else values[positions]
+    return positions[np.argsort(keys, kind="stable")]
+
+
+def _valid_positions(values):
+    if values.dtype.kind == "f":
+        return np.flatnonzero(~np.isnan(values))
+    return np.arange(len(values))
+
+
+def top_k(df, column, k=5, largest=True):
+    """``k`` rows with the largest (or smallest) ``column``, via argpartition."""
+    values = df[column].to_numpy()
+    valid = _valid_positions(values)
+    if len(valid) > k:
+        kth = len(valid) - k if largest else k - 1
+        part = valid[np.argpartition(values[valid], kth)]
+        valid = part[kth:] if largest else part[:k]
+    return df.iloc[_order(values, valid, largest)[:k]].reset_index(drop=True)
+
+
+def top_bottom_k(df, column, k=5):
+    """``(top, bottom)``: the k largest rows descending and the k smallest ascending.
+
+    Both ends come from a single argpartition, so only 2k values are sorted
+    instead of the whole aggregate.
+    """
+    values = df[column].to_numpy()
+    valid = _valid_positions(values)
+    n = len(valid)
+    if n > 2 * k:
+        part = valid[np.argpartition(values[valid], [k - 1, n - k])]
+        bottom, top = part[:k], part[n - k:]
+    else:
+        bottom = top = valid
+    top = _order(values, top, largest=True)[:k]
+    bottom = _order(values, bottom, largest=False)[:k]
+    return df.iloc[top].reset_index(drop=True), df.iloc[bottom].reset_index(drop=True)
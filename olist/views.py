@@ -0,0 +1,39 @@
+class Tab:
+    def __init__(self, name, compute, render):
+        self.name = name
+        self.compute = compute
+        self.render = render
+
+
+class TabRegistry:
+    """Dashboard tabs as (compute, render) pairs, run only for the selected tab.
+
+    ``compute(view)`` builds the tab's aggregates from a ``memo.FilterView``
+    and its result is memoized under ``tab:<name>`` for that filter key, so
+    switching back to a tab with unchanged filters only re-renders it.
+    """
+
+    def __init__(self):
+        self.tabs = {}
+
+    def __contains__(self, name):
+        return name in self.tabs
+
+    @property
+    def names(self):
+        return list(self.tabs)
+
+    def register(self, name, compute):
+        """Decorator registering the render function of tab ``name``."""
+        def decorator(render):
+            self.tabs[name] = Tab(name, compute, render)
+            return render
+        return decorator
+
+    def data(self, name, view):
+        tab = self.tabs[name]
+        return view.memo.get(f"tab:{name}", view.key, lambda: tab.compute(view))
+
+    def show(self, name, view):
+        tab = self.tabs[name]
+        tab.render(self.data(name, view))
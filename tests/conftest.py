@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.synthetic import generate
+from olist.loader import file_sha256, write_columnar
+from olist.service import Analytics
+
+
+@pytest.fixture(scope="session")
+def all_df():
+    # ~11k order items over two years and all 27 states
+    return generate(0.1, seed=1)
+
+
+@pytest.fixture(scope="session")
+def data_path(all_df, tmp_path_factory):
+    return write_columnar(all_df, str(tmp_path_factory.mktemp("data") / "all.parquet"))
+
+
+@pytest.fixture(scope="session")
+def analytics(data_path):
+    return Analytics(data_path, file_sha256(data_path))
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from olist.api import create_app
+from olist.loader import file_sha256
+
+
+@pytest.fixture(scope="module")
+def client(data_path):
+    with TestClient(create_app(data_path, file_sha256(data_path))) as client:
+        yield client
+
+
+def test_health(client, all_df):
+    assert client.get("/health").json()["rows"] == len(all_df)
+
+
+def counts(client, name):
+    for row in client.get("/stats").json()["aggregates"]:
+        if row["aggregate"] == name:
+            return row["hits"], row["misses"]
+    return 0, 0
+
+
+def test_ignored_params_share_one_entry(client):
+    query = {"start": "2017-01-01", "end": "2017-06-30", "state": ["SP"]}
+    bodies = [client.get("/aggregates/orders_by_state", params={**query, **extra}).content
+              for extra in [{}, {"period": "Monthly"}, {"k": 5, "bins": 3}, {"lat": 1.0, "mode": "approx"}]]
+    assert all(body == bodies[0] for body in bodies)
+    assert counts(client, "json:orders_by_state|period=Monthly") == (3, 1)
+
+    weekly = client.get("/aggregates/orders_by_state", params={**query, "period": "Weekly"})
+    assert len(json.loads(weekly.content)) > len(json.loads(bodies[0]))
+    assert counts(client, "json:orders_by_state|period=Weekly") == (0, 1)
+
+
+def test_errors(client):
+    assert client.get("/aggregates/nope").status_code == 404
+    assert client.get("/aggregates/orders_by_state", params={"period": "Yearly"}).status_code == 422
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from olist import aggregates
+from olist.cube import PERIODS, RollupCube
+
+RANGES = [
+    (None, None),
+    ("2017-03-01", "2017-03-31"),
+    ("2017-11-24 18:30", "2018-01-02 06:00"),
+]
+
+
+@pytest.fixture(scope="module")
+def cube(all_df):
+    return RollupCube(all_df)
+
+
+def rows(all_df, start=None, end=None, states=None):
+    day = all_df["order_purchase_timestamp"].dt.floor("D")
+    mask = pd.Series(True, index=all_df.index)
+    if start is not None:
+        mask &= day >= pd.Timestamp(start).floor("D")
+    if end is not None:
+        mask &= day <= pd.Timestamp(end).floor("D")
+    if states is not None:
+        mask &= all_df["customer_state"].isin(states)
+    return all_df[mask]
+
+
+def test_cells_add_up_to_rows(all_df, cube):
+    assert cube.table["items"].sum() == len(all_df)
+    assert cube.table["orders"].sum() == all_df["order_id"].nunique()
+    assert cube.table["revenue"].sum() == pytest.approx(all_df["order_item_value"].sum())
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+@pytest.mark.parametrize("states", [None, ["SP"], ["RJ", "MG", "AC"]])
+def test_daily_orders_matches_rows(all_df, cube, start, end, states):
+    expected = aggregates.create_daily_orders_df(rows(all_df, start, end, states))
+    actual = cube.daily_orders(cube.slice(start, end, states))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_freq=False)
+
+
+@pytest.mark.parametrize("time_period", list(PERIODS))
+@pytest.mark.parametrize("start, end", RANGES)
+def test_orders_by_state_matches_rows(all_df, cube, time_period, start, end):
+    states = ["SP", "RJ", "PR"]
+    expected = aggregates.orders_by_state(rows(all_df, start, end, states), time_period)
+    actual = cube.orders_by_state(cube.slice(start, end, states), time_period)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_names=False,
+                                  check_index_type=False, check_column_type=False)
+
+
+def test_city_slice_matches_rows(all_df, cube):
+    cities = all_df["customer_city"].value_counts().index[:3].tolist()
+    expected = all_df[all_df["customer_city"].isin(cities)]
+    cells = cube.slice(cities=cities)
+    assert cells["items"].sum() == len(expected)
+    assert cells["orders"].sum() == expected["order_id"].nunique()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist.etl import fill_missing_geolocation
+
+
+def notebook_loop(all_df, geoloc_state_df, state_column):
+    # Cell "Mengisi koordinat kode pos ..." of proyek_akhir_analisa_data.ipynb, as written except
+    # for the write: all_df["geolocation_lat"][i] = ... is a no-op chained assignment under
+    # copy-on-write, so it goes through .loc
+    all_df = all_df.copy()
+    i = 0
+    while i < len(all_df["order_id"]):
+        cek = pd.isna(all_df["geolocation_lat"][i])
+        if cek == True:
+            all_df.loc[i, "geolocation_lat"] = geoloc_state_df.loc[geoloc_state_df["geolocation_state"] == all_df[state_column][i], 'state_geolocation_lat'].iloc[0]
+            all_df.loc[i, "geolocation_lng"] = geoloc_state_df.loc[geoloc_state_df["geolocation_state"] == all_df[state_column][i], 'state_geolocation_lng'].iloc[0]
+        i = i+1
+    return all_df
+
+
+@pytest.fixture
+def geoloc_state_df():
+    return pd.DataFrame({
+        "geolocation_state": ["SP", "RJ", "MG"],
+        "state_geolocation_lat": [-23.5, -22.9, -19.9],
+        "state_geolocation_lng": [-46.6, -43.2, -43.9],
+    })
+
+
+def sample(states, missing, seed=0):
+    rng = np.random.default_rng(seed)
+    all_df = pd.DataFrame({
+        "order_id": np.arange(len(states)),
+        "customer_state": states,
+        "geolocation_lat": rng.uniform(-30, -5, len(states)),
+        "geolocation_lng": rng.uniform(-60, -35, len(states)),
+    })
+    all_df.loc[missing, ["geolocation_lat", "geolocation_lng"]] = np.nan
+    return all_df
+
+
+def test_fill_matches_notebook_loop(geoloc_state_df):
+    all_df = sample(["SP", "RJ", "MG", "SP", "RJ", "SP", "MG", "MG"], [0, 2, 3, 7])
+    expected = notebook_loop(all_df, geoloc_state_df, "customer_state")
+    result = fill_missing_geolocation(all_df, geoloc_state_df, "customer_state")
+    pd.testing.assert_frame_equal(result, expected)
+    assert not result[["geolocation_lat", "geolocation_lng"]].isna().any().any()
+
+
+def test_fill_categorical_states(geoloc_state_df):
+    all_df = sample(["SP", "RJ", "MG", "SP"], [1, 3])
+    expected = notebook_loop(all_df, geoloc_state_df, "customer_state")
+    result = fill_missing_geolocation(all_df.astype({"customer_state": "category"}), geoloc_state_df,
+                                      "customer_state")
+    pd.testing.assert_frame_equal(result[["geolocation_lat", "geolocation_lng"]],
+                                  expected[["geolocation_lat", "geolocation_lng"]])
+
+
+def test_state_without_fallback_row(geoloc_state_df):
+    all_df = sample(["SP", "AC", "RJ", "AC"], [1, 2])
+    # The notebook's .iloc[0] has no row to take for AC
+    with pytest.raises(IndexError):
+        notebook_loop(all_df, geoloc_state_df, "customer_state")
+
+    result = fill_missing_geolocation(all_df, geoloc_state_df, "customer_state")
+    # AC stays missing, the other rows are filled as in the notebook
+    assert result.loc[1, ["geolocation_lat", "geolocation_lng"]].isna().all()
+    assert result.loc[2, "geolocation_lat"] == -22.9
+    pd.testing.assert_frame_equal(result.loc[[0, 3]], all_df.loc[[0, 3]])
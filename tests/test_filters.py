@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from olist.filters import FilterIndex
+
+
+@pytest.fixture(scope="module")
+def index(all_df):
+    return FilterIndex(all_df)
+
+
+def masked(all_df, start_date=None, end_date=None, states=None, cities=None):
+    timestamps = all_df["order_purchase_timestamp"]
+    mask = pd.Series(True, index=all_df.index)
+    if start_date is not None:
+        mask &= timestamps >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= timestamps < pd.Timestamp(end_date)
+    if states:
+        mask &= all_df["customer_state"].isin(states)
+    if cities:
+        mask &= all_df["customer_city"].isin(cities)
+    return all_df[mask]
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    (None, None),
+    ("2017-01-01", "2017-07-01"),
+    ("2017-05-03 12:00", None),
+    (None, "2016-10-01"),
+    ("2018-01-01", "2017-01-01"),
+])
+@pytest.mark.parametrize("states, cities", [
+    (None, None),
+    (["SP"], None),
+    (["RJ", "AC", "XX"], None),
+    (None, "top"),
+    (["SP", "MG"], "top"),
+    ([], []),
+])
+def test_filter_matches_boolean_mask(all_df, index, start_date, end_date, states, cities):
+    if cities == "top":
+        # The busiest cities, plus one that does not exist
+        cities = all_df["customer_city"].value_counts().index[:4].tolist() + ["nowhere"]
+    expected = masked(all_df, start_date, end_date, states, cities)
+    pd.testing.assert_frame_equal(index.filter(start_date, end_date, states, cities), expected)
+
+
+def test_city_options(all_df, index):
+    cities = index.city_options(["RJ", "MG"])
+    expected = all_df.loc[all_df["customer_state"].isin(["RJ", "MG"]), "customer_city"].dropna().unique()
+    assert sorted(cities) == sorted(expected)
+    assert len(index.city_options()) == all_df["customer_city"].nunique()
+
+
+def test_unsorted_frame_is_rejected(all_df):
+    with pytest.raises(ValueError):
+        FilterIndex(all_df.iloc[::-1])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist import aggregates
+from olist.hll import DISTINCT_COLUMNS, DistinctCube, HyperLogLog, standard_error
+
+
+@pytest.fixture(scope="module")
+def cube(all_df):
+    return DistinctCube(all_df)
+
+
+def test_merge_equals_sketch_of_union():
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, 10**9, 30_000), rng.integers(0, 10**9, 50_000)
+    merged = HyperLogLog.from_values(a).merge(HyperLogLog.from_values(b))
+    np.testing.assert_array_equal(merged.registers, HyperLogLog.from_values(np.concatenate([a, b])).registers)
+    # Merging is idempotent, so overlapping inputs are not counted twice
+    np.testing.assert_array_equal(merged.merge(HyperLogLog.from_values(a)).registers, merged.registers)
+
+
+@pytest.mark.parametrize("n", [100, 5_000, 200_000])
+def test_count_within_standard_error(n):
+    values = np.random.default_rng(n).choice(10**12, n, replace=False)
+    # Duplicates do not change the estimate
+    count = HyperLogLog.from_values(np.concatenate([values, values[: n // 2]])).count()
+    assert abs(count - n) <= 4 * standard_error() * n
+
+
+@pytest.mark.parametrize("name", list(DISTINCT_COLUMNS))
+@pytest.mark.parametrize("start, end, states, cities", [
+    (None, None, None, None),
+    ("2017-02-01", "2017-08-31", ["SP", "MG"], None),
+    ("2017-01-01", "2018-06-30", None, "top"),
+])
+def test_cube_sketch_equals_sketch_of_rows(all_df, cube, name, start, end, states, cities):
+    if cities == "top":
+        cities = all_df["customer_city"].value_counts().index[:5].tolist()
+    day = all_df["order_purchase_timestamp"].dt.floor("D")
+    mask = pd.Series(True, index=all_df.index)
+    if start is not None:
+        mask &= (day >= pd.Timestamp(start)) & (day <= pd.Timestamp(end))
+    if states is not None:
+        mask &= all_df["customer_state"].isin(states)
+    if cities is not None:
+        mask &= all_df["customer_city"].isin(cities)
+    values = all_df.loc[mask, DISTINCT_COLUMNS[name]]
+
+    sketch = cube.sketch(name, start, end, states, cities)
+    np.testing.assert_array_equal(sketch.registers, HyperLogLog.from_values(values.to_numpy()).registers)
+    assert abs(sketch.count() - values.nunique()) <= 4 * standard_error() * values.nunique()
+
+
+def test_distinct_counts_within_standard_error(all_df, cube):
+    exact = aggregates.create_distinct_counts_df(all_df).set_index("customer_state")
+    approx = cube.distinct_counts().set_index("customer_state")
+    assert list(approx.index) == list(exact.index)
+    for name in DISTINCT_COLUMNS:
+        assert (abs(approx[name] - exact[name]) <= 4 * standard_error() * exact[name] + 1).all()
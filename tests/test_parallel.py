@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from olist import parallel
+from olist.compact import compact_frame
+
+
+def engine_param(name):
+    if name in ("polars", "duckdb"):
+        return pytest.param(name, marks=pytest.mark.skipif(name not in parallel.available_engines(),
+                                                           reason=f"{name} is not installed"))
+    return name
+
+
+ENGINES = [engine_param(name) for name in parallel.ENGINES if name != "pandas"]
+
+
+@pytest.fixture(autouse=True)
+def small_partitions(monkeypatch):
+    # Several partitions even on the test frame
+    monkeypatch.setattr(parallel, "MIN_PARTITION_ROWS", 1_000)
+
+
+@pytest.fixture(scope="module", params=["raw", "compact"])
+def df(request, all_df):
+    return all_df if request.param == "raw" else compact_frame(all_df)[0]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("name", list(parallel.OPERATIONS))
+def test_engine_matches_pandas(df, engine, name):
+    pd.testing.assert_frame_equal(parallel.run(name, df, engine, max_workers=2), parallel.run(name, df, "pandas"))
+
+
+def test_customer_partitions_match_pandas(df):
+    pd.testing.assert_frame_equal(parallel.run("rfm_state", df, "process", partition_by="customer", max_workers=2),
+                                  parallel.run("rfm_state", df, "pandas"))
+
+
+def test_time_partitions_cut_at_days(all_df):
+    bounds = parallel.time_partitions(all_df, 7)
+    assert len(bounds) > 1 and bounds[0][0] == 0 and bounds[-1][1] == len(all_df)
+    days = all_df[parallel.TIME_COLUMN].dt.floor("D")
+    for (_, hi), (lo, _) in zip(bounds[:-1], bounds[1:]):
+        assert hi == lo and days[lo - 1] < days[lo]
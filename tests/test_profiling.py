@@ -0,0 +1,54 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from olist.profiling import StageProfiler, active_profiler
+
+
+@pytest.fixture(autouse=True)
+def not_tracing():
+    tracemalloc.stop()
+    yield
+    tracemalloc.stop()
+
+
+def test_last_tracer_stops_tracemalloc():
+    first = StageProfiler(trace_memory=True).activate()
+    second = StageProfiler(trace_memory=True)
+    thread = threading.Thread(target=second.activate)
+    thread.start()
+    thread.join()
+    first.deactivate()
+    assert tracemalloc.is_tracing()
+    second.deactivate()
+    assert not tracemalloc.is_tracing()
+
+
+def test_deactivate_is_idempotent():
+    with StageProfiler(trace_memory=True) as profiler:
+        other = StageProfiler(trace_memory=True).activate()
+        profiler.deactivate()
+        profiler.deactivate()
+        assert tracemalloc.is_tracing()
+        other.deactivate()
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    with StageProfiler(trace_memory=True) as profiler:
+        with profiler.stage("allocate"):
+            data = [bytearray(1 << 20)]
+    del data
+    assert tracemalloc.is_tracing()
+    assert profiler.records[0]["traced_peak_mb"] >= 1
+
+
+def test_context_manager_deactivates_on_error():
+    with pytest.raises(RuntimeError):
+        with StageProfiler(trace_memory=True) as profiler:
+            assert active_profiler() is profiler
+            raise RuntimeError
+    assert active_profiler() is None
+    assert not tracemalloc.is_tracing()
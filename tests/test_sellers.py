@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist.sellers import PERCENTILES, SellerCube, seller_table
+from olist.sketches import SKETCH_WIDTHS
+
+
+@pytest.fixture(scope="module")
+def cube(all_df):
+    return SellerCube(all_df)
+
+
+def rows(all_df, start=None, end=None, states=None):
+    day = all_df["order_purchase_timestamp"].dt.floor("D")
+    mask = pd.Series(True, index=all_df.index)
+    if start is not None:
+        mask &= day >= pd.Timestamp(start).floor("D")
+    if end is not None:
+        mask &= day <= pd.Timestamp(end).floor("D")
+    if states is not None:
+        mask &= all_df["customer_state"].isin(states)
+    return all_df[mask]
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    ("2017-03-01", "2017-03-31"),
+    ("2017-03-05", "2017-03-20"),
+    ("2016-10-10", "2018-02-14"),
+    ("2017-06-15 13:00", "2018-08-01"),
+    ("2018-01-01", "2017-01-01"),
+])
+@pytest.mark.parametrize("states", [None, ["SP"], ["RJ", "BA"]])
+def test_cube_matches_rows(all_df, cube, start, end, states):
+    expected = seller_table(rows(all_df, start, end, states))
+    pd.testing.assert_frame_equal(cube.table(start, end, states), expected, check_dtype=False)
+
+
+def test_seller_table_matches_groupby(all_df):
+    table = seller_table(all_df)
+    grouped = all_df.groupby("seller_id").agg(orders=("order_id", "nunique"), items=("order_id", "size"),
+                                              revenue=("order_item_value", "sum"),
+                                              review_score=("review_score", "mean"))
+    pd.testing.assert_frame_equal(table[grouped.columns], grouped, check_dtype=False)
+    assert (table.index == np.sort(table.index)).all()
+
+    for column, width in SKETCH_WIDTHS.items():
+        for name, q in PERCENTILES.items():
+            # Read from bin counts: at most one width below the rows' percentile
+            error = all_df.groupby("seller_id")[column].quantile(q) - table[f"{column}_{name}"]
+            assert ((error >= 0) & (error < width)).all()
+
+
+def test_city_filter_uses_rows(all_df, analytics):
+    city = all_df["customer_city"].value_counts().index[0]
+    flt = analytics.make_filter("2017-02-10", "2017-11-20", ["SP", "RJ"], [city])
+    expected = seller_table(analytics.main_df(flt))
+    pd.testing.assert_frame_equal(analytics.seller_table(flt), expected)
+    assert (analytics.seller_table(flt)["seller_city"].notna()).all()
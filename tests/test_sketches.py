@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist.sketches import SKETCH_WIDTHS, Sketch, SketchCube
+
+QUANTILES = [0, 0.05, 0.25, 0.5, 0.75, 0.9, 0.99, 1]
+
+
+@pytest.fixture(scope="module")
+def cube(all_df):
+    return SketchCube(all_df)
+
+
+def rows(all_df, start=None, end=None, states=None):
+    day = all_df["order_purchase_timestamp"].dt.floor("D")
+    mask = pd.Series(True, index=all_df.index)
+    if start is not None:
+        mask &= day >= pd.Timestamp(start)
+    if end is not None:
+        mask &= day <= pd.Timestamp(end)
+    if states is not None:
+        mask &= all_df["customer_state"].isin(states)
+    return all_df[mask]
+
+
+@pytest.mark.parametrize("column", list(SKETCH_WIDTHS))
+@pytest.mark.parametrize("start, end, states", [
+    (None, None, None),
+    ("2017-06-01", "2017-09-15", None),
+    ("2017-01-01", "2018-03-31", ["RJ", "BA"]),
+])
+def test_slice_equals_sketch_of_rows(all_df, cube, column, start, end, states):
+    values = rows(all_df, start, end, states)[column]
+    sketch = cube.sketch(column, start, end, states)
+    expected = Sketch.from_values(values, SKETCH_WIDTHS[column])
+    np.testing.assert_array_equal(sketch.bins, expected.bins)
+    np.testing.assert_array_equal(sketch.counts, expected.counts)
+    assert len(sketch) == values.count()
+
+
+@pytest.mark.parametrize("width", [0.5, 1.0, 7.0])
+def test_quantiles_and_bounds_within_error(all_df, width):
+    values = all_df["order_distance"]
+    sketch = Sketch.from_values(values, width)
+    # Values are read at their bin's lower edge: never above the true figure, less than a width below
+    error = values.quantile(QUANTILES).to_numpy() - sketch.quantile(QUANTILES)
+    assert (error >= 0).all() and (error < sketch.error).all()
+
+    q1, q3 = values.quantile([0.25, 0.75])
+    for k in [0, 1.5, 3]:
+        lower, upper = sketch.iqr_bounds(k)
+        assert abs(lower - (q1 - k * (q3 - q1))) < sketch.bounds_error(k)
+        assert abs(upper - (q3 + k * (q3 - q1))) < sketch.bounds_error(k)
+
+
+def test_histogram_of_whole_days_is_exact(all_df):
+    values = all_df["delivery_time"].dropna()
+    counts, edges = np.histogram(values, bins=20)
+    histogram = Sketch.from_values(values, 1.0).histogram(20)
+    np.testing.assert_array_equal(histogram["count"], counts)
+    np.testing.assert_allclose(histogram[["start", "end"]].to_numpy(), np.c_[edges[:-1], edges[1:]])
+
+
+def test_merge_equals_sketch_of_union(all_df):
+    values = all_df["order_distance"].to_numpy()
+    half = len(values) // 3
+    merged = Sketch.from_values(values[half:], 1.0).merge(Sketch.from_values(values[:half], 1.0))
+    expected = Sketch.from_values(values, 1.0)
+    np.testing.assert_array_equal(merged.bins, expected.bins)
+    np.testing.assert_array_equal(merged.counts, expected.counts)
+    with pytest.raises(ValueError):
+        merged.merge(Sketch.from_values(values, 2.0))
+
+
+def test_empty_sketch():
+    sketch = Sketch.from_values([np.nan], 1.0)
+    assert len(sketch) == 0 and np.isnan(sketch.quantile(0.5))